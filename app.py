@@ -1,7 +1,8 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-import psycopg2, psycopg2.extras, psycopg2.pool, random, string, hashlib, os, json, click
+from flask import Flask, render_template, request, redirect, url_for, session, flash, g, has_request_context
+import psycopg2, psycopg2.extras, psycopg2.pool, random, string, hashlib, os, json, click, threading, time, re, zlib, hmac
 from datetime import datetime, timezone, timedelta
-from functools import wraps
+from functools import wraps, lru_cache
+from operator import itemgetter
 
 # Load .env file automatically when running locally
 # (python-dotenv is optional — skipped silently if not installed)
@@ -42,7 +43,7 @@ ADMIN_PASSWORD_INIT = os.environ.get('ADMIN_PASSWORD', 'changeme')
 
 @app.context_processor
 def inject_globals():
-    return dict(json=json)
+    return dict(json=json, asset_url=asset_url)
 
 @app.template_filter('dt_fmt')
 def dt_fmt(value, fmt='%Y-%m-%d'):
@@ -72,6 +73,224 @@ def eat_fmt(value, fmt='%d %b %Y, %I:%M %p'):
     except Exception:
         return str(value)
 
+# ─── Static assets ────────────────────────────────────────────────────────────
+# Templates link files in static/ through asset_url(), which puts a content
+# hash in the filename (js/quiz.js -> /assets/js/quiz.<hash>.js). The hash
+# changes whenever the file does, so /assets/ responses are cached by browsers
+# for a year. `flask build-assets` writes .gz/.br siblings next to text assets;
+# the asset route serves those directly when the client accepts them.
+
+ASSET_MAX_AGE        = 365 * 24 * 3600
+ASSET_COMPRESS_EXTS  = ('.js', '.css', '.svg', '.json', '.webmanifest', '.ico', '.txt')
+ASSET_ENCODINGS      = (('br', '.br'), ('gzip', '.gz'))
+_HASHED_ASSET        = re.compile(r'^(?P<stem>.+)\.(?P<digest>[0-9a-f]{12})(?P<ext>\.[A-Za-z0-9]+)$')
+_asset_digests       = {}   # relative path -> (mtime, digest)
+
+def _asset_path(relpath):
+    """Absolute path of a file under static/, or None if it escapes the folder."""
+    from werkzeug.security import safe_join
+    return safe_join(app.static_folder, relpath)
+
+def asset_digest(relpath):
+    """Short content hash of a static file, recomputed only when it changes."""
+    full  = _asset_path(relpath)
+    if full is None:
+        raise FileNotFoundError(relpath)
+    mtime = os.path.getmtime(full)
+    hit   = _asset_digests.get(relpath)
+    if hit and hit[0] == mtime:
+        return hit[1]
+    with open(full, 'rb') as fh:
+        digest = hashlib.sha256(fh.read()).hexdigest()[:12]
+    _asset_digests[relpath] = (mtime, digest)
+    return digest
+
+def asset_url(relpath):
+    """Fingerprinted URL for a file in static/ (plain static URL if it is missing)."""
+    try:
+        digest = asset_digest(relpath)
+    except OSError:
+        return url_for('static', filename=relpath)
+    stem, ext = os.path.splitext(relpath)
+    return url_for('asset', filename=f'{stem}.{digest}{ext}')
+
+@app.route('/assets/<path:filename>')
+def asset(filename):
+    from flask import send_file, abort
+    import mimetypes
+    m = _HASHED_ASSET.match(filename)
+    if not m:
+        abort(404)
+    relpath = m['stem'] + m['ext']
+    full    = _asset_path(relpath)
+    if full is None or not os.path.isfile(full):
+        abort(404)
+    mimetype = mimetypes.guess_type(relpath)[0] or 'application/octet-stream'
+    accepted = request.headers.get('Accept-Encoding', '')
+    served, encoding = full, None
+    for enc, suffix in ASSET_ENCODINGS:
+        variant = full + suffix
+        if enc in accepted and os.path.isfile(variant) \
+                and os.path.getmtime(variant) >= os.path.getmtime(full):
+            served, encoding = variant, enc
+            break
+    resp = send_file(served, mimetype=mimetype, conditional=True)
+    if encoding:
+        resp.headers['Content-Encoding'] = encoding
+    resp.vary.add('Accept-Encoding')
+    if asset_digest(relpath) == m['digest']:
+        resp.headers['Cache-Control'] = f'public, max-age={ASSET_MAX_AGE}, immutable'
+    else:
+        # A page rendered before a deploy asked for an old hash: serve the
+        # current file, but don't let it be cached under that name.
+        resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+def build_compressed_assets(force=False):
+    """Write .gz (and .br, when the optional brotli package is installed)
+    next to each compressible file in static/. Returns (written, skipped, brotli_available)."""
+    import gzip
+    written = skipped = 0
+    for root, _, files in os.walk(app.static_folder):
+        for name in files:
+            if not name.endswith(ASSET_COMPRESS_EXTS):
+                continue
+            full = os.path.join(root, name)
+            with open(full, 'rb') as fh:
+                data = fh.read()
+            variants = [('.gz', lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                variants.append(('.br', lambda d: brotli.compress(d, quality=11)))
+            for suffix, compress in variants:
+                target = full + suffix
+                if not force and os.path.isfile(target) \
+                        and os.path.getmtime(target) >= os.path.getmtime(full):
+                    skipped += 1
+                    continue
+                packed = compress(data)
+                if len(packed) >= len(data):
+                    continue   # not worth serving
+                with open(target, 'wb') as fh:
+                    fh.write(packed)
+                written += 1
+    return written, skipped, brotli is not None
+
+# ─── Response compression & conditional GET ───────────────────────────────────
+# Dynamic text responses (HTML, JSON, CSV, metrics) are gzip- or brotli-encoded
+# on the way out once they pass COMPRESS_MIN_BYTES; streamed bodies are
+# compressed chunk by chunk. Heavy read-only pages call not_modified() with a
+# cheap data version (row counts / max ids) before running their aggregates, so
+# a repeat refresh with nothing new is a 304 that never touches those queries.
+
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', '1024'))
+COMPRESS_LEVEL     = int(os.environ.get('COMPRESS_LEVEL', '6'))
+_COMPRESSIBLE      = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+try:
+    import brotli   # optional dependency — gzip-only without it
+except ImportError:
+    brotli = None
+
+def _response_encoding():
+    """Best content-coding the client accepts: 'br', 'gzip' or None."""
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+def _compressor(encoding):
+    """(feed, finish) pair for an incremental compressor."""
+    if encoding == 'br':
+        c = brotli.Compressor(quality=min(COMPRESS_LEVEL, 11))
+        return c.process, c.finish
+    z = zlib.compressobj(COMPRESS_LEVEL, 8, 31)   # wbits 31 = gzip container
+    return z.compress, z.flush
+
+def _compress_stream(chunks, encoding):
+    feed, finish = _compressor(encoding)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            out = feed(chunk)
+            if out:
+                yield out
+        yield finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close:
+            close()
+
+@app.after_request
+def _compress_response(response):
+    if (request.method == 'HEAD' or response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or not (response.mimetype or '').startswith(_COMPRESSIBLE)):
+        return response
+    encoding = _response_encoding()
+    response.vary.add('Accept-Encoding')
+    if not encoding:
+        return response
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_BYTES:
+            return response
+        feed, finish = _compressor(encoding)
+        response.set_data(feed(data) + finish())
+    response.headers['Content-Encoding'] = encoding
+    # The encoded body is a different byte sequence, so a strong validator
+    # set upstream may only be reused as a weak one.
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def _build_stamp():
+    """Changes whenever app.py or a template does, so a deploy invalidates every ETag."""
+    paths = [__file__]
+    for root, _, files in os.walk(os.path.join(app.root_path, 'templates')):
+        paths += [os.path.join(root, f) for f in files]
+    return str(max((os.path.getmtime(p) for p in paths if os.path.exists(p)), default=0))
+
+_BUILD_STAMP = _build_stamp()
+
+# Newest admin or system mutation — every admin CRUD branch and CLI data change
+# (seeds, imports, regrades) writes an audit row, so this covers edits that
+# leave counts alone, such as renamed sessions or re-scored answers.
+ADMIN_EPOCH_SQL = "(SELECT COALESCE(MAX(id), 0) FROM audit_logs WHERE category <> 'user')"
+
+def not_modified(*version):
+    """Conditional GET for a read-only page.
+
+    `version` is whatever cheaply identifies the data behind the page. The weak
+    ETag also covers the URL, the viewer and the deployed code. Returns a 304
+    response when the client's If-None-Match already matches; otherwise tags
+    the eventual 200 and returns None. Pages with a pending flash message are
+    never validated — the message must be rendered.
+    """
+    if request.method != 'GET' or session.get('_flashes'):
+        return None
+    tag = hashlib.sha1(repr((_BUILD_STAMP, request.full_path, session.get('user_id'),
+                             bool(session.get('is_admin')), version)).encode()).hexdigest()[:24]
+    g.page_etag = tag
+    if request.if_none_match.contains_weak(tag):
+        resp = app.response_class(status=304)
+        resp.set_etag(tag, weak=True)
+        resp.headers['Cache-Control'] = 'private, no-cache'
+        return resp
+    return None
+
+@app.after_request
+def _page_etag(response):
+    tag = g.get('page_etag')
+    if tag and response.status_code == 200 and not response.get_etag()[0]:
+        response.set_etag(tag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 # ─── DB connection pool ───────────────────────────────────────────────────────
 # On cPanel shared hosting, Python apps run under Phusion Passenger (not
 # Waitress).  Passenger forks worker processes, so the pool is created lazily
@@ -108,7 +327,16 @@ def get_db():
     Set DB credentials in cPanel > Software > Setup Python App > Environment Variables:
       DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
     """
-    conn = _get_pool().getconn()
+    t0 = time.perf_counter()
+    try:
+        conn = _get_pool().getconn()
+    except psycopg2.pool.PoolError:
+        POOL_EXHAUSTED.inc()
+        raise
+    waited = time.perf_counter() - t0
+    POOL_WAIT.observe(waited)
+    if DB_INSTRUMENT:
+        _record_pool_wait(waited)
     conn.autocommit = False
     # Use DictCursor so columns are accessible by name (like sqlite3.Row)
     conn.cursor_factory = psycopg2.extras.RealDictCursor
@@ -128,16 +356,118 @@ def close_db(conn):
         except Exception:
             pass
 
+# ─── DB instrumentation (opt-in) ──────────────────────────────────────────────
+# DB_INSTRUMENT=1 makes every statement issued through the helpers below count
+# towards per-request totals (statements, DB time, pool wait — also returned as
+# X-DB-* response headers) and a per-process table of SQL fingerprints shown
+# at /admin/db-stats.  Statements slower than DB_SLOW_MS are logged, as are
+# requests issuing more than DB_REQUEST_STMT_WARN statements (likely N+1).
+# Off by default: the helpers then run exactly as before.
+
+DB_INSTRUMENT        = os.environ.get('DB_INSTRUMENT', '').lower() in ('1', 'true', 'yes')
+DB_SLOW_MS           = float(os.environ.get('DB_SLOW_MS', '200'))
+DB_REQUEST_STMT_WARN = int(os.environ.get('DB_REQUEST_STMT_WARN', '50'))
+
+_stmt_lock     = threading.Lock()
+_stmt_stats    = {}   # fingerprint -> [calls, total_s, max_s]
+_endpoint_db   = {}   # endpoint    -> [requests, statements, db_s, pool_wait_s]
+
+_FP_STRING = re.compile(r"'(?:[^']|'')*'")
+_FP_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_FP_SPACE  = re.compile(r'\s+')
+
+@lru_cache(maxsize=1024)
+def sql_fingerprint(sql):
+    """Normalise SQL so the same statement with different literals groups together."""
+    fp = _FP_STRING.sub('?', sql)
+    fp = _FP_NUMBER.sub('?', fp).replace('%s', '?')
+    return _FP_SPACE.sub(' ', fp).strip()
+
+def _request_db_stats():
+    if not has_request_context():
+        return None
+    if 'db_stats' not in g:
+        g.db_stats = {'statements': 0, 'db_s': 0.0, 'pool_wait_s': 0.0}
+    return g.db_stats
+
+def _record_pool_wait(elapsed):
+    rs = _request_db_stats()
+    if rs is not None:
+        rs['pool_wait_s'] += elapsed
+
+def _record_statement(sql, elapsed):
+    fp = sql_fingerprint(sql)
+    with _stmt_lock:
+        st = _stmt_stats.get(fp)
+        if st is None:
+            st = _stmt_stats[fp] = [0, 0.0, 0.0]
+        st[0] += 1
+        st[1] += elapsed
+        if elapsed > st[2]:
+            st[2] = elapsed
+    rs = _request_db_stats()
+    if rs is not None:
+        rs['statements'] += 1
+        rs['db_s'] += elapsed
+    if elapsed * 1000 >= DB_SLOW_MS:
+        app.logger.warning('Slow query (%.0f ms) in %s: %s', elapsed * 1000,
+                           request.endpoint if has_request_context() else 'cli', fp[:300])
+
+def _execute(cur, sql, params):
+    if DB_INSTRUMENT:
+        t0 = time.perf_counter()
+        try:
+            cur.execute(sql, params)
+        finally:
+            _record_statement(sql, time.perf_counter() - t0)
+    else:
+        cur.execute(sql, params)
+
+@app.after_request
+def _db_stats_after_request(response):
+    rs = g.get('db_stats') if DB_INSTRUMENT else None
+    if rs is None:
+        return response
+    response.headers['X-DB-Statements']   = str(rs['statements'])
+    response.headers['X-DB-Time-ms']      = f"{rs['db_s'] * 1000:.1f}"
+    response.headers['X-DB-Pool-Wait-ms'] = f"{rs['pool_wait_s'] * 1000:.1f}"
+    endpoint = request.endpoint or request.path
+    with _stmt_lock:
+        ep = _endpoint_db.get(endpoint)
+        if ep is None:
+            ep = _endpoint_db[endpoint] = [0, 0, 0.0, 0.0]
+        ep[0] += 1
+        ep[1] += rs['statements']
+        ep[2] += rs['db_s']
+        ep[3] += rs['pool_wait_s']
+    if rs['statements'] > DB_REQUEST_STMT_WARN:
+        app.logger.warning('%s issued %d statements in one request (N+1?)',
+                           endpoint, rs['statements'])
+    return response
+
+def db_stats_snapshot(limit=50):
+    """Top statement fingerprints by total time, plus per-endpoint totals."""
+    with _stmt_lock:
+        stmts = sorted(_stmt_stats.items(), key=lambda kv: kv[1][1], reverse=True)[:limit]
+        endpoints = sorted(_endpoint_db.items(), key=lambda kv: kv[1][2], reverse=True)
+    return (
+        [dict(sql=fp, calls=c, total_ms=t * 1000, avg_ms=t * 1000 / c, max_ms=m * 1000)
+         for fp, (c, t, m) in stmts],
+        [dict(endpoint=e, requests=r, stmts_per_req=n / r, db_ms_per_req=d * 1000 / r,
+              pool_wait_ms_per_req=w * 1000 / r)
+         for e, (r, n, d, w) in endpoints],
+    )
+
 def _exec(conn, sql, params=()):
     """Execute a statement, return cursor."""
     cur = conn.cursor()
-    cur.execute(sql, params)
+    _execute(cur, sql, params)
     return cur
 
 def _fetchone(conn, sql, params=()):
     """Execute and return one row as a dict-like object."""
     cur = conn.cursor()
-    cur.execute(sql, params)
+    _execute(cur, sql, params)
     row = cur.fetchone()
     cur.close()
     return row
@@ -145,7 +475,7 @@ def _fetchone(conn, sql, params=()):
 def _fetchall(conn, sql, params=()):
     """Execute and return all rows."""
     cur = conn.cursor()
-    cur.execute(sql, params)
+    _execute(cur, sql, params)
     rows = cur.fetchall()
     cur.close()
     return rows
@@ -157,12 +487,252 @@ def _lastrowid(conn, sql, params=()):
     sql_r = sql.rstrip().rstrip(';')
     if 'RETURNING' not in sql_r.upper():
         sql_r += ' RETURNING id'
-    cur.execute(sql_r, params)
+    _execute(cur, sql_r, params)
     row = cur.fetchone()
     cur.close()
     return row['id'] if row else None
 
 
+# ─── Compact rows ─────────────────────────────────────────────────────────────
+# RealDictCursor gives every row its own dict plus Decimal objects for NUMERIC
+# columns. Queries that return hundreds or thousands of rows use
+# _fetchall_rows() instead: each row is a tuple subclass sharing one column
+# index per query shape, and NUMERIC arrives as float. Rows still read as
+# row['col'], row.col and row.get('col'), and dict(row) works, so scoring
+# helpers and templates take them unchanged. Rows are read-only.
+
+_NUMERIC_AS_FLOAT = psycopg2.extensions.new_type(
+    psycopg2.extensions.DECIMAL.values, 'NUMERIC_AS_FLOAT',
+    lambda value, cur: float(value) if value is not None else None)
+
+class SlotRow(tuple):
+    __slots__ = ()
+    _index = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        i = self._index.get(key)
+        return default if i is None else tuple.__getitem__(self, i)
+
+    def keys(self):
+        return self._index.keys()
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __repr__(self):
+        return f'Row({", ".join(f"{k}={v!r}" for k, v in zip(self._index, tuple.__iter__(self)))})'
+
+@lru_cache(maxsize=256)
+def slot_row_type(columns):
+    """Row class for one result shape; cached so each query builds it once."""
+    index = {name: i for i, name in enumerate(columns)}
+    attrs = {'__slots__': (), '_index': index}
+    attrs.update({name: property(itemgetter(i)) for name, i in index.items()
+                  if name.isidentifier() and not name.startswith('_')})
+    return type('Row', (SlotRow,), attrs)
+
+class SlotRowCursor(psycopg2.extensions.cursor):
+    """Cursor yielding SlotRow tuples, with NUMERIC columns cast to float."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        psycopg2.extensions.register_type(_NUMERIC_AS_FLOAT, self)
+
+    def _row_type(self):
+        return slot_row_type(tuple(d.name for d in self.description))
+
+    def fetchone(self):
+        row = super().fetchone()
+        return None if row is None else self._row_type()(row)
+
+    def fetchmany(self, size=None):
+        make = self._row_type()
+        return [make(r) for r in super().fetchmany(self.arraysize if size is None else size)]
+
+    def fetchall(self):
+        make = self._row_type()
+        return [make(r) for r in super().fetchall()]
+
+    def __iter__(self):
+        make = None
+        for row in super().__iter__():
+            make = make or self._row_type()
+            yield make(row)
+
+def _fetchall_rows(conn, sql, params=()):
+    """Execute and return all rows as compact SlotRow tuples."""
+    cur = conn.cursor(cursor_factory=SlotRowCursor)
+    _execute(cur, sql, params)
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
+# ─── Metrics (Prometheus text format at /metrics) ─────────────────────────────
+# Counters and histograms keep one cell per thread, so the hot path is a plain
+# dict update with no lock; a scrape sums the cells.  Every series carries a
+# worker="<pid>" label because each Passenger worker exposes its own totals.
+# /metrics is open to logged-in admins and to anyone sending METRICS_TOKEN as
+# a bearer token / ?token=. Unauthenticated localhost scrapes are only allowed
+# with METRICS_ALLOW_LOCAL=1 — behind a local reverse proxy every request
+# arrives from 127.0.0.1.
+
+METRICS_TOKEN       = os.environ.get('METRICS_TOKEN', '')
+METRICS_ALLOW_LOCAL = os.environ.get('METRICS_ALLOW_LOCAL', '0') == '1'
+
+def token_matches(expected, allow_query=False):
+    """Constant-time check of the request's bearer token (or ?token= when
+    allow_query) against `expected`; always False when `expected` is unset."""
+    if not expected:
+        return False
+    auth  = request.headers.get('Authorization', '')
+    token = auth[7:] if auth.startswith('Bearer ') else ''
+    if not token and allow_query:
+        token = request.args.get('token', '')
+    return hmac.compare_digest(token.encode(), expected.encode())
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class _Metric:
+    """A named counter or histogram whose per-thread cells are summed on scrape."""
+
+    def __init__(self, name, help_text, kind='counter', labels=(), buckets=None):
+        self.name, self.help, self.kind = name, help_text, kind
+        self.labels  = labels
+        self.buckets = buckets
+        self._local  = threading.local()
+        self._cells  = []
+        self._cells_lock = threading.Lock()
+        _METRICS.append(self)
+
+    def _cell(self):
+        cell = getattr(self._local, 'cell', None)
+        if cell is None:
+            cell = self._local.cell = {}
+            with self._cells_lock:
+                self._cells.append(cell)
+        return cell
+
+    def inc(self, *label_values, amount=1):
+        cell = self._cell()
+        cell[label_values] = cell.get(label_values, 0) + amount
+
+    def observe(self, value, *label_values):
+        cell = self._cell()
+        slot = cell.get(label_values)
+        if slot is None:
+            slot = cell[label_values] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                slot[i] += 1
+                break
+        slot[-2] += value
+        slot[-1] += 1
+
+    def collect(self):
+        with self._cells_lock:
+            cells = [dict(c) for c in self._cells]
+        totals = {}
+        for cell in cells:
+            for key, val in cell.items():
+                if self.kind == 'counter':
+                    totals[key] = totals.get(key, 0) + val
+                else:
+                    acc = totals.setdefault(key, [0] * len(val))
+                    for i, v in enumerate(val):
+                        acc[i] += v
+        return totals
+
+_METRICS = []
+
+def _label_str(names, values, extra=None):
+    pairs = [(n, v) for n, v in zip(names, values)] + list((extra or {}).items())
+    pairs.append(('worker', os.getpid()))
+    esc = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{n}="{esc(v)}"' for n, v in pairs) + '}'
+
+REQUEST_LATENCY = _Metric('trivia_request_duration_seconds', 'Request latency per Flask endpoint',
+                          kind='histogram', labels=('endpoint', 'method'), buckets=LATENCY_BUCKETS)
+REQUESTS_TOTAL  = _Metric('trivia_requests_total', 'Requests per endpoint and status',
+                          labels=('endpoint', 'status'))
+ANSWERS_TOTAL   = _Metric('trivia_answers_total', 'Answers recorded', labels=('result',))
+EXPIRIES_TOTAL  = _Metric('trivia_attempt_expiries_total', 'Attempts auto-completed',
+                          labels=('reason',))
+CHEAT_FLAGS_TOTAL = _Metric('trivia_cheat_flags_total', 'Cheat flags recorded', labels=('violation',))
+POOL_WAIT       = _Metric('trivia_db_pool_checkout_seconds', 'Time to borrow a pooled connection',
+                          kind='histogram', buckets=LATENCY_BUCKETS)
+POOL_EXHAUSTED  = _Metric('trivia_db_pool_exhausted_total', 'Checkouts refused because the pool was full')
+ADMISSION_QUEUED = _Metric('trivia_start_queued_total', 'Quiz starts deferred by the admission bucket')
+
+@app.before_request
+def _metrics_before_request():
+    g.request_t0 = time.perf_counter()
+
+@app.after_request
+def _metrics_after_request(response):
+    t0 = g.get('request_t0')
+    if t0 is not None:
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_LATENCY.observe(time.perf_counter() - t0, endpoint, request.method)
+        REQUESTS_TOTAL.inc(endpoint, response.status_code)
+    return response
+
+def render_metrics(active_attempts=None):
+    """Render every registered metric plus pool gauges in Prometheus text format."""
+    out = []
+    for m in _METRICS:
+        out.append(f'# HELP {m.name} {m.help}')
+        out.append(f'# TYPE {m.name} {m.kind}')
+        for key, val in sorted(m.collect().items()):
+            if m.kind == 'counter':
+                out.append(f'{m.name}{_label_str(m.labels, key)} {val}')
+                continue
+            cumulative = 0
+            for bound, n in zip(m.buckets, val):
+                cumulative += n
+                out.append(f'{m.name}_bucket{_label_str(m.labels, key, {"le": bound})} {cumulative}')
+            out.append(f'{m.name}_bucket{_label_str(m.labels, key, {"le": "+Inf"})} {val[-1]}')
+            out.append(f'{m.name}_sum{_label_str(m.labels, key)} {val[-2]:.6f}')
+            out.append(f'{m.name}_count{_label_str(m.labels, key)} {val[-1]}')
+
+    pool = _pool
+    gauges = [
+        ('trivia_db_pool_max', 'Maximum pooled connections', pool.maxconn if pool else 0),
+        ('trivia_db_pool_in_use', 'Connections currently borrowed', len(pool._used) if pool else 0),
+        ('trivia_db_pool_idle', 'Idle pooled connections', len(pool._pool) if pool else 0),
+    ]
+    if active_attempts is not None:
+        gauges.append(('trivia_active_attempts', 'Attempts started but not completed (all workers)',
+                       active_attempts))
+    for name, help_text, val in gauges:
+        out += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge',
+                f'{name}{_label_str((), ())} {val}']
+    return '\n'.join(out) + '\n'
+
+@app.route('/metrics')
+def metrics():
+    from flask import Response
+    allowed = (session.get('is_admin')
+               or token_matches(METRICS_TOKEN, allow_query=True)
+               or (METRICS_ALLOW_LOCAL and request.remote_addr in ('127.0.0.1', '::1')))
+    if not allowed:
+        return Response('forbidden\n', status=403, mimetype='text/plain')
+    active = None
+    conn = get_db()
+    try:
+        active = _fetchone(conn,
+            'SELECT COUNT(*) AS n FROM user_sessions WHERE completed_at IS NULL AND started_at IS NOT NULL')['n']
+    except psycopg2.Error:
+        pass
+    finally:
+        close_db(conn)
+    return Response(render_metrics(active), mimetype='text/plain; version=0.0.4')
+
+
 # ─── Audit logging ────────────────────────────────────────────────────────────
 
 def log_action(conn, action, category='admin', entity_type=None,
@@ -241,11 +811,13 @@ def init_db():
             user_id      INTEGER NOT NULL REFERENCES users(id),
             session_id   INTEGER NOT NULL REFERENCES quiz_sessions(id),
             started_at   TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'Africa/Nairobi'),
-            completed_at TIMESTAMP
+            deadline_at  TIMESTAMP,
+            completed_at TIMESTAMP,
+            question_order TEXT
         )""",
         """CREATE TABLE IF NOT EXISTS user_answers (
             id               SERIAL PRIMARY KEY,
-            user_session_id  INTEGER NOT NULL REFERENCES user_sessions(id),
+            user_session_id  INTEGER NOT NULL REFERENCES user_sessions(id) ON DELETE CASCADE,
             question_id      INTEGER NOT NULL REFERENCES questions(id),
             selected_answer  TEXT NOT NULL,
             is_correct       INTEGER NOT NULL,
@@ -288,6 +860,70 @@ def init_db():
         "ALTER TABLE quiz_sessions ADD COLUMN IF NOT EXISTS time_limit_minutes INTEGER DEFAULT 0",
         "ALTER TABLE quiz_sessions ADD COLUMN IF NOT EXISTS scheduled_start TIMESTAMP DEFAULT NULL",
         "ALTER TABLE user_answers ADD COLUMN IF NOT EXISTS points_earned NUMERIC(8,2) DEFAULT 0",
+        # user_answers -> user_sessions must cascade so resets are one DELETE.
+        # Only rebuilt when the old (non-cascading) FK is still in place.
+        """DO $$ BEGIN
+            IF EXISTS (SELECT 1 FROM pg_constraint
+                       WHERE conname='user_answers_user_session_id_fkey' AND confdeltype <> 'c') THEN
+                ALTER TABLE user_answers DROP CONSTRAINT user_answers_user_session_id_fkey;
+                ALTER TABLE user_answers ADD CONSTRAINT user_answers_user_session_id_fkey
+                    FOREIGN KEY (user_session_id) REFERENCES user_sessions(id) ON DELETE CASCADE;
+            END IF;
+        END $$""",
+        # FK columns are not indexed automatically in PostgreSQL — without these
+        # every cascade / per-attempt lookup is a sequential scan.
+        "CREATE INDEX IF NOT EXISTS idx_user_answers_us ON user_answers (user_session_id)",
+        "CREATE INDEX IF NOT EXISTS idx_cheat_flags_us ON cheat_flags (user_session_id)",
+        "CREATE INDEX IF NOT EXISTS idx_user_sessions_session_user ON user_sessions (session_id, user_id)",
+        # Open attempts only — drives the expiry sweeper and in-progress counts
+        "CREATE INDEX IF NOT EXISTS idx_user_sessions_open ON user_sessions (session_id, started_at) WHERE completed_at IS NULL",
+        # Per-attempt deadline, fixed at start_quiz; NULL = untimed
+        "ALTER TABLE user_sessions ADD COLUMN IF NOT EXISTS deadline_at TIMESTAMP",
+        """UPDATE user_sessions us
+           SET deadline_at = us.started_at + qs.time_limit_minutes * INTERVAL '1 minute'
+           FROM quiz_sessions qs
+           WHERE us.session_id = qs.id AND us.completed_at IS NULL
+             AND us.deadline_at IS NULL AND qs.time_limit_minutes > 0""",
+        "CREATE INDEX IF NOT EXISTS idx_user_sessions_deadline ON user_sessions (deadline_at) WHERE completed_at IS NULL AND deadline_at IS NOT NULL",
+        # Pre-warmed attempt shells: started_at stays NULL until "Let's Go"
+        "ALTER TABLE user_sessions ADD COLUMN IF NOT EXISTS question_order TEXT",
+        # One answer per (attempt, question): the idempotency key for retried and
+        # offline-queued submissions. Fails while duplicates remain — see
+        # `flask dedupe-answers`, which removes them and creates it.
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_user_answers_attempt_question ON user_answers (user_session_id, question_id)",
+        # Score totals frozen when an attempt completes (NULL while it is open)
+        "ALTER TABLE user_sessions ADD COLUMN IF NOT EXISTS answered_count INTEGER",
+        "ALTER TABLE user_sessions ADD COLUMN IF NOT EXISTS correct_count INTEGER",
+        "ALTER TABLE user_sessions ADD COLUMN IF NOT EXISTS total_points NUMERIC",
+        f"""UPDATE user_sessions us SET {FREEZE_TOTALS_SQL}
+            WHERE us.completed_at IS NOT NULL AND us.answered_count IS NULL""",
+        # A participant's own attempts, newest first (results page)
+        "CREATE INDEX IF NOT EXISTS idx_user_sessions_user ON user_sessions (user_id, started_at DESC) WHERE started_at IS NOT NULL",
+        # Per-user score summary (USER_SCORES_SQL) behind the admin users list
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS score_sessions INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS score_answered INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS score_correct INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS score_points NUMERIC NOT NULL DEFAULT 0",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS flag_count INTEGER NOT NULL DEFAULT 0",
+        f"""UPDATE users u SET {USER_SCORES_SQL}
+            WHERE u.score_sessions = 0 AND u.flag_count = 0
+              AND EXISTS (SELECT 1 FROM user_sessions us WHERE us.user_id = u.id AND us.started_at IS NOT NULL)""",
+        # Keyset pages of the users list: by points, by name, and name/phone prefix search
+        "CREATE INDEX IF NOT EXISTS idx_users_score ON users (score_points DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_users_name ON users (lower(name), id)",
+        "CREATE INDEX IF NOT EXISTS idx_users_name_prefix ON users (lower(name) text_pattern_ops)",
+        "CREATE INDEX IF NOT EXISTS idx_users_phone_prefix ON users (phone text_pattern_ops)",
+        # Regrades walk one question's answers in id order
+        "CREATE INDEX IF NOT EXISTS idx_user_answers_question ON user_answers (question_id, id)",
+        # Pre-HMAC reward codes (8 hex chars) are verified by lookup
+        "CREATE INDEX IF NOT EXISTS idx_user_answers_legacy_code ON user_answers (reward_code) WHERE length(reward_code) = 8",
+        # Login is an index-only lookup; this covering index replaces the plain UNIQUE(phone)
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_users_phone_login ON users (phone) INCLUDE (id, name)",
+        """DO $$ BEGIN
+             IF EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = 'uq_users_phone_login') THEN
+               ALTER TABLE users DROP CONSTRAINT IF EXISTS users_phone_key;
+             END IF;
+           END $$""",
         # audit_logs — create if it doesn't exist yet (for existing deployments)
         """CREATE TABLE IF NOT EXISTS audit_logs (
             id          SERIAL PRIMARY KEY,
@@ -300,6 +936,8 @@ def init_db():
             ip_address  TEXT,
             logged_at   TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'Africa/Nairobi')
         )""",
+        # Keeps ADMIN_EPOCH_SQL an index lookup instead of a scan past user rows
+        "CREATE INDEX IF NOT EXISTS idx_audit_logs_changes ON audit_logs (id) WHERE category <> 'user'",
     ]
     for sql in migrations:
         try:
@@ -308,6 +946,13 @@ def init_db():
         except Exception:
             conn.rollback()
     cur.close()
+    if not _fetchone(conn, "SELECT 1 FROM pg_indexes WHERE indexname = 'uq_user_answers_attempt_question'"):
+        app.logger.warning('user_answers has duplicate (attempt, question) rows, so answer '
+                           'submissions are not idempotent; run `flask dedupe-answers`.')
+    legacy = _fetchone(conn, "SELECT COUNT(*) AS n FROM users WHERE phone ~ '^0[17][0-9]{8}$'")['n']
+    if legacy:
+        app.logger.warning('%d users have phones in the old 07…/01… form; run '
+                           '`flask normalize-phones` to rewrite them to +254….', legacy)
     close_db(conn)
 
 def normalize_multi(answer_str):
@@ -318,6 +963,104 @@ def score_answer(question, selected_raw):
     """
     Returns (is_correct: int, stored_selected: str, points_earned: float).
 
+    Scores against the question's compiled AnswerKey; results are identical to
+    score_answer_reference() below (`flask check-scoring` verifies that).
+    """
+    return answer_key(question).score(selected_raw)
+
+# ─── Compiled answer keys ─────────────────────────────────────────────────────
+# A question's correct answer is parsed once per (type, correct_answer, points)
+# into an AnswerKey: an upper-cased letter for single choice, an A–D bitmask
+# for multi-select, a tuple of stripped blanks for fill_blank. Scoring a
+# submission is then a mask AND + popcount or a tuple compare. Anything the
+# fast paths can't represent exactly (options beyond A–D, repeated letters)
+# goes through score_answer_reference() so results never change.
+
+_LETTER_BITS = {'A': 1, 'B': 2, 'C': 4, 'D': 8}
+_MASK_TEXT   = tuple(','.join(l for l, bit in _LETTER_BITS.items() if mask & bit) for mask in range(16))
+_MASK_COUNT  = tuple(bin(mask).count('1') for mask in range(16))
+
+def _letter_mask(answer_str):
+    """A–D bitmask of a comma-separated letter list, or None when the list
+    has anything else (unknown tokens, repeats) and must take the slow path."""
+    mask = 0
+    for tok in answer_str.split(','):
+        tok = tok.strip().upper()
+        if not tok:
+            continue
+        bit = _LETTER_BITS.get(tok)
+        if bit is None or mask & bit:
+            return None
+        mask |= bit
+    return mask
+
+class AnswerKey:
+    """Precompiled correct answer for one question. score() has the same
+    contract as score_answer()."""
+    __slots__ = ('kind', 'question', 'points', 'letter', 'mask', 'per_option',
+                 'blanks', 'per_blank')
+
+    def __init__(self, qtype, correct_answer, points):
+        correct     = (correct_answer or '').strip()
+        self.points = float(points or 1)
+        self.kind   = qtype
+        # Minimal row for the reference scorer, used by the generic kind
+        self.question = {'question_type': qtype, 'correct_answer': correct_answer, 'points': points}
+        if qtype == 'single':
+            self.letter = correct.upper()
+        elif qtype == 'multi':
+            self.mask = _letter_mask(correct)
+            if self.mask is None:
+                self.kind = 'generic'
+            elif self.mask:
+                self.per_option = self.points / _MASK_COUNT[self.mask]
+        elif qtype == 'fill_blank':
+            self.blanks    = tuple(p.strip() for p in correct.split('|'))
+            self.per_blank = self.points / len(self.blanks)
+        else:
+            self.kind = 'none'
+
+    def score(self, selected_raw):
+        kind = self.kind
+        if kind == 'single':
+            sel = selected_raw.strip().upper()
+            if sel == self.letter:
+                return 1, sel, self.points
+            return 0, sel, 0.0
+        if kind == 'multi':
+            sel_mask = _letter_mask(selected_raw)
+            if sel_mask is None:
+                return score_answer_reference(self.question, selected_raw)
+            if not self.mask:
+                return 0, _MASK_TEXT[sel_mask], 0.0
+            earned = round(_MASK_COUNT[sel_mask & self.mask] * self.per_option, 2)
+            return int(sel_mask == self.mask), _MASK_TEXT[sel_mask], earned
+        if kind == 'fill_blank':
+            blanks = self.blanks
+            sel = [p.strip() for p in selected_raw.split('|')]
+            hits = 0
+            for s, c in zip(sel, blanks):
+                if s == c:
+                    hits += 1
+            is_correct = int(len(sel) == len(blanks) and hits == len(blanks))
+            return is_correct, selected_raw, round(hits * self.per_blank, 2)
+        if kind == 'generic':
+            return score_answer_reference(self.question, selected_raw)
+        return 0, selected_raw, 0.0
+
+@lru_cache(maxsize=4096)
+def compile_answer_key(qtype, correct_answer, points):
+    return AnswerKey(qtype, correct_answer, points)
+
+def answer_key(question):
+    """The compiled key for a question row (dict or SlotRow)."""
+    return compile_answer_key(question['question_type'] or 'single',
+                              question['correct_answer'], question.get('points'))
+
+def score_answer_reference(question, selected_raw):
+    """
+    Returns (is_correct: int, stored_selected: str, points_earned: float).
+
     Scoring rules:
       single     – full marks or 0 (unchanged).
       multi      – marks split evenly across correct options.
@@ -376,14 +1119,635 @@ def check_answer(question, selected_raw):
     is_correct, stored, _ = score_answer(question, selected_raw)
     return is_correct, stored
 
-def get_remaining_seconds(user_session_row, time_limit_minutes):
-    """Return seconds left (None = no limit, 0 = expired). Uses EAT throughout."""
-    if not time_limit_minutes:
+# Clock maths for attempts and schedules happens in PostgreSQL, on the same
+# EAT clock the column defaults use, so a request never parses timestamps.
+NOW_EAT_SQL = "(NOW() AT TIME ZONE 'Africa/Nairobi')"
+# Seconds left on an attempt aliased `us` (NULL = untimed, 0 = expired)
+REMAINING_SQL = (f"CASE WHEN us.deadline_at IS NULL THEN NULL ELSE "
+                 f"GREATEST(0, FLOOR(EXTRACT(EPOCH FROM us.deadline_at - {NOW_EAT_SQL})))::int END")
+# Seconds until a quiz_sessions row opens (NULL = no schedule, 0 = open)
+# (GREATEST ignores NULLs, so the CASE is what keeps "no schedule" NULL)
+SECONDS_UNTIL_SQL = (f"CASE WHEN scheduled_start IS NULL THEN NULL ELSE "
+                     f"GREATEST(0, CEIL(EXTRACT(EPOCH FROM scheduled_start - {NOW_EAT_SQL})))::int END")
+# SET clause freezing the score totals of an attempt aliased `us`; applied
+# wherever completed_at is set, and again when a regrade changes its answers
+FREEZE_TOTALS_SQL = '''(answered_count, correct_count, total_points) = (
+    SELECT COUNT(*), COUNT(*) FILTER (WHERE ua.is_correct = 1), COALESCE(SUM(ua.points_earned), 0)
+    FROM user_answers ua WHERE ua.user_session_id = us.id)'''
+
+# ─── Expiry sweeper ───────────────────────────────────────────────────────────
+# Timed attempts are otherwise completed only when the participant comes back
+# (take_quiz) or the browser posts expire_quiz.  sweep_expired_attempts()
+# closes every overdue attempt in one statement, stamping completed_at with the
+# actual deadline and writing the audit rows in the same statement.
+# Run it from cron (`flask sweep-expired`) or set EXPIRY_SWEEP_SECONDS to run
+# it on a background thread in each worker; an advisory lock makes sure only
+# one worker sweeps at a time.
+
+EXPIRY_SWEEP_SECONDS = int(os.environ.get('EXPIRY_SWEEP_SECONDS', '0'))
+_SWEEP_LOCK_ID = 7_202_033
+
+def sweep_expired_attempts(conn):
+    """Complete all overdue timed attempts. Returns how many were closed,
+    or None if another worker holds the sweep lock. Caller commits."""
+    got = _fetchone(conn, 'SELECT pg_try_advisory_xact_lock(%s) AS ok', (_SWEEP_LOCK_ID,))
+    if not got['ok']:
         return None
-    started = coerce_dt(user_session_row['started_at'])
-    elapsed = (now_eat() - started).total_seconds()
-    remaining = int(time_limit_minutes * 60 - elapsed)
-    return max(remaining, 0)
+    cur = _exec(conn, f'''
+        WITH expired AS (
+            UPDATE user_sessions us
+            SET completed_at = us.deadline_at, {FREEZE_TOTALS_SQL}
+            FROM quiz_sessions qs
+            WHERE us.session_id = qs.id
+              AND us.completed_at IS NULL
+              AND us.deadline_at <= (NOW() AT TIME ZONE 'Africa/Nairobi')
+            RETURNING us.user_id, us.session_id, qs.name
+        ),
+        logged AS (
+            INSERT INTO audit_logs (action, category, entity_type, entity_id, entity_name, details)
+            SELECT 'quiz_time_expired', 'system', 'session', e.session_id, u.name,
+                   u.name || ' auto-submitted "' || e.name || '" — time expired (sweeper)'
+            FROM expired e JOIN users u ON u.id = e.user_id
+        )
+        SELECT user_id FROM expired
+    ''')
+    users = [r['user_id'] for r in cur.fetchall()]
+    closed = len(users)
+    cur.close()
+    # A separate statement: the CTE above cannot see its own frozen totals
+    refresh_user_scores(conn, set(users))
+    if closed:
+        EXPIRIES_TOTAL.inc('sweeper', amount=closed)
+    return closed
+
+_sweeper_started = False
+_sweeper_lock    = threading.Lock()
+
+def _sweeper_loop():
+    while True:
+        time.sleep(EXPIRY_SWEEP_SECONDS)
+        conn = None
+        try:
+            conn = get_db()
+            closed = sweep_expired_attempts(conn)
+            conn.commit()
+            if closed:
+                app.logger.info('Expiry sweeper closed %d attempts', closed)
+        except Exception:
+            app.logger.exception('Expiry sweeper failed')
+        finally:
+            close_db(conn)
+
+@app.before_request
+def _start_sweeper():
+    # Started lazily on the first request so it runs in the worker process
+    # (Passenger forks after import, and threads do not survive a fork).
+    global _sweeper_started
+    if _sweeper_started or EXPIRY_SWEEP_SECONDS <= 0:
+        return
+    with _sweeper_lock:
+        if not _sweeper_started:
+            threading.Thread(target=_sweeper_loop, name='expiry-sweeper', daemon=True).start()
+            _sweeper_started = True
+
+# ─── Shared cache ─────────────────────────────────────────────────────────────
+# One cache backend per process, chosen by CACHE_URL:
+#   (unset)              in-process TTL/LRU — each Passenger worker has its own
+#   redis://host:6379/0  any Redis-protocol server, shared by every worker
+#                        (needs the optional `redis` package)
+# Read paths use a VersionedCache namespace rather than the backend directly.
+# Its keys embed version counters kept in the backend, so invalidate() is a
+# single INCR and every worker sharing the backend stops seeing the old
+# entries at once; they then age out via TTL/LRU. Backend errors count as
+# misses — the cache can slow a request down but never fail it.
+# An in-process backend cannot see other workers' (or the CLI's) INCRs, so
+# namespaces created with db_epoch=True also stamp keys with a per-namespace
+# epoch row in app_settings. invalidate() bumps it; each worker re-reads all
+# epochs in one query at most every CACHE_EPOCH_SECONDS.
+
+CACHE_URL         = os.environ.get('CACHE_URL', '')
+CACHE_PREFIX      = os.environ.get('CACHE_PREFIX', 'trivia:')
+CACHE_TTL         = int(os.environ.get('CACHE_TTL', '300'))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '1024'))
+CACHE_MAX_BYTES   = int(os.environ.get('CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+CACHE_EPOCH_SECONDS = float(os.environ.get('CACHE_EPOCH_SECONDS', '1.0'))
+
+CACHE_REQUESTS = _Metric('trivia_cache_requests_total', 'Cache lookups', labels=('namespace', 'result'))
+CACHE_ERRORS   = _Metric('trivia_cache_errors_total', 'Cache backend calls that failed')
+
+class LocalCache:
+    """Thread-safe in-process cache of strings with per-entry TTL and LRU
+    eviction, capped by entry count and total size. Version counters live
+    apart from the entries so eviction can never reset one."""
+
+    shared = False   # one per worker process
+
+    def __init__(self, max_entries, max_bytes):
+        from collections import OrderedDict
+        self.max_entries = max_entries
+        self.max_bytes   = max_bytes
+        self._items    = OrderedDict()   # key -> (expires, value) on time.monotonic()
+        self._bytes    = 0
+        self._counters = {}
+        self._lock     = threading.Lock()
+
+    def _drop(self, key):
+        self._bytes -= len(self._items.pop(key)[1])
+
+    def get_many(self, keys):
+        now, out = time.monotonic(), []
+        with self._lock:
+            for key in keys:
+                if key in self._counters:
+                    out.append(str(self._counters[key]))
+                    continue
+                hit = self._items.get(key)
+                if hit is not None and hit[0] <= now:
+                    self._drop(key)
+                    hit = None
+                if hit is not None:
+                    self._items.move_to_end(key)
+                out.append(hit[1] if hit else None)
+        return out
+
+    def get(self, key):
+        return self.get_many([key])[0]
+
+    def set(self, key, value, ttl):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self._drop(key)
+            self._items[key] = (time.monotonic() + ttl, value)
+            self._bytes += len(value)
+            while len(self._items) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._items)))
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._counters.clear()
+            self._bytes = 0
+
+class RedisCache:
+    """The same interface over a Redis-protocol server."""
+
+    shared = True
+
+    def __init__(self, url):
+        import redis   # optional dependency — only needed when CACHE_URL is set
+        self._errors = (redis.RedisError, OSError)
+        self._r = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def _call(self, fn, *args, default=None, **kw):
+        try:
+            return fn(*args, **kw)
+        except self._errors as e:
+            CACHE_ERRORS.inc()
+            app.logger.warning('Cache backend error: %s', e)
+            return default
+
+    def get_many(self, keys):
+        vals = self._call(self._r.mget, keys, default=[None] * len(keys))
+        return [v.decode('utf-8') if v is not None else None for v in vals]
+
+    def get(self, key):
+        return self.get_many([key])[0]
+
+    def set(self, key, value, ttl):
+        self._call(self._r.set, key, value, ex=max(1, int(ttl)))
+
+    def incr(self, key):
+        return self._call(self._r.incr, key)
+
+    def clear(self):
+        keys = self._call(lambda: list(self._r.scan_iter(CACHE_PREFIX + '*')), default=[])
+        if keys:
+            self._call(self._r.delete, *keys)
+
+def make_cache(url):
+    if not url:
+        return LocalCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisCache(url)
+    raise ValueError(f'Unsupported CACHE_URL scheme: {url!r}')
+
+CACHE = make_cache(CACHE_URL)
+
+_cache_epochs = {'read_at': None, 'values': {}}
+_cache_epochs_lock = threading.Lock()
+
+def cache_epoch(namespace, conn=None):
+    """Current app_settings epoch of a namespace, re-read for all namespaces
+    in one query once the worker's copy is CACHE_EPOCH_SECONDS old. Reads on
+    the caller's `conn` when given, so a request never holds two."""
+    now = time.monotonic()
+    with _cache_epochs_lock:
+        read_at = _cache_epochs['read_at']
+        if read_at is not None and now - read_at < CACHE_EPOCH_SECONDS:
+            return _cache_epochs['values'].get(namespace, '0')
+    own = conn is None
+    conn = get_db() if own else conn
+    try:
+        rows = _fetchall(conn, 'SELECT key, value FROM app_settings WHERE key LIKE %s',
+                         ('cache_epoch:%',))
+    finally:
+        if own:
+            close_db(conn)
+    values = {r['key'].split(':', 1)[1]: r['value'] for r in rows}
+    with _cache_epochs_lock:
+        _cache_epochs.update(read_at=now, values=values)
+    return values.get(namespace, '0')
+
+def bump_cache_epoch(namespace, conn=None):
+    """Advance a namespace's epoch for every worker; this one sees it at once.
+    Commits on the caller's `conn` when given — call it once the change the
+    bump announces has been committed."""
+    own = conn is None
+    conn = get_db() if own else conn
+    try:
+        row = _fetchone(conn, '''
+            INSERT INTO app_settings (key, value) VALUES (%s, '1')
+            ON CONFLICT (key) DO UPDATE SET value = (app_settings.value::bigint + 1)::text
+            RETURNING value
+        ''', (f'cache_epoch:{namespace}',))
+        conn.commit()
+    finally:
+        if own:
+            close_db(conn)
+    with _cache_epochs_lock:
+        _cache_epochs['values'][namespace] = row['value']
+
+class VersionedCache:
+    """A namespace of version-stamped string entries in CACHE.
+
+    Keys are tuples, e.g. ('sections', 3). Every leading part of a key has its
+    own version counter, so invalidate(('sections',)) drops all section lists,
+    invalidate(('sections', 3)) drops just one and invalidate(()) drops the
+    whole namespace. With db_epoch=True and a per-worker backend, keys also
+    carry the namespace's app_settings epoch (see cache_epoch()); pass the
+    request's `conn` so that read or bump does not check out a second one.
+    """
+
+    def __init__(self, namespace, ttl=None, db_epoch=False):
+        self.namespace = namespace
+        self.ttl       = ttl or CACHE_TTL
+        self.db_epoch  = db_epoch and not CACHE.shared
+
+    def _ver_keys(self, key):
+        return [f'{CACHE_PREFIX}ver:{self.namespace}:' + ':'.join(map(str, key[:i]))
+                for i in range(len(key) + 1)]
+
+    def _full_key(self, key, conn=None):
+        stamp = '.'.join(v or '0' for v in CACHE.get_many(self._ver_keys(key)))
+        if self.db_epoch:
+            stamp = f'{cache_epoch(self.namespace, conn)}/{stamp}'
+        return f'{CACHE_PREFIX}{self.namespace}:{stamp}:' + ':'.join(map(str, key))
+
+    def get(self, key, conn=None):
+        value = CACHE.get(self._full_key(key, conn))
+        CACHE_REQUESTS.inc(self.namespace, 'hit' if value is not None else 'miss')
+        return value
+
+    def set(self, key, value, conn=None):
+        CACHE.set(self._full_key(key, conn), value, self.ttl)
+
+    def remember(self, key, load, conn=None):
+        """Cached value for key, calling load() (which returns a str) on a miss."""
+        full  = self._full_key(key, conn)
+        value = CACHE.get(full)
+        CACHE_REQUESTS.inc(self.namespace, 'hit' if value is not None else 'miss')
+        if value is None:
+            value = load()
+            CACHE.set(full, value, self.ttl)
+        return value
+
+    def invalidate(self, *prefixes, broadcast=True, conn=None):
+        """Retire every key starting with any of the given prefix tuples.
+        Call it after conn.commit(): a worker that reloads between the bump
+        and the commit would otherwise cache the old data under the new
+        epoch. broadcast=False skips the epoch bump: other workers then keep
+        their copies until TTL, which hot paths may prefer to a DB write."""
+        for prefix in prefixes:
+            CACHE.incr(self._ver_keys(prefix)[-1])
+        if self.db_epoch and broadcast and prefixes:
+            bump_cache_epoch(self.namespace, conn)
+
+# ─── Stampede control ─────────────────────────────────────────────────────────
+# When a scheduled session opens, every waiting browser polls session-status
+# and POSTs start_quiz in the same second. Three things spread that out:
+#   * each user gets a stable jitter (0..STAMPEDE_JITTER_SECONDS) added to the
+#     unlock time their countdown shows, so clicks arrive over a window;
+#   * the "opens at" answer is cached (SESSION_STATUS), so polling costs no
+#     query beyond the worker's periodic cache-epoch read;
+#   * start_quiz admits through a token bucket; callers over the rate get a
+#     ticket for a later slot and a queue page that resubmits on its own.
+#     Nothing sleeps in a request thread, and tickets live in CACHE keyed by
+#     user, not in the cookie, so clearing cookies does not skip the line.
+# The bucket is per worker process: the effective rate is ADMIT_RATE × workers.
+
+STAMPEDE_JITTER_SECONDS = int(os.environ.get('STAMPEDE_JITTER_SECONDS', 10))
+SESSION_STATUS_TTL      = float(os.environ.get('SESSION_STATUS_TTL', 15))
+ADMIT_RATE              = float(os.environ.get('ADMIT_RATE', 20))    # starts/sec per worker
+ADMIT_BURST             = int(os.environ.get('ADMIT_BURST', 10))
+
+SESSION_STATUS = VersionedCache('session-status', SESSION_STATUS_TTL, db_epoch=True)
+
+def session_open_state(session_id):
+    """Return (is_active, seconds_until) for a session, served from a short-TTL
+    cache entry. seconds_until is None for unscheduled sessions."""
+    def load():
+        conn = get_db()
+        qs = _fetchone(conn,
+            f'SELECT is_active, {SECONDS_UNTIL_SQL} AS seconds_until FROM quiz_sessions WHERE id=%s',
+            (session_id,)
+        )
+        close_db(conn)
+        opens_at = time.time() + qs['seconds_until'] if qs and qs['seconds_until'] is not None else None
+        return json.dumps([bool(qs and qs['is_active']), opens_at])
+    is_active, opens_at = json.loads(SESSION_STATUS.remember((session_id,), load))
+    if opens_at is None:
+        return is_active, None
+    return is_active, max(0, int(opens_at - time.time() + 0.999))
+
+def invalidate_session_status(session_id=None, conn=None):
+    SESSION_STATUS.invalidate((session_id,) if session_id is not None else (), conn=conn)
+
+def unlock_jitter(user_id, session_id):
+    """Stable per-user delay (seconds) added to the unlock time shown to clients."""
+    if STAMPEDE_JITTER_SECONDS <= 0:
+        return 0
+    digest = hashlib.sha256(f'{session_id}:{user_id}'.encode()).digest()
+    return int.from_bytes(digest[:4], 'big') % (STAMPEDE_JITTER_SECONDS + 1)
+
+class _TokenBucket:
+    """Reservation-style token bucket. reserve() always takes a token and
+    returns how long the caller must wait for it (0 = admit now); the token
+    count going negative is the queue behind the caller."""
+
+    def __init__(self, rate, burst):
+        self.rate   = rate
+        self.burst  = burst
+        self.tokens = float(burst)
+        self.stamp  = time.monotonic()
+        self._lock  = threading.Lock()
+
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp  = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0, 0
+            return -self.tokens / self.rate, int(-self.tokens + 0.999)
+
+ADMISSION = _TokenBucket(ADMIT_RATE, ADMIT_BURST) if ADMIT_RATE > 0 else None
+
+def admit_start(session_id):
+    """Admission check for start_quiz. Returns None when the request may
+    proceed, else (seconds_to_wait, queue_position) for the queue page.
+    A caller returning with a ticket for this session is admitted once its
+    slot has come round, without taking a second token."""
+    if ADMISSION is None:
+        return None
+    key = f"{CACHE_PREFIX}admit:{session_id}:{session['user_id']}"
+    held = CACHE.get(key)
+    if held:
+        ticket = json.loads(held)
+        wait = ticket['at'] - time.time()
+        if wait <= 0:
+            CACHE.set(key, '', 1)   # used up
+            return None
+        return wait, ticket['pos']
+    wait, position = ADMISSION.reserve()
+    if wait <= 0:
+        return None
+    CACHE.set(key, json.dumps({'at': time.time() + wait, 'pos': position}), wait + 60)
+    ADMISSION_QUEUED.inc()
+    return wait, position
+
+# ─── Login throttle ───────────────────────────────────────────────────────────
+# Optional per-IP and per-phone limits on the phone-number login form, held in
+# memory per worker (like the admission bucket, the effective rate is the
+# setting × workers). A venue shares one public IP, so keep the IP limit loose
+# or off; the phone limit is what stops someone cycling through numbers or
+# hammering one. 0 disables a limit.
+
+LOGIN_IP_PER_MINUTE    = float(os.environ.get('LOGIN_IP_PER_MINUTE', '0'))
+LOGIN_IP_BURST         = int(os.environ.get('LOGIN_IP_BURST', '60'))
+LOGIN_PHONE_PER_MINUTE = float(os.environ.get('LOGIN_PHONE_PER_MINUTE', '0'))
+LOGIN_PHONE_BURST      = int(os.environ.get('LOGIN_PHONE_BURST', '5'))
+LOGIN_THROTTLE_KEYS    = int(os.environ.get('LOGIN_THROTTLE_KEYS', '50000'))
+
+LOGIN_THROTTLED = _Metric('trivia_login_throttled_total', 'Logins refused by the throttle', labels=('key',))
+
+class _KeyedLimiter:
+    """Token bucket per key, with the least recently seen keys dropped once
+    more than `max_keys` are tracked (a dropped key simply starts full)."""
+
+    def __init__(self, per_minute, burst, max_keys):
+        from collections import OrderedDict
+        self.rate     = per_minute / 60.0
+        self.burst    = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()   # key -> (tokens, stamp) on time.monotonic()
+        self._lock    = threading.Lock()
+
+    def take(self, key):
+        """Spend one token for `key`. Returns 0 when allowed, else the seconds
+        until a token is available (nothing is spent on refusal)."""
+        with self._lock:
+            now = time.monotonic()
+            tokens, stamp = self._buckets.pop(key, (float(self.burst), now))
+            tokens = min(self.burst, tokens + (now - stamp) * self.rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+            self._buckets[key] = (tokens - 1 if not wait else tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+LOGIN_LIMITS = [(label, _KeyedLimiter(rate, burst, LOGIN_THROTTLE_KEYS))
+                for label, rate, burst in (('ip', LOGIN_IP_PER_MINUTE, LOGIN_IP_BURST),
+                                           ('phone', LOGIN_PHONE_PER_MINUTE, LOGIN_PHONE_BURST))
+                if rate > 0]
+
+def login_throttle(phone):
+    """Seconds the caller must wait before trying to log in again, or 0."""
+    keys = {'ip': request.remote_addr, 'phone': phone}
+    for label, limiter in LOGIN_LIMITS:
+        wait = limiter.take(keys[label])
+        if wait:
+            LOGIN_THROTTLED.inc(label)
+            return wait
+    return 0
+
+# ─── Pre-warmed attempts ──────────────────────────────────────────────────────
+# Ahead of a scheduled start, prewarm_attempts() inserts an attempt "shell"
+# (user_sessions row with started_at NULL) and its question order for each
+# user expected to join: anyone who played one of the last
+# PREWARM_RECENT_SESSIONS sessions or registered in the last
+# PREWARM_RECENT_DAYS days, most recent first, at most PREWARM_MAX_SHELLS,
+# written PREWARM_BATCH_SIZE at a time. "Let's Go" then claims the
+# shell with one UPDATE (plus its audit row, in the same statement) instead
+# of the lookup/check/insert sequence. Shells are not attempts: every query
+# that lists or counts attempts filters on started_at IS NOT NULL.
+# Trigger it from the Sessions page, `flask prewarm-attempts`, or set
+# PREWARM_MINUTES to do it automatically that long before scheduled_start.
+
+PREWARM_MINUTES         = int(os.environ.get('PREWARM_MINUTES', '0'))
+PREWARM_CHECK_SECONDS   = int(os.environ.get('PREWARM_CHECK_SECONDS', '30'))
+PREWARM_RECENT_SESSIONS = int(os.environ.get('PREWARM_RECENT_SESSIONS', '3'))
+PREWARM_RECENT_DAYS     = int(os.environ.get('PREWARM_RECENT_DAYS', '14'))
+PREWARM_MAX_SHELLS      = int(os.environ.get('PREWARM_MAX_SHELLS', '5000'))
+PREWARM_BATCH_SIZE      = int(os.environ.get('PREWARM_BATCH_SIZE', '1000'))
+_PREWARM_LOCK_ID = 7_202_036
+
+def prewarm_candidates(conn, session_id, limit=None):
+    """Ids of users expected to join `session_id` who have no row for it yet:
+    players of the last PREWARM_RECENT_SESSIONS other sessions and users
+    registered within PREWARM_RECENT_DAYS, newest first."""
+    return [r['id'] for r in _fetchall(conn, f'''
+        WITH recent AS (
+            SELECT id FROM quiz_sessions WHERE id <> %s
+            ORDER BY COALESCE(scheduled_start, created_at) DESC LIMIT %s
+        )
+        SELECT u.id FROM users u
+        WHERE NOT EXISTS (SELECT 1 FROM user_sessions us
+                          WHERE us.user_id = u.id AND us.session_id = %s)
+          AND (u.created_at >= {NOW_EAT_SQL} - %s * INTERVAL '1 day'
+               OR EXISTS (SELECT 1 FROM user_sessions us JOIN recent r ON r.id = us.session_id
+                          WHERE us.user_id = u.id AND us.started_at IS NOT NULL))
+        ORDER BY u.id DESC
+        LIMIT %s
+    ''', (session_id, PREWARM_RECENT_SESSIONS, session_id, PREWARM_RECENT_DAYS,
+          limit or PREWARM_MAX_SHELLS))]
+
+def prewarm_attempts(conn, session_id):
+    """Create attempt shells for the users prewarm_candidates() picks.
+    Returns the number created. Caller commits."""
+    qs = _fetchone(conn, 'SELECT randomize_questions FROM quiz_sessions WHERE id=%s', (session_id,))
+    if not qs:
+        return 0
+    user_ids = prewarm_candidates(conn, session_id)
+    if not user_ids:
+        return 0
+    question_ids = [r['id'] for r in _fetchall(conn, '''
+        SELECT q.id FROM questions q JOIN sections s ON q.section_id = s.id
+        WHERE s.session_id = %s ORDER BY s.order_num, s.id, q.order_num, q.id
+    ''', (session_id,))]
+    created = 0
+    cur = conn.cursor()
+    for i in range(0, len(user_ids), PREWARM_BATCH_SIZE):
+        batch = user_ids[i:i + PREWARM_BATCH_SIZE]
+        shell_ids = [r['id'] for r in psycopg2.extras.execute_values(cur, '''
+            INSERT INTO user_sessions (user_id, session_id, started_at) VALUES %s
+            RETURNING id
+        ''', [(u, session_id) for u in batch], template='(%s, %s, NULL)',
+            page_size=PREWARM_BATCH_SIZE, fetch=True)]
+        orders = []
+        for shell_id in shell_ids:
+            order = list(question_ids)
+            if qs['randomize_questions']:
+                random.Random(shell_id).shuffle(order)   # same seed take_quiz uses
+            orders.append((shell_id, json.dumps(order)))
+        psycopg2.extras.execute_values(cur, '''
+            UPDATE user_sessions us SET question_order = v.question_order
+            FROM (VALUES %s) AS v(id, question_order) WHERE us.id = v.id
+        ''', orders, page_size=PREWARM_BATCH_SIZE)
+        created += len(shell_ids)
+    cur.close()
+    return created
+
+def claim_attempt_shell(conn, user_id, session_id):
+    """Start a pre-warmed attempt: stamp started_at/deadline_at and write the
+    quiz_start audit row in one statement. Returns True if a shell was claimed.
+    Caller commits."""
+    ip = request.remote_addr if has_request_context() else None
+    cur = _exec(conn, f'''
+        WITH claimed AS (
+            UPDATE user_sessions us
+            SET started_at  = {NOW_EAT_SQL},
+                deadline_at = CASE WHEN qs.time_limit_minutes > 0
+                                   THEN {NOW_EAT_SQL} + qs.time_limit_minutes * INTERVAL '1 minute' END
+            FROM quiz_sessions qs
+            WHERE qs.id = us.session_id AND qs.is_active = 1
+              AND (qs.scheduled_start IS NULL OR qs.scheduled_start <= {NOW_EAT_SQL})
+              AND us.user_id = %s AND us.session_id = %s
+              AND us.started_at IS NULL AND us.completed_at IS NULL
+            RETURNING us.session_id, qs.name
+        )
+        INSERT INTO audit_logs (action, category, entity_type, entity_id, entity_name, details, ip_address)
+        SELECT 'quiz_start', 'user', 'session', c.session_id, c.name, %s || c.name || %s, %s
+        FROM claimed c
+    ''', (user_id, session_id, f"{session.get('user_name')} started quiz '", "'", ip))
+    claimed = cur.rowcount
+    cur.close()
+    return claimed > 0
+
+def prewarm_due_sessions(conn):
+    """Pre-warm active sessions starting within PREWARM_MINUTES, once per
+    schedule. Returns {session name: shells created}, or None if another
+    worker holds the lock. Caller commits."""
+    got = _fetchone(conn, 'SELECT pg_try_advisory_xact_lock(%s) AS ok', (_PREWARM_LOCK_ID,))
+    if not got['ok']:
+        return None
+    due = _fetchall(conn, f'''
+        SELECT id, name, scheduled_start FROM quiz_sessions
+        WHERE is_active = 1 AND scheduled_start > {NOW_EAT_SQL}
+          AND scheduled_start <= {NOW_EAT_SQL} + %s * INTERVAL '1 minute'
+    ''', (PREWARM_MINUTES,))
+    done = {}
+    for qs in due:
+        key    = f'prewarm:{qs["id"]}'
+        stamp  = str(qs['scheduled_start'])
+        stored = _fetchone(conn, 'SELECT value FROM app_settings WHERE key=%s', (key,))
+        if stored and stored['value'] == stamp:
+            continue
+        created = prewarm_attempts(conn, qs['id'])
+        _exec(conn, '''
+            INSERT INTO app_settings (key, value) VALUES (%s, %s)
+            ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
+        ''', (key, stamp))
+        log_action(conn, 'prewarm_attempts', category='system',
+                   entity_type='session', entity_id=qs['id'], entity_name=qs['name'],
+                   details=f"Pre-created {created} attempts before the scheduled start")
+        done[qs['name']] = created
+    return done
+
+_prewarm_started = False
+_prewarm_lock    = threading.Lock()
+
+def _prewarm_loop():
+    while True:
+        time.sleep(PREWARM_CHECK_SECONDS)
+        conn = None
+        try:
+            conn = get_db()
+            done = prewarm_due_sessions(conn)
+            conn.commit()
+            for name, created in (done or {}).items():
+                app.logger.info('Pre-warmed %d attempts for %s', created, name)
+        except Exception:
+            app.logger.exception('Attempt pre-warm failed')
+        finally:
+            close_db(conn)
+
+@app.before_request
+def _start_prewarmer():
+    global _prewarm_started
+    if _prewarm_started or PREWARM_MINUTES <= 0:
+        return
+    with _prewarm_lock:
+        if not _prewarm_started:
+            threading.Thread(target=_prewarm_loop, name='attempt-prewarm', daemon=True).start()
+            _prewarm_started = True
 
 def parse_scheduled_start(raw):
     """Convert datetime-local input (YYYY-MM-DDTHH:MM) to DB format (YYYY-MM-DD HH:MM:SS), or None."""
@@ -398,9 +1762,183 @@ def parse_scheduled_start(raw):
     except ValueError:
         return None
 
-def generate_code(user_id, question_id):
-    raw = f"{user_id}-{question_id}-{random.randint(10000,99999)}"
-    return hashlib.md5(raw.encode()).hexdigest()[:8].upper()
+# ─── Reward codes ─────────────────────────────────────────────────────────────
+# A reward code is <attempt>-<question>-<tag>: the user_sessions id and the
+# question id in Crockford base32, then a 40-bit HMAC-SHA256 tag over both.
+# An attempt answers a question at most once, so codes never collide, and
+# anyone holding REWARD_CODE_SECRET can authenticate a code without the
+# database. The database is only needed to confirm the answer still stands
+# (it may since have been reset or regraded). Codes issued before this scheme
+# (8 hex characters) are verified by lookup, and so is a well-formed code whose
+# tag fails — it may have been signed under an earlier key. Without
+# REWARD_CODE_SECRET or SECRET_KEY the key is random per process, so offline
+# checks report such codes as unknown rather than forged.
+
+REWARD_SECRET_EPHEMERAL = not (os.environ.get('REWARD_CODE_SECRET') or os.environ.get('SECRET_KEY'))
+
+def _reward_secret():
+    configured = os.environ.get('REWARD_CODE_SECRET')
+    if configured:
+        return configured.encode()
+    key = app.secret_key if isinstance(app.secret_key, bytes) else str(app.secret_key).encode()
+    return hashlib.sha256(b'reward-codes:' + key).digest()
+
+_REWARD_MAC      = hmac.new(_reward_secret(), digestmod='sha256')
+_B32_ALPHABET    = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+_B32_VALUE       = {c: i for i, c in enumerate(_B32_ALPHABET)}
+_B32_ALIASES     = str.maketrans('OIL', '011')   # Crockford: read-alike letters
+_LEGACY_CODE     = re.compile(r'^[0-9A-F]{8}$')
+REWARD_VERIFY_MAX = int(os.environ.get('REWARD_VERIFY_MAX', '20000'))
+PRIZE_DESK_TOKEN  = os.environ.get('PRIZE_DESK_TOKEN', '')
+
+def _b32(n):
+    out = ''
+    while True:
+        n, r = divmod(n, 32)
+        out = _B32_ALPHABET[r] + out
+        if not n:
+            return out
+
+def _unb32(text):
+    n = 0
+    for ch in text:
+        v = _B32_VALUE.get(ch)
+        if v is None:
+            return None
+        n = n * 32 + v
+    return n if text else None
+
+def _reward_tag(attempt_id, question_id):
+    mac = _REWARD_MAC.copy()
+    mac.update(b'%d:%d' % (attempt_id, question_id))
+    tag = _b32(int.from_bytes(mac.digest()[:5], 'big'))
+    return '0' * (8 - len(tag)) + tag
+
+def make_reward_code(attempt_id, question_id):
+    return f'{_b32(attempt_id)}-{_b32(question_id)}-{_reward_tag(attempt_id, question_id)}'
+
+def normalize_reward_code(code):
+    return (code or '').strip().upper().replace(' ', '').translate(_B32_ALIASES)
+
+def _split_reward_code(code):
+    """(attempt_id, question_id, tag) of a well-formed normalized code, else None."""
+    parts = code.split('-')
+    if len(parts) != 3:
+        return None
+    attempt_id, question_id = _unb32(parts[0]), _unb32(parts[1])
+    if attempt_id is None or question_id is None:
+        return None
+    return attempt_id, question_id, parts[2]
+
+def parse_reward_code(code):
+    """(attempt_id, question_id) for an authentic code, else None. No DB access."""
+    parts = _split_reward_code(normalize_reward_code(code))
+    if parts is None or not hmac.compare_digest(parts[2], _reward_tag(*parts[:2])):
+        return None
+    return parts[:2]
+
+def verify_reward_codes(codes, conn=None):
+    """Check a batch of codes. Without `conn` only authenticity is checked.
+
+    Each result has 'code' and 'status':
+      valid      authentic and (with conn) the answer is still correct
+      invalid    malformed or forged
+      revoked    authentic, but the answer was since regraded as wrong
+      unknown    authentic, but the attempt or answer no longer exists; offline,
+                 also a legacy code or one a per-process key cannot check
+      repeat     the same code already appeared earlier in this batch
+    plus attempt_id/question_id and, with conn, who earned it and where.
+    """
+    results, seen, lookups, legacy, unsigned = [], set(), {}, {}, {}
+    for raw in codes:
+        code = normalize_reward_code(raw)
+        if not code:
+            continue
+        res = {'code': code}
+        results.append(res)
+        if code in seen:
+            res['status'] = 'repeat'
+            continue
+        seen.add(code)
+        parts = _split_reward_code(code)
+        if parts and hmac.compare_digest(parts[2], _reward_tag(*parts[:2])):
+            ids = parts[:2]
+            res['status'] = 'valid'
+            res['attempt_id'], res['question_id'] = ids
+            lookups[ids] = res
+        elif parts and conn is not None:
+            unsigned.setdefault(parts[:2], res)   # only the stored copy can vouch for it
+            res['status'] = 'invalid'
+        elif parts and REWARD_SECRET_EPHEMERAL:
+            res['status'] = 'unknown'
+        elif _LEGACY_CODE.match(code):
+            legacy[code] = res   # unsigned: only the database can confirm it
+            res['status'] = 'unknown'
+        else:
+            res['status'] = 'invalid'
+    if conn is None or not (lookups or legacy or unsigned):
+        return results
+
+    columns = '''ua.user_session_id, ua.question_id, ua.is_correct, ua.reward_code,
+                 ua.answered_at, u.name, u.phone, qs.name AS session_name, q.question_text'''
+    joins = '''JOIN user_sessions us ON us.id = ua.user_session_id
+               JOIN users u          ON u.id = us.user_id
+               JOIN quiz_sessions qs ON qs.id = us.session_id
+               JOIN questions q      ON q.id = ua.question_id'''
+    found = []
+    if lookups or unsigned:
+        cur = conn.cursor()
+        found += psycopg2.extras.execute_values(cur, f'''
+            SELECT {columns} FROM (VALUES %s) AS v(attempt_id, question_id)
+            JOIN user_answers ua ON ua.user_session_id = v.attempt_id AND ua.question_id = v.question_id
+            {joins}
+        ''', list(lookups.keys() | unsigned.keys()), template='(%s::int, %s::int)',
+            page_size=1000, fetch=True)
+        cur.close()
+    if legacy:
+        found += _fetchall(conn, f'''
+            SELECT {columns} FROM user_answers ua {joins}
+            WHERE length(ua.reward_code) = 8 AND ua.reward_code = ANY(%s)
+        ''', (list(legacy),))
+    for row in found:
+        key = (row['user_session_id'], row['question_id'])
+        res = lookups.get(key) or legacy.get(row['reward_code'])
+        if res is None:
+            res = unsigned.get(key)
+            if res is None or row['reward_code'] != res['code']:
+                continue
+        res.update(attempt_id=row['user_session_id'], question_id=row['question_id'],
+                   name=row['name'], phone=row['phone'], session=row['session_name'],
+                   question=row['question_text'],
+                   answered_at=str(row['answered_at'])[:16] if row['answered_at'] else None)
+        res['status'] = 'valid' if row['is_correct'] and row['reward_code'] == res['code'] else 'revoked'
+    for res in lookups.values():
+        if 'name' not in res:
+            res['status'] = 'unknown'
+    return results
+
+def reward_code_summary(results):
+    counts = {}
+    for r in results:
+        counts[r['status']] = counts.get(r['status'], 0) + 1
+    return counts
+
+# ─── Fragment cache ───────────────────────────────────────────────────────────
+# Rendered admin partials (the sessions table, a session's section list, a
+# section's question list) keyed by tuples such as ('sections', 3). The CRUD
+# branches and CLI commands that change what a fragment shows invalidate it
+# by key prefix, which reaches every worker through the namespace's DB epoch.
+# Participant-count refreshes from quiz starts stay local (broadcast=False);
+# FRAGMENT_TTL bounds how long other workers show the old count.
+
+FRAGMENT_TTL = int(os.environ.get('FRAGMENT_TTL', '600'))
+FRAGMENTS    = VersionedCache('fragments', FRAGMENT_TTL, db_epoch=True)
+
+def render_fragment(key, template, load, conn=None):
+    """Cached render of a partial template. `load()` returns its context and
+    only runs on a miss, so a hit skips the queries behind the fragment too."""
+    from markupsafe import Markup
+    return Markup(FRAGMENTS.remember(key, lambda: render_template(template, **load()), conn))
 
 # ─── Auth decorators ──────────────────────────────────────────────────────────
 
@@ -420,16 +1958,671 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated
 
+_PHONE_STRIP = str.maketrans('', '', ' -().\t')
+_KE_MOBILE   = re.compile(r'(?:(?:\+|00)?254|0)?([17]\d{8})')
+_OTHER_PHONE = re.compile(r'(\+|00)?(\d{6,15})')
+
 def normalize_phone(raw):
-    """Normalize any Kenyan phone format to 07XXXXXXXX or 01XXXXXXXX (10 digits)."""
-    phone = raw.strip().replace(' ', '').replace('-', '')
-    # +2547... or 2547... → 07...
+    """Canonical form of a phone number, with any spacing or punctuation.
+    A Kenyan mobile written as 07…, 01…, 7…, 254…, +254… or 00254… becomes
+    +2547XXXXXXXX / +2541XXXXXXXX; any other number with a +/00 country code
+    becomes +<digits>, and one without is kept as its digits. Returns None
+    when the input is not a phone number at all."""
+    cleaned = (raw or '').translate(_PHONE_STRIP)
+    m = _KE_MOBILE.fullmatch(cleaned)
+    if m:
+        return '+254' + m.group(1)
+    m = _OTHER_PHONE.fullmatch(cleaned)
+    if not m:
+        return None
+    return ('+' if m.group(1) else '') + m.group(2)
+
+def legacy_phone(raw):
+    """The form older releases stored (07…/01…, spaces and dashes removed), so
+    accounts stay reachable until `flask normalize-phones` has rewritten them."""
+    phone = (raw or '').strip().replace(' ', '').replace('-', '')
     if phone.startswith('+254'):
         phone = '0' + phone[4:]
     elif phone.startswith('254') and len(phone) >= 12:
         phone = '0' + phone[3:]
     return phone
 
+def normalize_user_phones(conn):
+    """Rewrite stored phones to normalize_phone() form so every account stays
+    reachable from the login form. Rows that map to the same number are merged
+    into the one already in canonical form (else the oldest): their attempts
+    move over and the rest are deleted, each merge audited. Values that are
+    not phone numbers at all are left as they are and returned. Caller commits.
+
+    Returns {'converted': n, 'merged': [(keeper_id, [merged ids], phone)],
+    'unparseable': [(id, phone)]}."""
+    report = {'converted': 0, 'merged': [], 'unparseable': []}
+    rows = _fetchall(conn, "SELECT id, phone FROM users WHERE phone !~ '^[+]254[17][0-9]{8}$' ORDER BY id")
+    groups = {}
+    for r in rows:
+        phone = normalize_phone(r['phone'])
+        if phone == r['phone']:
+            continue
+        if phone:
+            groups.setdefault(phone, []).append(r['id'])
+        else:
+            report['unparseable'].append((r['id'], r['phone']))
+    canonical = {}
+    if groups:
+        canonical = {r['phone']: r['id'] for r in _fetchall(conn,
+                     'SELECT id, phone FROM users WHERE phone = ANY(%s)', (list(groups),))}
+    merged_into = []
+    for phone, ids in groups.items():
+        keeper = canonical.get(phone, ids[0])
+        dups   = [i for i in ids if i != keeper]
+        if dups:
+            _exec(conn, 'UPDATE user_sessions SET user_id = %s WHERE user_id = ANY(%s)', (keeper, dups))
+            _exec(conn, 'DELETE FROM users WHERE id = ANY(%s)', (dups,))
+            log_action(conn, 'merge_users', category='system', entity_type='user',
+                       entity_id=keeper, entity_name=phone,
+                       details=f"Merged users {', '.join(map(str, dups))} into {keeper} ({phone})")
+            report['merged'].append((keeper, dups, phone))
+            merged_into.append(keeper)
+        if keeper not in canonical.values():
+            _exec(conn, 'UPDATE users SET phone = %s WHERE id = %s', (phone, keeper))
+            report['converted'] += 1
+    refresh_user_scores(conn, merged_into)
+    return report
+
+# ─── Question bank import ─────────────────────────────────────────────────────
+# One row per question.  Columns (CSV header / xlsx first row / JSON keys):
+#   section, question_type, question_text, option_a … option_d,
+#   correct_answer, blank_options, points, order_num
+#
+#   single     : correct_answer = 'B'
+#   multi      : correct_answer = 'A,C'
+#   fill_blank : correct_answer = 'Adam|Garden'
+#                blank_options  = JSON '[["Adam","Eve"],["Garden","Temple"]]'
+#                                 or 'Adam,Eve | Garden,Temple'
+
+QUESTION_TYPES = ('single', 'multi', 'fill_blank')
+OPTION_LETTERS = ('A', 'B', 'C', 'D')
+
+def read_question_bank(filename, data):
+    """Parse an uploaded .csv / .xlsx / .json file into a list of row dicts."""
+    import io, csv
+    ext = os.path.splitext(filename or '')[1].lower()
+    if ext == '.json':
+        payload = json.loads(data.decode('utf-8-sig'))
+        if isinstance(payload, dict):
+            payload = payload.get('questions', [])
+        return [dict(r) for r in payload]
+    if ext == '.csv':
+        return list(csv.DictReader(io.StringIO(data.decode('utf-8-sig'))))
+    if ext in ('.xlsx', '.xlsm'):
+        import openpyxl
+        wb = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(h or '').strip().lower() for h in next(rows, [])]
+        return [dict(zip(header, r)) for r in rows if any(v not in (None, '') for v in r)]
+    raise ValueError(f'Unsupported file type "{ext or filename}" — use .csv, .xlsx or .json')
+
+def _parse_blank_options(raw):
+    """Accept JSON (list of lists) or 'a,b | c,d' and return a list of lists."""
+    if isinstance(raw, list):
+        return [[str(o).strip() for o in blank] for blank in raw]
+    raw = str(raw or '').strip()
+    if not raw:
+        return []
+    if raw.startswith('['):
+        return [[str(o).strip() for o in blank] for blank in json.loads(raw)]
+    return [[o.strip() for o in blank.split(',') if o.strip()] for blank in raw.split('|')]
+
+def validate_question_bank(rows):
+    """Validate every row in one pass.
+    Returns (clean, errors): clean is a list of insert-ready dicts, errors a
+    list of 'Row N: message' strings (row numbers count the header as row 1).
+    Nothing should be loaded unless errors is empty.
+    """
+    clean, errors = [], []
+    for n, raw in enumerate(rows, start=2):
+        r = {str(k).strip().lower(): ('' if v is None else v) for k, v in raw.items() if k}
+        def cell(key):
+            return str(r.get(key, '')).strip()
+
+        section = cell('section')
+        qtype   = cell('question_type').lower() or 'single'
+        text    = cell('question_text')
+        opts    = {l: cell(f'option_{l.lower()}') for l in OPTION_LETTERS}
+        correct = cell('correct_answer')
+        bo      = []
+        try:
+            points    = int(float(cell('points') or 1))
+            order_num = int(float(cell('order_num') or 0))
+        except ValueError:
+            errors.append(f'Row {n}: points and order_num must be numbers'); continue
+
+        if not section:
+            errors.append(f'Row {n}: section is required'); continue
+        if not text:
+            errors.append(f'Row {n}: question_text is required'); continue
+        if qtype not in QUESTION_TYPES:
+            errors.append(f'Row {n}: unknown question_type "{qtype}"'); continue
+
+        if qtype == 'single':
+            correct = correct.upper()
+            if correct not in OPTION_LETTERS or not opts[correct]:
+                errors.append(f'Row {n}: correct_answer must be a filled option letter A–D'); continue
+        elif qtype == 'multi':
+            letters = sorted({x.strip().upper() for x in correct.split(',') if x.strip()})
+            if not letters or any(l not in OPTION_LETTERS or not opts[l] for l in letters):
+                errors.append(f'Row {n}: correct_answer must list filled option letters e.g. "A,C"'); continue
+            correct = ','.join(letters)
+        else:
+            try:
+                bo = _parse_blank_options(r.get('blank_options', ''))
+            except (ValueError, TypeError):
+                errors.append(f'Row {n}: blank_options is not valid JSON'); continue
+            answers = [p.strip() for p in correct.split('|')]
+            blanks  = text.count('___')
+            if not bo or len(bo) != len(answers) or len(bo) != blanks:
+                errors.append(f'Row {n}: need one blank_options list and one answer per ___ '
+                              f'({blanks} blanks, {len(bo)} option lists, {len(answers)} answers)'); continue
+            if any(a not in opts_ for a, opts_ in zip(answers, bo)):
+                errors.append(f'Row {n}: each correct answer must appear in its blank_options'); continue
+            correct = '|'.join(answers)
+            opts    = {l: '' for l in OPTION_LETTERS}
+
+        clean.append(dict(section=section, question_type=qtype, question_text=text,
+                          option_a=opts['A'], option_b=opts['B'],
+                          option_c=opts['C'], option_d=opts['D'],
+                          correct_answer=correct, blank_options=json.dumps(bo),
+                          points=points, order_num=order_num))
+    return clean, errors
+
+def import_question_bank(conn, session_id, clean):
+    """Insert validated rows into a session: missing sections are created
+    (in first-seen order) and all questions go in with batched execute_values.
+    Runs inside the caller's transaction — caller commits.
+    Returns (sections_created, questions_inserted).
+    """
+    existing = {r['name']: r['id'] for r in _fetchall(conn,
+        'SELECT id, name FROM sections WHERE session_id=%s', (session_id,)
+    )}
+    new_names = list(dict.fromkeys(r['section'] for r in clean if r['section'] not in existing))
+    if new_names:
+        base = _fetchone(conn,
+            'SELECT COALESCE(MAX(order_num), 0) AS m FROM sections WHERE session_id=%s', (session_id,)
+        )['m']
+        cur = conn.cursor()
+        created = psycopg2.extras.execute_values(cur,
+            'INSERT INTO sections (session_id, name, order_num) VALUES %s RETURNING id, name',
+            [(session_id, name, base + i) for i, name in enumerate(new_names, start=1)],
+            fetch=True)
+        cur.close()
+        existing.update({r['name']: r['id'] for r in created})
+
+    cur = conn.cursor()
+    psycopg2.extras.execute_values(cur, '''
+        INSERT INTO questions (section_id, question_type, question_text,
+            option_a, option_b, option_c, option_d,
+            correct_answer, blank_options, points, order_num)
+        VALUES %s
+    ''', [(existing[r['section']], r['question_type'], r['question_text'],
+           r['option_a'], r['option_b'], r['option_c'], r['option_d'],
+           r['correct_answer'], r['blank_options'], r['points'], r['order_num'])
+          for r in clean], page_size=1000)
+    cur.close()
+    return len(new_names), len(clean)
+
+# ─── Declarative seeds ────────────────────────────────────────────────────────
+# A seed file describes one quiz session (see seeds/*.json):
+#   {"session":  {"name": …, "description": …, "time_limit_minutes": 30, …},
+#    "sections": [{"name": …, "order_num": 1,
+#                  "questions": [{"question_type": "multi", "question_text": …,
+#                                 "option_a": …, "correct_answer": ["A", "C"], …}]}]}
+# Question keys match the bulk-import columns; correct_answer may be a list.
+# YAML (.yml/.yaml) works too when PyYAML is installed.
+# app_settings remembers which session id each seed created (seed_session:<name>),
+# so a session an admin built under the same name is never replaced without --force.
+
+SEED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'seeds')
+
+def load_seed_file(path):
+    with open(path, 'rb') as fh:
+        data = fh.read()
+    if path.endswith(('.yml', '.yaml')):
+        import yaml   # optional dependency — only needed for YAML seeds
+        return yaml.safe_load(data)
+    return json.loads(data.decode('utf-8-sig'))
+
+def seed_rows(doc):
+    """Flatten a seed document into bulk-import rows."""
+    rows = []
+    for sec in doc.get('sections', []):
+        for q in sec.get('questions', []):
+            row = dict(q, section=sec['name'])
+            correct = row.get('correct_answer', '')
+            if isinstance(correct, list):
+                sep = '|' if row.get('question_type') == 'fill_blank' else ','
+                row['correct_answer'] = sep.join(str(c) for c in correct)
+            rows.append(row)
+    return rows
+
+def seed_digest(doc):
+    """Content hash of a seed document — unchanged files are skipped."""
+    return hashlib.sha256(json.dumps(doc, sort_keys=True, default=str).encode()).hexdigest()
+
+def apply_seed(doc, clean, digest, force=False):
+    """Create (or re-create) one seeded session on its own pooled connection.
+    Returns 'created' | 'updated' | 'unchanged' | 'skipped' | 'foreign'.
+
+    A session whose content hash matches the last seed is left alone.  A changed
+    session that already has attempts is skipped unless force=True, in which
+    case its attempts are wiped along with the old questions.  A same-named
+    session this seed did not create is 'foreign' and also needs force=True.
+    """
+    name = doc['session']['name']
+    conn = get_db()
+    try:
+        # Serialise concurrent seeders of the same session name
+        _exec(conn, 'SELECT pg_advisory_xact_lock(hashtext(%s))', (name,))
+        existing = _fetchone(conn, 'SELECT id FROM quiz_sessions WHERE name=%s', (name,))
+        stored   = _fetchone(conn, 'SELECT value FROM app_settings WHERE key=%s',
+                             (f'seed_hash:{name}',))
+        owner    = _fetchone(conn, 'SELECT value FROM app_settings WHERE key=%s',
+                             (f'seed_session:{name}',))
+        # Seeds applied before seed_session existed only left a seed_hash
+        seeded = existing and (owner['value'] == str(existing['id']) if owner else stored is not None)
+        if existing and not seeded and not force:
+            return 'foreign'
+        if seeded and stored and stored['value'] == digest:
+            return 'unchanged'
+        if existing:
+            attempts = _fetchone(conn,
+                'SELECT COUNT(*) AS n FROM user_sessions WHERE session_id=%s AND started_at IS NOT NULL',
+                (existing['id'],)
+            )['n']
+            if attempts and not force:
+                return 'skipped'
+            _reset_attempts(conn, existing['id'])
+            _exec(conn, 'DELETE FROM quiz_sessions WHERE id=%s', (existing['id'],))
+
+        sess = doc['session']
+        sid = _lastrowid(conn, '''
+            INSERT INTO quiz_sessions (name, description, is_active, randomize_questions,
+                                       time_limit_minutes, scheduled_start)
+            VALUES (%s,%s,%s,%s,%s,%s)
+        ''', (name, sess.get('description', ''), int(sess.get('is_active', 1)),
+              int(sess.get('randomize_questions', 1)), int(sess.get('time_limit_minutes') or 0),
+              parse_scheduled_start(str(sess.get('scheduled_start') or ''))))
+        # Sections first so their explicit order_num is kept; the importer
+        # then finds them by name.
+        cur = conn.cursor()
+        psycopg2.extras.execute_values(cur,
+            'INSERT INTO sections (session_id, name, order_num) VALUES %s',
+            [(sid, sec['name'], sec.get('order_num', i))
+             for i, sec in enumerate(doc.get('sections', []), start=1)])
+        cur.close()
+        import_question_bank(conn, sid, clean)
+        _exec(conn, '''
+            INSERT INTO app_settings (key, value) VALUES (%s, %s)
+            ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
+        ''', (f'seed_hash:{name}', digest))
+        _exec(conn, '''
+            INSERT INTO app_settings (key, value) VALUES (%s, %s)
+            ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
+        ''', (f'seed_session:{name}', str(sid)))
+        log_action(conn, 'seed_session', category='system', entity_type='session',
+                   entity_id=sid, entity_name=name,
+                   details=f"Seeded '{name}' ({len(clean)} questions)")
+        conn.commit()
+        FRAGMENTS.invalidate((), conn=conn)   # reaches web workers through the DB epoch
+        invalidate_question_counts(conn=conn)
+        invalidate_session_status(conn=conn)
+        return 'updated' if existing else 'created'
+    finally:
+        close_db(conn)
+
+# ─── Quiz attempts ────────────────────────────────────────────────────────────
+# Shared by the server-rendered take_quiz page and the JSON quiz API.
+# Only client mode (QUIZ_CLIENT_MODE=1, or ?client=1) queues answers offline
+# in IndexedDB; the default form POST needs the network when it is sent.
+
+QUIZ_CLIENT_MODE = os.environ.get('QUIZ_CLIENT_MODE', '0') == '1'
+
+def order_attempt_questions(rows, qs, us):
+    """Put question rows (dicts with 'id') in this attempt's order, in place."""
+    if us.get('question_order'):
+        # Pre-warmed attempts carry their order; questions added since go last
+        pos = {qid: i for i, qid in enumerate(json.loads(us['question_order']))}
+        rows.sort(key=lambda q: pos.get(q['id'], len(pos)))
+    elif qs['randomize_questions']:
+        # Randomize per user_session (stable seed so page reloads keep same order)
+        random.Random(us['id']).shuffle(rows)
+    return rows
+
+def attempt_progress(conn, qs, us):
+    """Return (ordered question ids, answered question ids) for an attempt
+    without loading any question text."""
+    ids = order_attempt_questions(_fetchall(conn, '''
+        SELECT q.id FROM questions q JOIN sections s ON q.section_id = s.id
+        WHERE s.session_id = %s ORDER BY s.order_num, s.id, q.order_num, q.id
+    ''', (qs['id'],)), qs, us)
+    answered = {r['question_id'] for r in _fetchall(conn,
+        'SELECT question_id FROM user_answers WHERE user_session_id=%s', (us['id'],))}
+    return [r['id'] for r in ids], answered
+
+def fetch_question(conn, question_id):
+    return _fetchone(conn, '''
+        SELECT q.*, s.name AS section_name FROM questions q
+        JOIN sections s ON q.section_id = s.id WHERE q.id = %s
+    ''', (question_id,))
+
+def parse_selection(question, answer, blanks=()):
+    """Normalise a submitted answer to the raw string score_answer() expects:
+    a letter (single), letters (multi) or the list of blank choices
+    (fill_blank). Returns '' when nothing was chosen."""
+    qtype = question['question_type'] or 'single'
+    if qtype == 'single':
+        return (answer if isinstance(answer, str) else '').strip().upper()
+    if qtype == 'multi':
+        checked = [answer] if isinstance(answer, str) else list(answer or [])
+        return ','.join(sorted(x.upper() for x in checked if x)) if checked else ''
+    if qtype == 'fill_blank':
+        bo = json.loads(question['blank_options'] or '[]')
+        blanks = list(blanks or [])
+        return '|'.join((blanks[i] if i < len(blanks) else '').strip() for i in range(len(bo)))
+    return ''
+
+def record_answer(conn, qs, us_id, question, selected_raw):
+    """Score and store one answer with its audit row. Returns is_correct, or
+    None if the question was already answered on this attempt. Caller commits."""
+    is_correct, stored_sel, pts_earned = score_answer(question, selected_raw)
+    code = make_reward_code(us_id, question['id']) if is_correct else None
+    cur = _exec(conn, '''
+        INSERT INTO user_answers (user_session_id, question_id, selected_answer, is_correct, points_earned, reward_code)
+        VALUES (%s,%s,%s,%s,%s,%s) ON CONFLICT DO NOTHING
+    ''', (us_id, question['id'], stored_sel, is_correct, pts_earned, code))
+    inserted = cur.rowcount
+    cur.close()
+    if not inserted:
+        return None
+    ANSWERS_TOTAL.inc('correct' if is_correct else 'wrong')
+    result_label = 'correct' if is_correct else 'wrong'
+    log_action(conn, 'quiz_answer', category='user',
+               entity_type='question', entity_id=question['id'],
+               entity_name=session.get('user_name'),
+               details=f"Q#{question['id']} answered {result_label} in session #{qs['id']}")
+    return is_correct
+
+def complete_attempt(conn, qs, us_id, answered, total):
+    """Mark an attempt complete once every question is answered. Caller commits."""
+    _exec(conn, f"UPDATE user_sessions us SET completed_at={NOW_EAT_SQL}, {FREEZE_TOTALS_SQL} WHERE us.id=%s", (us_id,))
+    refresh_user_scores(conn, [session['user_id']])
+    log_action(conn, 'quiz_complete', category='user',
+               entity_type='session', entity_id=qs['id'], entity_name=qs['name'],
+               details=f"{session.get('user_name')} completed '{qs['name']}' "
+                       f"({answered}/{total} answered)")
+
+def cheat_flag_count(conn, us_id):
+    """Existing flags for an attempt — the anti-cheat JS restores strike state from it."""
+    row = _fetchone(conn, 'SELECT COUNT(*) as n FROM cheat_flags WHERE user_session_id=%s', (us_id,))
+    return int(row['n']) if row else 0
+
+def question_payload(question):
+    """Client-safe view of a question (no correct answer)."""
+    qtype = question['question_type'] or 'single'
+    payload = {
+        'id': question['id'], 'type': qtype, 'text': question['question_text'],
+        'points': question['points'], 'section': question.get('section_name'),
+    }
+    if qtype == 'fill_blank':
+        payload['parts']  = question['question_text'].split('___')
+        payload['blanks'] = json.loads(question['blank_options'] or '[]')
+    else:
+        payload['options'] = [
+            {'letter': letter, 'text': question[f'option_{letter.lower()}']}
+            for letter in OPTION_LETTERS if question[f'option_{letter.lower()}']
+        ]
+    if qtype == 'multi':
+        correct = question['correct_answer']
+        payload['max_select'] = len(correct.split(',')) if correct else 4
+    return payload
+
+# ─── Attempt results ──────────────────────────────────────────────────────────
+# A completed attempt's totals live on its user_sessions row (FREEZE_TOTALS_SQL)
+# and its answer list cannot change except through a regrade or a question
+# edit, so the list is cached per attempt. Open attempts are read live. The
+# namespace carries a DB epoch, so a `flask regrade` or an edit served by one
+# worker retires the lists every other worker holds.
+
+ATTEMPT_DETAIL_TTL = int(os.environ.get('ATTEMPT_DETAIL_TTL', '3600'))
+ATTEMPT_DETAIL     = VersionedCache('attempt-detail', ATTEMPT_DETAIL_TTL, db_epoch=True)
+QUESTION_COUNTS    = VersionedCache('question-counts', FRAGMENT_TTL, db_epoch=True)
+
+# Score columns of an attempt aliased `us`: its frozen totals, or for an open
+# attempt the live sums from ATTEMPT_LIVE_JOIN_SQL (which only runs for those)
+ATTEMPT_SCORE_SQL = '''COALESCE(us.answered_count, live.answered) AS total_answered,
+       COALESCE(us.correct_count, live.correct) AS correct_count,
+       COALESCE(us.total_points, live.points) AS total_points'''
+ATTEMPT_LIVE_JOIN_SQL = '''LEFT JOIN LATERAL (
+    SELECT COUNT(*) AS answered, COUNT(*) FILTER (WHERE ua.is_correct = 1) AS correct,
+           COALESCE(SUM(ua.points_earned), 0) AS points
+    FROM user_answers ua
+    WHERE ua.user_session_id = us.id AND us.answered_count IS NULL
+) live ON true'''
+
+def session_question_counts(conn):
+    """{session_id: number of questions}, cached until questions are added,
+    removed or imported by any worker or the CLI (invalidate_question_counts)."""
+    def load():
+        return json.dumps({r['session_id']: r['n'] for r in _fetchall(conn, '''
+            SELECT s.session_id, COUNT(q.id) AS n
+            FROM sections s JOIN questions q ON q.section_id = s.id
+            GROUP BY s.session_id''')})
+    return {int(k): n for k, n in json.loads(QUESTION_COUNTS.remember(('all',), load, conn)).items()}
+
+def invalidate_question_counts(conn=None):
+    QUESTION_COUNTS.invalidate((), conn=conn)
+
+def attempt_answers(conn, attempt_id):
+    """Answers of one attempt with their question and section, in answer order."""
+    return [dict(zip(r.keys(), r)) for r in _fetchall_rows(conn, '''
+        SELECT ua.selected_answer, ua.is_correct, ua.points_earned, ua.reward_code,
+               q.question_text, q.correct_answer, q.option_a, q.option_b, q.option_c, q.option_d,
+               q.points, q.question_type, s.name AS section_name
+        FROM user_answers ua
+        JOIN questions q ON ua.question_id = q.id
+        JOIN sections s ON q.section_id = s.id
+        WHERE ua.user_session_id = %s
+        ORDER BY ua.answered_at, ua.id
+    ''', (attempt_id,))]
+
+def completed_attempt_answers(conn, attempt_id):
+    return json.loads(ATTEMPT_DETAIL.remember((attempt_id,),
+                                              lambda: json.dumps(attempt_answers(conn, attempt_id)),
+                                              conn))
+
+def refreeze_attempt_totals(conn, attempt_ids):
+    """Recompute frozen totals (and their users' summaries) after answers of
+    completed attempts changed. Caller commits."""
+    if attempt_ids:
+        cur = _exec(conn, f'''UPDATE user_sessions us SET {FREEZE_TOTALS_SQL}
+                              WHERE us.id = ANY(%s) AND us.completed_at IS NOT NULL
+                              RETURNING us.user_id''', (list(attempt_ids),))
+        refresh_user_scores(conn, {r['user_id'] for r in cur.fetchall()})
+
+def dedupe_answers(conn, dry_run=False):
+    """Delete all but the earliest answer of each (attempt, question) pair —
+    left by double submits from before uq_user_answers_attempt_question —
+    re-freeze the attempts concerned and create the index. Returns the
+    removed rows. Caller commits and invalidates their attempt details."""
+    removed = _fetchall(conn, '''
+        SELECT a.id, a.user_session_id, a.question_id, a.reward_code
+        FROM user_answers a
+        WHERE EXISTS (SELECT 1 FROM user_answers b
+                      WHERE b.user_session_id = a.user_session_id
+                        AND b.question_id = a.question_id AND b.id < a.id)
+        ORDER BY a.user_session_id, a.question_id, a.id
+    ''')
+    if dry_run:
+        return removed
+    if removed:
+        attempt_ids = {r['user_session_id'] for r in removed}
+        _exec(conn, 'DELETE FROM user_answers WHERE id = ANY(%s)', ([r['id'] for r in removed],))
+        refreeze_attempt_totals(conn, attempt_ids)
+        log_action(conn, 'dedupe_answers', category='system', entity_type='user_answer',
+                   details=f"Removed {len(removed)} duplicate answers from "
+                           f"{len(attempt_ids)} attempts (answer ids "
+                           f"{', '.join(str(r['id']) for r in removed)})")
+    _exec(conn, 'CREATE UNIQUE INDEX IF NOT EXISTS uq_user_answers_attempt_question '
+                'ON user_answers (user_session_id, question_id)')
+    return removed
+
+def invalidate_attempt_detail(attempt_ids=None, conn=None):
+    """Drop cached answer lists — for the given attempts, or all of them
+    (after a question or section edit changes what every list shows, or
+    when so many attempts changed that one bump is cheaper than many)."""
+    if attempt_ids is None or len(attempt_ids) > 200:
+        ATTEMPT_DETAIL.invalidate((), conn=conn)
+    else:
+        ATTEMPT_DETAIL.invalidate(*[(a,) for a in attempt_ids], conn=conn)
+
+# ─── User score summaries ─────────────────────────────────────────────────────
+# Per-user totals over completed attempts (flags count on any attempt), kept
+# on the users row so the admin users list sorts, filters and pages through
+# indexes instead of aggregating every answer. refresh_user_scores() runs
+# wherever an attempt completes, a flag is recorded, frozen totals are
+# regraded or attempts are reset.
+
+USER_SCORES_SQL = '''(score_sessions, score_answered, score_correct, score_points, flag_count) = (
+    SELECT COUNT(DISTINCT us.session_id) FILTER (WHERE us.completed_at IS NOT NULL),
+           COALESCE(SUM(us.answered_count), 0), COALESCE(SUM(us.correct_count), 0),
+           COALESCE(SUM(us.total_points), 0),
+           (SELECT COUNT(*) FROM cheat_flags cf JOIN user_sessions x ON cf.user_session_id = x.id
+            WHERE x.user_id = u.id AND x.started_at IS NOT NULL)
+    FROM user_sessions us WHERE us.user_id = u.id AND us.started_at IS NOT NULL)'''
+
+def refresh_user_scores(conn, user_ids):
+    """Recompute the score summary of the given users. Caller commits."""
+    if user_ids:
+        _exec(conn, f'UPDATE users u SET {USER_SCORES_SQL} WHERE u.id = ANY(%s)', (list(user_ids),))
+
+# ─── Regrading ────────────────────────────────────────────────────────────────
+# After a correct_answer / points fix, stored answers still hold the old
+# is_correct, points_earned and reward_code. regrade_questions() walks the
+# affected answers in id order, REGRADE_CHUNK_SIZE at a time, scores each
+# distinct (question, selection) pair once against the current answer key and
+# writes back only the rows whose result changed, one UPDATE … FROM (VALUES …)
+# per chunk. Run it from the question list (♻ Regrade) or `flask regrade`.
+
+REGRADE_CHUNK_SIZE = int(os.environ.get('REGRADE_CHUNK_SIZE', '5000'))
+
+def score_batch(pairs, keys):
+    """Score (question_id, selected_answer) pairs with the compiled keys in
+    `keys`; identical pairs are scored once. Returns score_answer() tuples."""
+    memo, out = {}, []
+    for pair in pairs:
+        result = memo.get(pair)
+        if result is None:
+            result = memo[pair] = keys[pair[0]].score(pair[1] or '')
+        out.append(result)
+    return out
+
+def regrade_questions(conn, question_ids, chunk_size=None, dry_run=False):
+    """Re-score every stored answer to `question_ids`. With dry_run nothing is
+    written. Returns a report dict (totals, per-question counts, the attempts
+    whose score moved most and every attempt touched). Frozen attempt totals
+    are refreshed in the same transaction; the caller commits, then calls
+    invalidate_attempt_detail(report['attempt_ids'])."""
+    chunk_size = chunk_size or REGRADE_CHUNK_SIZE
+    questions = _fetchall(conn,
+        'SELECT id, question_type, correct_answer, points FROM questions WHERE id = ANY(%s)',
+        (list(question_ids),))
+    keys = {q['id']: answer_key(q) for q in questions}
+    report = {'questions': len(keys), 'examined': 0, 'changed': 0,
+              'now_correct': 0, 'now_wrong': 0,
+              'points_before': 0.0, 'points_after': 0.0,
+              'per_question': {qid: {'examined': 0, 'changed': 0} for qid in keys},
+              'attempts': [], 'attempt_ids': []}
+    touched = set()
+    attempt_delta = {}
+    last_id = 0
+    while keys:
+        rows = _fetchall_rows(conn, '''
+            SELECT ua.id, ua.question_id, ua.selected_answer, ua.is_correct,
+                   ua.points_earned, ua.reward_code, ua.user_session_id
+            FROM user_answers ua
+            WHERE ua.question_id = ANY(%s) AND ua.id > %s
+            ORDER BY ua.id LIMIT %s
+        ''', (list(keys), last_id, chunk_size))
+        if not rows:
+            break
+        last_id = rows[-1].id
+        updates = []
+        scored = score_batch([(r.question_id, r.selected_answer) for r in rows], keys)
+        for r, (is_correct, _, earned) in zip(rows, scored):
+            old_points = round(r.points_earned or 0.0, 2)
+            old_correct = r.is_correct or 0
+            report['examined'] += 1
+            report['points_before'] += old_points
+            report['points_after']  += earned
+            report['per_question'][r.question_id]['examined'] += 1
+            if is_correct == old_correct and earned == old_points:
+                continue
+            if is_correct:
+                code = r.reward_code or make_reward_code(r.user_session_id, r.question_id)
+            else:
+                code = None
+            updates.append((r.id, is_correct, earned, code))
+            report['changed'] += 1
+            report['per_question'][r.question_id]['changed'] += 1
+            if is_correct != old_correct:
+                report['now_correct' if is_correct else 'now_wrong'] += 1
+            attempt_delta[r.user_session_id] = (attempt_delta.get(r.user_session_id, 0.0)
+                                                + earned - old_points)
+            touched.add(r.user_session_id)
+        if updates and not dry_run:
+            cur = conn.cursor()
+            psycopg2.extras.execute_values(cur, '''
+                UPDATE user_answers ua
+                SET is_correct = v.is_correct, points_earned = v.points_earned,
+                    reward_code = v.reward_code
+                FROM (VALUES %s) AS v(id, is_correct, points_earned, reward_code)
+                WHERE ua.id = v.id
+            ''', updates, template='(%s::int, %s::int, %s::numeric, %s::text)', page_size=1000)
+            cur.close()
+
+    if touched and not dry_run:
+        refreeze_attempt_totals(conn, touched)
+    report['attempt_ids'] = sorted(touched)
+    attempt_delta = {k: round(d, 2) for k, d in attempt_delta.items() if round(d, 2)}
+    moved = sorted(attempt_delta.items(), key=lambda kv: abs(kv[1]), reverse=True)[:10]
+    if moved:
+        totals = {r['id']: r for r in _fetchall(conn, '''
+            SELECT us.id, u.name, COALESCE(SUM(ua.points_earned), 0)::float AS total
+            FROM user_sessions us
+            JOIN users u ON u.id = us.user_id
+            LEFT JOIN user_answers ua ON ua.user_session_id = us.id
+            WHERE us.id = ANY(%s)
+            GROUP BY us.id, u.name
+        ''', ([us_id for us_id, _ in moved],))}
+        for us_id, delta in moved:
+            row = totals.get(us_id)
+            if not row:
+                continue
+            # totals are read after the write (or unchanged on a dry run)
+            after  = row['total'] if not dry_run else row['total'] + delta
+            report['attempts'].append({'attempt_id': us_id, 'name': row['name'],
+                                       'before': round(after - delta, 2), 'after': round(after, 2)})
+    report['attempts_changed'] = len(attempt_delta)
+    report['points_before'] = round(report['points_before'], 2)
+    report['points_after']  = round(report['points_after'], 2)
+    return report
+
+def regrade_summary(report):
+    """One-line description of a regrade report for flashes and the audit log."""
+    return (f"Re-scored {report['examined']} answers on {report['questions']} question(s): "
+            f"{report['changed']} changed ({report['now_correct']} now correct, "
+            f"{report['now_wrong']} now wrong), {report['attempts_changed']} attempts affected, "
+            f"points {report['points_before']:g} → {report['points_after']:g}")
+
 # ═══════════════════════════════════════════════════════════════════════════════
 #  USER ROUTES
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -439,20 +2632,33 @@ def index():
     if 'user_id' in session:
         return redirect(url_for('quiz_home'))
     if request.method == 'POST':
-        phone = normalize_phone(request.form.get('phone', ''))
+        raw   = request.form.get('phone', '')
+        phone = normalize_phone(raw)
         if not phone:
-            flash('Please enter your phone number.', 'error')
+            flash('Please enter a valid phone number (e.g. 0712 345 678).' if raw.strip()
+                  else 'Please enter your phone number.', 'error')
             return render_template('index.html')
+        wait = login_throttle(phone)
+        if wait:
+            flash(f'Too many login attempts — please try again in {int(wait) + 1} seconds.', 'error')
+            return render_template('index.html'), 429
         conn = get_db()
-        user = _fetchone(conn, 'SELECT * FROM users WHERE phone=%s', (phone,))
+        # Lookup and audit row in one statement; the INSERT only fires on a match.
+        # Rows not yet rewritten by `flask normalize-phones` match on the old form.
+        user = _fetchone(conn, '''
+            WITH u AS (SELECT id, name FROM users WHERE phone = ANY(%s)
+                       ORDER BY phone = %s DESC, id LIMIT 1),
+            logged AS (
+                INSERT INTO audit_logs (action, category, entity_type, entity_id, entity_name, details, ip_address)
+                SELECT 'user_login', 'user', 'user', id, name, name || ' logged in (' || %s || ')', %s FROM u
+            )
+            SELECT id, name FROM u
+        ''', ([phone, legacy_phone(raw)], phone, phone, request.remote_addr))
         if user:
-            session['user_id']   = user['id']
-            session['user_name'] = user['name']
-            log_action(conn, 'user_login', category='user',
-                       entity_type='user', entity_id=user['id'], entity_name=user['name'],
-                       details=f"{user['name']} logged in ({phone})")
             conn.commit()
             close_db(conn)
+            session['user_id']   = user['id']
+            session['user_name'] = user['name']
             return redirect(url_for('quiz_home'))
         close_db(conn)
         session['pending_phone'] = phone
@@ -470,12 +2676,27 @@ def register():
             return render_template('register.html', phone=session['pending_phone'])
         phone = session.pop('pending_phone')
         conn = get_db()
-        _exec(conn, 'INSERT INTO users (phone, name) VALUES (%s,%s) ON CONFLICT (phone) DO NOTHING', (phone, name))
-        log_action(conn, 'user_register', category='user',
-                   entity_type='user', entity_name=name,
-                   details=f"New user registered: {name} ({phone})")
+        # Upsert + audit in one statement. If the number registered in the
+        # meantime (double submit, second tab) the existing account is used
+        # and its name kept; the no-op update is what makes RETURNING see it.
+        user = _fetchone(conn, '''
+            WITH u AS (
+                INSERT INTO users (phone, name) VALUES (%s, %s)
+                ON CONFLICT (phone) DO UPDATE SET phone = EXCLUDED.phone
+                RETURNING id, name, (xmax = 0) AS created
+            ),
+            logged AS (
+                INSERT INTO audit_logs (action, category, entity_type, entity_id, entity_name, details, ip_address)
+                SELECT CASE WHEN created THEN 'user_register' ELSE 'user_login' END,
+                       'user', 'user', id, name,
+                       CASE WHEN created THEN 'New user registered: ' || name || ' (' || %s || ')'
+                            ELSE name || ' logged in (' || %s || ')' END,
+                       %s
+                FROM u
+            )
+            SELECT id, name FROM u
+        ''', (phone, name, phone, phone, request.remote_addr))
         conn.commit()
-        user = _fetchone(conn, 'SELECT * FROM users WHERE phone=%s', (phone,))
         close_db(conn)
         session['user_id']   = user['id']
         session['user_name'] = user['name']
@@ -493,37 +2714,38 @@ def quiz_home():
         flash('Your session has expired. Please log in again.', 'error')
         return redirect(url_for('index'))
     sessions_list = _fetchall(conn,
-        'SELECT * FROM quiz_sessions WHERE is_active=1 ORDER BY created_at DESC'
+        f'SELECT *, {SECONDS_UNTIL_SQL} AS seconds_until FROM quiz_sessions '
+        'WHERE is_active=1 ORDER BY created_at DESC'
     )
     completed_ids = {
         r['session_id'] for r in
         _fetchall(conn, 'SELECT session_id FROM user_sessions WHERE user_id=%s AND completed_at IS NOT NULL',
                      (session['user_id'],))
     }
-    # in-progress: include started_at so we can show live countdown in the modal
+    # in-progress: include remaining time so we can show live countdown in the modal
     inprogress_rows = _fetchall(conn,
-        'SELECT session_id, started_at FROM user_sessions WHERE user_id=%s AND completed_at IS NULL',
+        f'SELECT us.session_id, {REMAINING_SQL} AS remaining_seconds FROM user_sessions us '
+        'WHERE us.user_id=%s AND us.completed_at IS NULL AND us.started_at IS NOT NULL',
         (session['user_id'],)
     )
     inprogress_ids = {r['session_id'] for r in inprogress_rows}
     # Map session_id -> remaining seconds (None if no limit)
-    inprogress_remaining = {}
-    for row in inprogress_rows:
-        sid = row['session_id']
-        qs_row = next((s for s in sessions_list if s['id'] == sid), None)
-        if qs_row:
-            rem = get_remaining_seconds(row, qs_row['time_limit_minutes'] or 0)
-            inprogress_remaining[sid] = rem  # None = no limit, int = seconds left
+    active_ids = {s['id'] for s in sessions_list}
+    inprogress_remaining = {
+        r['session_id']: r['remaining_seconds']   # None = no limit, int = seconds left
+        for r in inprogress_rows if r['session_id'] in active_ids
+    }
     close_db(conn)
     # Build scheduled_start map for frontend (seconds until start, or 0 if past)
-    now = now_eat()
     scheduled_info = {}
     _DAYS   = ['Mon','Tue','Wed','Thu','Fri','Sat','Sun']
     _MONTHS = ['Jan','Feb','Mar','Apr','May','Jun','Jul','Aug','Sep','Oct','Nov','Dec']
     for s in sessions_list:
         if s['scheduled_start']:
             sched = coerce_dt(s['scheduled_start'])
-            diff  = int((sched - now).total_seconds())
+            diff  = s['seconds_until']
+            if diff > 0:
+                diff += unlock_jitter(session['user_id'], s['id'])
             # Human readable: "Sat 14 Mar 2026, 1:18 PM"
             hour   = sched.hour % 12 or 12
             ampm   = 'AM' if sched.hour < 12 else 'PM'
@@ -546,6 +2768,25 @@ def quiz_home():
 @login_required
 def start_quiz(session_id):
     """Called when the user explicitly clicks 'Let's Go' — creates the user_session record (starts the timer)."""
+    # Admission runs before any pool checkout so a burst queues here, not on the DB
+    queued = admit_start(session_id)
+    if queued:
+        wait, position = queued
+        return render_template('queue.html', session_id=session_id,
+                               retry_after=max(1, int(wait + 0.999)), position=position), 202
+
+    # Fast path: a pre-warmed shell only needs started_at stamped
+    is_active, seconds_until = session_open_state(session_id)
+    if is_active and not seconds_until:
+        conn = get_db()
+        if claim_attempt_shell(conn, session['user_id'], session_id):
+            conn.commit()
+            close_db(conn)
+            FRAGMENTS.invalidate(('sessions',), broadcast=False)   # participant count
+            return redirect(url_for('take_quiz', session_id=session_id))
+        conn.rollback()
+        close_db(conn)
+
     conn = get_db()
     real_user = _fetchone(conn, 'SELECT id FROM users WHERE id=%s', (session['user_id'],))
     if not real_user:
@@ -553,7 +2794,10 @@ def start_quiz(session_id):
         flash('Your session has expired. Please log in again.', 'error')
         return redirect(url_for('index'))
 
-    qs = _fetchone(conn, 'SELECT * FROM quiz_sessions WHERE id=%s AND is_active=1', (session_id,))
+    qs = _fetchone(conn,
+        f'SELECT *, {SECONDS_UNTIL_SQL} AS seconds_until FROM quiz_sessions WHERE id=%s AND is_active=1',
+        (session_id,)
+    )
     if not qs:
         flash('Session not found or inactive.', 'error')
         close_db(conn)
@@ -561,24 +2805,33 @@ def start_quiz(session_id):
 
     # Check scheduled start
     if qs['scheduled_start']:
-        sched = coerce_dt(qs['scheduled_start'])
-        if now_eat() < sched:
+        if qs['seconds_until'] > 0:
             flash('This session has not started yet. Please wait until the scheduled time.', 'error')
             close_db(conn)
             return redirect(url_for('quiz_home'))
 
     # Check if already in progress — just resume
     us = _fetchone(conn,
-        'SELECT * FROM user_sessions WHERE user_id=%s AND session_id=%s AND completed_at IS NULL',
+        'SELECT * FROM user_sessions WHERE user_id=%s AND session_id=%s AND completed_at IS NULL '
+        'AND started_at IS NOT NULL',
         (session['user_id'], session_id)
     )
-    if not us:
-        _exec(conn, 'INSERT INTO user_sessions (user_id, session_id) VALUES (%s,%s)',
-                     (session['user_id'], session_id))
+    # A stale session_open_state can skip the fast path; claim the shell here
+    # rather than orphan it beside a second attempt row.
+    if not us and claim_attempt_shell(conn, session['user_id'], session_id):
+        conn.commit()
+        FRAGMENTS.invalidate(('sessions',), broadcast=False)   # participant count
+    elif not us:
+        time_limit = qs['time_limit_minutes'] or 0
+        _exec(conn, f'''
+            INSERT INTO user_sessions (user_id, session_id, deadline_at)
+            VALUES (%s, %s, CASE WHEN %s > 0 THEN {NOW_EAT_SQL} + %s * INTERVAL '1 minute' END)
+        ''', (session['user_id'], session_id, time_limit, time_limit))
         log_action(conn, 'quiz_start', category='user',
                    entity_type='session', entity_id=session_id, entity_name=qs['name'],
                    details=f"{session.get('user_name')} started quiz '{qs['name']}'")
         conn.commit()
+        FRAGMENTS.invalidate(('sessions',), broadcast=False)   # participant count
     close_db(conn)
     return redirect(url_for('take_quiz', session_id=session_id))
 
@@ -604,7 +2857,8 @@ def take_quiz(session_id):
 
     # Get existing user_session — do NOT create one here (that's done in start_quiz)
     us = _fetchone(conn,
-        'SELECT * FROM user_sessions WHERE user_id=%s AND session_id=%s AND completed_at IS NULL',
+        f'SELECT us.*, {REMAINING_SQL} AS remaining_seconds FROM user_sessions us '
+        'WHERE us.user_id=%s AND us.session_id=%s AND us.completed_at IS NULL AND us.started_at IS NOT NULL',
         (session['user_id'], session_id)
     )
     if not us:
@@ -624,31 +2878,48 @@ def take_quiz(session_id):
 
     # ── Timer check ────────────────────────────────────────────────────────
     time_limit = qs['time_limit_minutes'] or 0
-    remaining_seconds = get_remaining_seconds(us, time_limit)
+    remaining_seconds = us['remaining_seconds']
     if remaining_seconds is not None and remaining_seconds <= 0:
-        # Time is up — auto-complete the session
-        _exec(conn, "UPDATE user_sessions SET completed_at=(NOW() AT TIME ZONE 'Africa/Nairobi') WHERE id=%s", (us_id,))
+        # Time is up — auto-complete the session at its deadline
+        _exec(conn, f"UPDATE user_sessions us SET completed_at=us.deadline_at, {FREEZE_TOTALS_SQL} WHERE us.id=%s", (us_id,))
+        refresh_user_scores(conn, [session['user_id']])
+        EXPIRIES_TOTAL.inc('time_on_load')
         conn.commit()
         close_db(conn)
         flash('⏰ Time is up! Your session has been submitted.', 'error')
         return redirect(url_for('results', session_id=session_id))
-    sections = _fetchall(conn,
-        'SELECT * FROM sections WHERE session_id=%s ORDER BY order_num', (session_id,)
-    )
-    all_questions = []
-    for sec in sections:
-        qs_list = _fetchall(conn,
-            'SELECT q.*, %s::text as section_name FROM questions q WHERE q.section_id=%s ORDER BY q.order_num',
-            (sec['name'], sec['id'])
-        )
-        all_questions.extend(qs_list)
-
-    # Randomize per user_session (stable seed so page reloads keep same order)
-    if qs['randomize_questions']:
-        r = random.Random(us_id)
-        r.shuffle(all_questions)
+    client_mode = request.method == 'GET' and request.args.get('client', '1' if QUIZ_CLIENT_MODE else '0') == '1'
+    if client_mode:
+        # Client mode: render only the first unanswered question; quiz.html then
+        # drives /api/quiz/<id>/… and swaps questions in place.
+        order, answered_ids = attempt_progress(conn, qs, us)
+        next_id = next((qid for qid in order if qid not in answered_ids), None)
+        if next_id is None:
+            complete_attempt(conn, qs, us_id, len(answered_ids), len(order))
+            conn.commit()
+            close_db(conn)
+            return redirect(url_for('results', session_id=session_id))
+        next_q = fetch_question(conn, next_id)
+        existing_flags = cheat_flag_count(conn, us_id)
+        close_db(conn)
+        progress = sum(1 for qid in order if qid in answered_ids)
+        return render_template('quiz.html', question=next_q, quiz_session=qs,
+                               progress=progress, total=len(order),
+                               client_mode=True, attempt_id=us_id,
+                               remaining_seconds=remaining_seconds,
+                               time_limit=time_limit,
+                               existing_flags=existing_flags,
+                               quiz_mode=True)
+
+    # Same base order as attempt_progress(), so client mode shuffles identically
+    all_questions = _fetchall_rows(conn, '''
+        SELECT q.*, s.name AS section_name FROM questions q
+        JOIN sections s ON q.section_id = s.id
+        WHERE s.session_id = %s ORDER BY s.order_num, s.id, q.order_num, q.id
+    ''', (session_id,))
+    order_attempt_questions(all_questions, qs, us)
 
-    answered = _fetchall(conn,
+    answered = _fetchall_rows(conn,
         'SELECT * FROM user_answers WHERE user_session_id=%s', (us_id,)
     )
     answered_map = {a['question_id']: a for a in answered}
@@ -658,41 +2929,18 @@ def take_quiz(session_id):
         q_id = int(request.form.get('question_id'))
         if q_id not in answered_ids:
             question = _fetchone(conn, 'SELECT * FROM questions WHERE id=%s', (q_id,))
-            qtype = question['question_type'] or 'single'
-
-            if qtype == 'single':
-                selected_raw = request.form.get('answer', '').strip().upper()
-            elif qtype == 'multi':
-                checked = request.form.getlist('answer')
-                selected_raw = ','.join(sorted(x.upper() for x in checked)) if checked else ''
-            elif qtype == 'fill_blank':
-                bo = json.loads(question['blank_options'] or '[]')
-                parts = [request.form.get(f'blank_{i}', '').strip() for i in range(len(bo))]
-                selected_raw = '|'.join(parts)
-            else:
-                selected_raw = ''
-
+            blanks = [request.form.get(f'blank_{i}', '')
+                      for i in range(len(json.loads(question['blank_options'] or '[]')))]
+            answer = (request.form.getlist('answer') if question['question_type'] == 'multi'
+                      else request.form.get('answer', ''))
+            selected_raw = parse_selection(question, answer, blanks)
             if selected_raw:
-                is_correct, stored_sel, pts_earned = score_answer(question, selected_raw)
-                code = generate_code(session['user_id'], q_id) if is_correct else None
-                _exec(conn,
-                    'INSERT INTO user_answers (user_session_id, question_id, selected_answer, is_correct, points_earned, reward_code) VALUES (%s,%s,%s,%s,%s,%s)',
-                    (us_id, q_id, stored_sel, is_correct, pts_earned, code)
-                )
-                result_label = 'correct' if is_correct else 'wrong'
-                log_action(conn, 'quiz_answer', category='user',
-                           entity_type='question', entity_id=q_id,
-                           entity_name=session.get('user_name'),
-                           details=f"Q#{q_id} answered {result_label} in session #{session_id}")
+                record_answer(conn, qs, us_id, question, selected_raw)
                 conn.commit()
                 answered_ids.add(q_id)
 
         if len(answered_ids) >= len(all_questions):
-            _exec(conn, "UPDATE user_sessions SET completed_at=(NOW() AT TIME ZONE 'Africa/Nairobi') WHERE id=%s", (us_id,))
-            log_action(conn, 'quiz_complete', category='user',
-                       entity_type='session', entity_id=session_id, entity_name=qs['name'],
-                       details=f"{session.get('user_name')} completed '{qs['name']}' "
-                               f"({len(answered_ids)}/{len(all_questions)} answered)")
+            complete_attempt(conn, qs, us_id, len(answered_ids), len(all_questions))
             conn.commit()
             close_db(conn)
             return redirect(url_for('results', session_id=session_id))
@@ -702,17 +2950,13 @@ def take_quiz(session_id):
     # Find next unanswered
     next_q = next((q for q in all_questions if q['id'] not in answered_ids), None)
     if not next_q:
-        _exec(conn, "UPDATE user_sessions SET completed_at=(NOW() AT TIME ZONE 'Africa/Nairobi') WHERE id=%s", (us_id,))
+        _exec(conn, f"UPDATE user_sessions us SET completed_at={NOW_EAT_SQL}, {FREEZE_TOTALS_SQL} WHERE us.id=%s", (us_id,))
+        refresh_user_scores(conn, [session['user_id']])
         conn.commit()
         close_db(conn)
         return redirect(url_for('results', session_id=session_id))
 
-    # Existing cheat flag count — needed by the anti-cheat JS to restore strike state
-    existing_flags_row = _fetchone(conn,
-        'SELECT COUNT(*) as n FROM cheat_flags WHERE user_session_id=%s', (us_id,)
-    )
-    existing_flags = int(existing_flags_row['n']) if existing_flags_row else 0
-
+    existing_flags = cheat_flag_count(conn, us_id)
     close_db(conn)
     return render_template('quiz.html', question=next_q, quiz_session=qs,
                            progress=len(answered_ids), total=len(all_questions),
@@ -728,9 +2972,12 @@ def take_quiz(session_id):
 def expire_quiz(session_id):
     conn = get_db()
     qs_row = _fetchone(conn, 'SELECT name FROM quiz_sessions WHERE id=%s', (session_id,))
-    _exec(conn, "UPDATE user_sessions SET completed_at=(NOW() AT TIME ZONE 'Africa/Nairobi') WHERE user_id=%s AND session_id=%s AND completed_at IS NULL",
+    _exec(conn, f"UPDATE user_sessions us SET completed_at={NOW_EAT_SQL}, {FREEZE_TOTALS_SQL} "
+                "WHERE us.user_id=%s AND us.session_id=%s AND us.completed_at IS NULL AND us.started_at IS NOT NULL",
                  (session['user_id'], session_id))
+    refresh_user_scores(conn, [session['user_id']])
     reason = request.form.get('reason', '')
+    EXPIRIES_TOTAL.inc('cheat' if reason == 'cheat' else 'time')
     action_label = 'quiz_auto_submit_cheat' if reason == 'cheat' else 'quiz_time_expired'
     detail_msg = (f"{session.get('user_name')} auto-submitted '{qs_row['name'] if qs_row else session_id}' "
                   f"— {'integrity violations' if reason == 'cheat' else 'time expired'}")
@@ -750,18 +2997,14 @@ def expire_quiz(session_id):
 def api_session_status(session_id):
     """Returns whether a session is open for starting right now (used by frontend countdown)."""
     from flask import jsonify
-    conn = get_db()
-    qs = _fetchone(conn,
-        'SELECT id, scheduled_start, is_active FROM quiz_sessions WHERE id=%s', (session_id,)
-    )
-    close_db(conn)
-    if not qs or not qs['is_active']:
+    is_active, seconds_until = session_open_state(session_id)
+    if not is_active:
         return jsonify({'open': False, 'reason': 'inactive'})
-    if qs['scheduled_start']:
-        sched = coerce_dt(qs['scheduled_start'])
-        seconds_until = int((sched - now_eat()).total_seconds())
-        if seconds_until > 0:
-            return jsonify({'open': False, 'reason': 'not_yet', 'seconds_until': seconds_until})
+    if seconds_until:
+        # Counts down to this user's jittered unlock, not the shared instant;
+        # once the session has opened there is nothing left to spread out
+        seconds_until += unlock_jitter(session['user_id'], session_id)
+        return jsonify({'open': False, 'reason': 'not_yet', 'seconds_until': seconds_until})
     return jsonify({'open': True})
 
 
@@ -776,7 +3019,7 @@ def cheat_flag(session_id):
     violation = violation if violation in allowed else 'unknown'
     conn = get_db()
     us = _fetchone(conn,
-        'SELECT id FROM user_sessions WHERE user_id=%s AND session_id=%s AND completed_at IS NULL',
+        'SELECT id FROM user_sessions WHERE user_id=%s AND session_id=%s AND completed_at IS NULL AND started_at IS NOT NULL',
         (session['user_id'], session_id)
     )
     if us:
@@ -784,6 +3027,8 @@ def cheat_flag(session_id):
             'INSERT INTO cheat_flags (user_session_id, violation_type) VALUES (%s,%s)',
             (us['id'], violation)
         )
+        refresh_user_scores(conn, [session['user_id']])
+        CHEAT_FLAGS_TOTAL.inc(violation)
         # Count total flags for this session
         count = _fetchone(conn,
             'SELECT COUNT(*) as n FROM cheat_flags WHERE user_session_id=%s', (us['id'],)
@@ -810,43 +3055,54 @@ def results(session_id):
         session.clear()
         flash('Your session has expired. Please log in again.', 'error')
         return redirect(url_for('index'))
+    # Completed attempts contribute their frozen totals; only open attempts
+    # are looked at answer by answer
+    version = _fetchone(conn, f'''
+        SELECT COUNT(*) AS attempts, MAX(us.completed_at) AS last_completed,
+               SUM(us.total_points) AS frozen_points,
+               COALESCE(MAX(live.last_answer), 0) AS live_answer,
+               {ADMIN_EPOCH_SQL} AS admin_epoch
+        FROM user_sessions us
+        LEFT JOIN LATERAL (
+            SELECT MAX(ua.id) AS last_answer FROM user_answers ua
+            WHERE ua.user_session_id = us.id AND us.completed_at IS NULL
+        ) live ON true
+        WHERE us.user_id = %s AND us.started_at IS NOT NULL
+    ''', (session['user_id'],))
+    cached = not_modified(*version.values())
+    if cached:
+        close_db(conn)
+        return cached
     if session_id:
         us = _fetchone(conn, '''
             SELECT us.*, qs.name as session_name
             FROM user_sessions us JOIN quiz_sessions qs ON us.session_id=qs.id
-            WHERE us.user_id=%s AND us.session_id=%s
+            WHERE us.user_id=%s AND us.session_id=%s AND us.started_at IS NOT NULL
             ORDER BY us.started_at DESC LIMIT 1
         ''', (session['user_id'], session_id))
         if not us:
             close_db(conn)
             return redirect(url_for('quiz_home'))
-        answers = _fetchall(conn, '''
-            SELECT ua.*, q.question_text, q.correct_answer, q.option_a, q.option_b, q.option_c, q.option_d,
-                   q.points, q.question_type, s.name as section_name
-            FROM user_answers ua
-            JOIN questions q ON ua.question_id=q.id
-            JOIN sections s ON q.section_id=s.id
-            WHERE ua.user_session_id=%s
-            ORDER BY ua.answered_at
-        ''', (us['id'],))
-        correct = sum(1 for a in answers if a['is_correct'])
-        pts     = sum(float(a['points_earned'] or 0) for a in answers)
+        if us['answered_count'] is not None:
+            answers = completed_attempt_answers(conn, us['id'])
+            correct = us['correct_count']
+            pts     = float(us['total_points'])
+        else:
+            answers = attempt_answers(conn, us['id'])
+            correct = sum(1 for a in answers if a['is_correct'])
+            pts     = sum(a['points_earned'] or 0 for a in answers)
         close_db(conn)
         return render_template('results.html', single=True, user_sess=us,
                                answers=answers, correct_count=correct, total_points=pts)
     else:
-        all_sessions = _fetchall(conn, '''
+        all_sessions = _fetchall(conn, f'''
             SELECT us.id, us.started_at, us.completed_at, qs.name as session_name,
-                   COUNT(ua.id) as total_answered,
-                   SUM(CASE WHEN ua.is_correct = 1 THEN 1 ELSE 0 END) as correct_count,
-                   SUM(COALESCE(ua.points_earned, 0)) as total_points,
+                   {ATTEMPT_SCORE_SQL},
                    us.session_id
             FROM user_sessions us
             JOIN quiz_sessions qs ON us.session_id=qs.id
-            LEFT JOIN user_answers ua ON us.id=ua.user_session_id
-            LEFT JOIN questions q ON ua.question_id=q.id
-            WHERE us.user_id=%s
-            GROUP BY us.id, us.started_at, us.completed_at, qs.name, us.session_id
+            {ATTEMPT_LIVE_JOIN_SQL}
+            WHERE us.user_id=%s AND us.started_at IS NOT NULL
             ORDER BY us.started_at DESC
         ''', (session['user_id'],))
         close_db(conn)
@@ -872,20 +3128,224 @@ def api_timer(session_id):
     """Returns the authoritative remaining seconds from the backend."""
     from flask import jsonify
     conn = get_db()
-    qs = _fetchone(conn, 'SELECT time_limit_minutes FROM quiz_sessions WHERE id=%s', (session_id,))
     us = _fetchone(conn,
-        'SELECT * FROM user_sessions WHERE user_id=%s AND session_id=%s AND completed_at IS NULL',
+        f'SELECT {REMAINING_SQL} AS remaining_seconds FROM user_sessions us '
+        'WHERE us.user_id=%s AND us.session_id=%s AND us.completed_at IS NULL AND us.started_at IS NOT NULL',
         (session['user_id'], session_id)
     )
     close_db(conn)
-    if not qs or not us:
+    if not us:
         return jsonify({'remaining': 0, 'expired': True})
-    time_limit = qs['time_limit_minutes'] or 0
-    if not time_limit:
+    remaining = us['remaining_seconds']
+    if remaining is None:
         return jsonify({'remaining': None, 'expired': False})
-    remaining = get_remaining_seconds(us, time_limit)
     return jsonify({'remaining': remaining, 'expired': remaining <= 0})
 
+# ── Quiz API (client mode of quiz.html) ───────────────────────────────────────
+# Stateless: every call re-derives the attempt from the login cookie and the DB,
+# so any worker can serve it and a reload simply resumes.
+
+def _open_attempt(conn, session_id):
+    """Return (quiz_session, open attempt) for the logged-in user; either may be None."""
+    qs = _fetchone(conn,
+        'SELECT id, name, randomize_questions FROM quiz_sessions WHERE id=%s AND is_active=1',
+        (session_id,)
+    )
+    if not qs:
+        return None, None
+    us = _fetchone(conn,
+        f'SELECT us.id, us.question_order, {REMAINING_SQL} AS remaining_seconds FROM user_sessions us '
+        'WHERE us.user_id=%s AND us.session_id=%s AND us.completed_at IS NULL AND us.started_at IS NOT NULL',
+        (session['user_id'], session_id)
+    )
+    return qs, us
+
+@app.route('/api/quiz/<int:session_id>/question')
+@login_required
+def api_quiz_question(session_id):
+    """The next unanswered question plus progress. ?skip=<question_id> returns
+    the one after it, so the client can prefetch while the user answers."""
+    from flask import jsonify
+    conn = get_db()
+    qs, us = _open_attempt(conn, session_id)
+    if not us:
+        close_db(conn)
+        return jsonify({'done': True, 'redirect': url_for('results', session_id=session_id)})
+    remaining = us['remaining_seconds']
+    if remaining is not None and remaining <= 0:
+        close_db(conn)
+        return jsonify({'expired': True, 'remaining': 0})
+    order, answered = attempt_progress(conn, qs, us)
+    skip = request.args.get('skip', type=int)
+    pending = [qid for qid in order if qid not in answered and qid != skip]
+    question = fetch_question(conn, pending[0]) if pending else None
+    close_db(conn)
+    return jsonify({
+        'question':  question_payload(question) if question else None,
+        'progress':  sum(1 for qid in order if qid in answered),
+        'total':     len(order),
+        'remaining': remaining,
+    })
+
+@app.route('/api/quiz/<int:session_id>/answer', methods=['POST'])
+@login_required
+def api_quiz_answer(session_id):
+    """Record one answer from a JSON body {question_id, answer, blanks}.
+    Re-submitting an answered question is a no-op, so retries are safe."""
+    from flask import jsonify
+    data = request.get_json(silent=True) or {}
+    try:
+        q_id = int(data.get('question_id'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'question_id is required'}), 400
+    conn = get_db()
+    qs, us = _open_attempt(conn, session_id)
+    if not us:
+        close_db(conn)
+        return jsonify({'done': True, 'redirect': url_for('results', session_id=session_id)}), 409
+    if us['remaining_seconds'] is not None and us['remaining_seconds'] <= 0:
+        close_db(conn)
+        return jsonify({'expired': True, 'remaining': 0}), 409
+    order, answered = attempt_progress(conn, qs, us)
+    if q_id not in order:
+        close_db(conn)
+        return jsonify({'error': 'Question is not part of this quiz'}), 400
+    if q_id not in answered:
+        question = fetch_question(conn, q_id)
+        selected_raw = parse_selection(question, data.get('answer'), data.get('blanks'))
+        if not selected_raw:
+            close_db(conn)
+            return jsonify({'error': 'No answer given'}), 400
+        record_answer(conn, qs, us['id'], question, selected_raw)
+        answered.add(q_id)
+    progress = sum(1 for qid in order if qid in answered)
+    done = progress >= len(order)
+    if done:
+        complete_attempt(conn, qs, us['id'], progress, len(order))
+    conn.commit()
+    close_db(conn)
+    body = {'done': done, 'progress': progress, 'total': len(order)}
+    if done:
+        body['redirect'] = url_for('results', session_id=session_id)
+    return jsonify(body)
+
+@app.route('/sw.js')
+def service_worker():
+    """Served from the site root so the worker's scope covers the quiz pages."""
+    resp = app.send_static_file('sw.js')
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+ANSWER_BATCH_MAX = 200
+
+@app.route('/api/quiz/<int:session_id>/answers', methods=['POST'])
+@login_required
+def api_quiz_answers(session_id):
+    """Bulk, idempotent answer upload for the offline queue.
+
+    Body: {"answers": [{"key": "<attempt>:<question>", "question_id", "answer", "blanks"}, …]}.
+    Everything is scored and written in one transaction; the unique
+    (attempt, question) index makes replays harmless. Each item comes back
+    as recorded / duplicate / rejected so the client can drop it from its queue.
+    Like take_quiz and the sweeper, nothing is accepted after the deadline."""
+    from flask import jsonify
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({'error': 'expected a JSON object with an "answers" list'}), 400
+    items = body.get('answers') or []
+    if not isinstance(items, list) or len(items) > ANSWER_BATCH_MAX:
+        return jsonify({'error': f'answers must be a list of at most {ANSWER_BATCH_MAX}'}), 400
+    conn = get_db()
+    qs = _fetchone(conn,
+        'SELECT id, name, randomize_questions FROM quiz_sessions WHERE id=%s AND is_active=1',
+        (session_id,)
+    )
+    us = qs and _fetchone(conn, f'''
+        SELECT us.id, us.question_order,
+               us.deadline_at IS NULL OR us.deadline_at > {NOW_EAT_SQL} AS in_time
+        FROM user_sessions us
+        WHERE us.user_id=%s AND us.session_id=%s AND us.completed_at IS NULL AND us.started_at IS NOT NULL
+    ''', (session['user_id'], session_id))
+    if not us or not us['in_time']:
+        close_db(conn)
+        return jsonify({'done': True, 'expired': bool(us),
+                        'redirect': url_for('results', session_id=session_id),
+                        'results': [{'key': i.get('key'), 'status': 'rejected'}
+                                    for i in items if isinstance(i, dict)]}), 409
+
+    order, answered = attempt_progress(conn, qs, us)
+    in_quiz = set(order)
+    wanted  = {}
+    results = []
+    for item in items:
+        try:
+            q_id = int(item.get('question_id'))
+        except (AttributeError, TypeError, ValueError):
+            results.append({'key': item.get('key') if isinstance(item, dict) else None, 'status': 'rejected'})
+            continue
+        key = item.get('key') or f"{us['id']}:{q_id}"
+        if q_id not in in_quiz or key != f"{us['id']}:{q_id}":
+            results.append({'key': key, 'status': 'rejected'})
+        elif q_id in answered or q_id in wanted:
+            results.append({'key': key, 'status': 'duplicate'})
+        else:
+            wanted[q_id] = item
+            results.append({'key': key, 'status': 'pending', 'question_id': q_id})
+
+    rows, audit = [], []
+    if wanted:
+        questions = {q['id']: q for q in _fetchall(conn,
+            'SELECT * FROM questions WHERE id = ANY(%s)', (list(wanted),))}
+        for q_id, item in wanted.items():
+            question = questions[q_id]
+            selected_raw = parse_selection(question, item.get('answer'), item.get('blanks'))
+            if not selected_raw:
+                wanted[q_id] = None
+                continue
+            is_correct, stored_sel, pts_earned = score_answer(question, selected_raw)
+            code = make_reward_code(us['id'], q_id) if is_correct else None
+            rows.append((us['id'], q_id, stored_sel, is_correct, pts_earned, code))
+
+    inserted = set()
+    if rows:
+        cur = conn.cursor()
+        inserted = {r['question_id'] for r in psycopg2.extras.execute_values(cur, '''
+            INSERT INTO user_answers (user_session_id, question_id, selected_answer, is_correct, points_earned, reward_code)
+            VALUES %s ON CONFLICT DO NOTHING RETURNING question_id
+        ''', rows, fetch=True)}
+        ip = request.remote_addr
+        for _, q_id, _, is_correct, _, _ in rows:
+            if q_id not in inserted:
+                continue
+            ANSWERS_TOTAL.inc('correct' if is_correct else 'wrong')
+            result_label = 'correct' if is_correct else 'wrong'
+            audit.append(('quiz_answer', 'user', 'question', q_id, session.get('user_name'),
+                          f"Q#{q_id} answered {result_label} in session #{session_id} (queued)", ip))
+        if audit:
+            psycopg2.extras.execute_values(cur, '''
+                INSERT INTO audit_logs (action, category, entity_type, entity_id, entity_name, details, ip_address)
+                VALUES %s
+            ''', audit)
+        cur.close()
+
+    for r in results:
+        if r['status'] != 'pending':
+            continue
+        q_id = r.pop('question_id')
+        r['status'] = ('recorded' if q_id in inserted
+                       else 'rejected' if wanted.get(q_id) is None else 'duplicate')
+    answered |= inserted
+    progress = sum(1 for qid in order if qid in answered)
+    done = progress >= len(order)
+    if done:
+        complete_attempt(conn, qs, us['id'], progress, len(order))
+    conn.commit()
+    close_db(conn)
+    body = {'results': results, 'done': done, 'progress': progress, 'total': len(order)}
+    if done:
+        body['redirect'] = url_for('results', session_id=session_id)
+    return jsonify(body)
+
 # ═══════════════════════════════════════════════════════════════════════════════
 #  ADMIN ROUTES
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -935,7 +3395,7 @@ def admin_dashboard():
                SUM(COALESCE(ua.points_earned, 0)) as total_points,
                SUM(CASE WHEN ua.is_correct = 1 THEN 1 ELSE 0 END) as correct_count
         FROM users u
-        LEFT JOIN user_sessions us ON u.id=us.user_id
+        LEFT JOIN user_sessions us ON u.id=us.user_id AND us.started_at IS NOT NULL
         LEFT JOIN user_answers ua ON us.id=ua.user_session_id
         LEFT JOIN questions q ON ua.question_id=q.id
         GROUP BY u.id, u.name, u.phone ORDER BY total_points DESC LIMIT 15
@@ -987,6 +3447,7 @@ def admin_sessions():
                        entity_id=int(sid), entity_name=row['name'] if row else None,
                        details=f"Deleted session '{row['name'] if row else sid}'")
             conn.commit(); flash('Session deleted.', 'success')
+            FRAGMENTS.invalidate(('sections', int(sid)), ('questions',), conn=conn)
         elif action == 'edit':
             sid = request.form['sid']
             sched_val = parse_scheduled_start(request.form.get('scheduled_start', ''))
@@ -998,8 +3459,19 @@ def admin_sessions():
                        entity_id=int(sid), entity_name=request.form['name'],
                        details=f"Edited session '{request.form['name']}'")
             conn.commit(); flash('Session updated!', 'success')
-
-    sessions_list = _fetchall(conn, '''
+        elif action == 'prewarm':
+            sid = int(request.form['sid'])
+            row = _fetchone(conn, 'SELECT name FROM quiz_sessions WHERE id=%s', (sid,))
+            created = prewarm_attempts(conn, sid)
+            log_action(conn, 'prewarm_attempts', entity_type='session',
+                       entity_id=sid, entity_name=row['name'] if row else None,
+                       details=f"Pre-created {created} attempts")
+            conn.commit(); flash(f'Pre-warmed {created} attempts.', 'success')
+        invalidate_session_status(conn=conn)
+        FRAGMENTS.invalidate(('sessions',), conn=conn)
+
+    def load_sessions():
+        return dict(sessions=_fetchall(conn, '''
         SELECT qs.id, qs.name, qs.description, qs.is_active, qs.randomize_questions,
                qs.time_limit_minutes, qs.scheduled_start, qs.created_at,
                COUNT(DISTINCT s.id)       as section_count,
@@ -1008,13 +3480,14 @@ def admin_sessions():
         FROM quiz_sessions qs
         LEFT JOIN sections s ON qs.id=s.session_id
         LEFT JOIN questions q ON s.id=q.section_id
-        LEFT JOIN user_sessions us ON qs.id=us.session_id
+        LEFT JOIN user_sessions us ON qs.id=us.session_id AND us.started_at IS NOT NULL
         GROUP BY qs.id, qs.name, qs.description, qs.is_active, qs.randomize_questions,
                  qs.time_limit_minutes, qs.scheduled_start, qs.created_at
         ORDER BY qs.created_at DESC
-    ''')
+    '''))
+    sessions_html = render_fragment(('sessions',), 'admin/_sessions_list.html', load_sessions, conn)
     close_db(conn)
-    return render_template('admin/sessions.html', sessions=sessions_list)
+    return render_template('admin/sessions.html', sessions_html=sessions_html)
 
 # Sections CRUD
 @app.route('/admin/sessions/<int:session_id>/sections', methods=['GET', 'POST'])
@@ -1031,6 +3504,7 @@ def admin_sections(session_id):
                        entity_name=request.form['name'],
                        details=f"Created section '{request.form['name']}' in session #{session_id} ({qs['name'] if qs else ''})")
             conn.commit(); flash('Section created!', 'success')
+            FRAGMENTS.invalidate(('sections', session_id), ('sessions',), conn=conn)
         elif action == 'delete':
             sec_id = request.form['sec_id']
             row = _fetchone(conn, 'SELECT name FROM sections WHERE id=%s', (sec_id,))
@@ -1039,6 +3513,8 @@ def admin_sections(session_id):
                        entity_id=int(sec_id), entity_name=row['name'] if row else None,
                        details=f"Deleted section from session '{qs['name'] if qs else session_id}'")
             conn.commit()
+            FRAGMENTS.invalidate(('sections', session_id), ('questions', int(sec_id)), ('sessions',), conn=conn)
+            invalidate_question_counts(conn=conn)
         elif action == 'edit':
             sec_id = request.form['sec_id']
             _exec(conn, 'UPDATE sections SET name=%s, order_num=%s WHERE id=%s',
@@ -1047,16 +3523,45 @@ def admin_sections(session_id):
                        entity_id=int(sec_id), entity_name=request.form['name'],
                        details=f"Edited section in session '{qs['name'] if qs else session_id}'")
             conn.commit(); flash('Section updated!', 'success')
-
-    sections_list = _fetchall(conn, '''
-        SELECT s.id, s.session_id, s.name, s.order_num, COUNT(q.id) as question_count
-        FROM sections s LEFT JOIN questions q ON s.id=q.section_id
-        WHERE s.session_id=%s
-        GROUP BY s.id, s.session_id, s.name, s.order_num
-        ORDER BY s.order_num
-    ''', (session_id,))
+            FRAGMENTS.invalidate(('sections', session_id), conn=conn)
+            invalidate_attempt_detail(conn=conn)
+        elif action == 'import':
+            upload = request.files.get('bank')
+            try:
+                rows = read_question_bank(upload.filename, upload.read()) if upload else []
+            except Exception as e:
+                rows = None
+                flash(f'Could not read file: {e}', 'error')
+            if rows is not None:
+                clean, errors = validate_question_bank(rows)
+                if errors:
+                    more = f' (+{len(errors) - 5} more)' if len(errors) > 5 else ''
+                    flash('Import rejected — ' + '; '.join(errors[:5]) + more, 'error')
+                elif not clean:
+                    flash('No questions found in the file.', 'error')
+                else:
+                    n_secs, n_qs = import_question_bank(conn, session_id, clean)
+                    log_action(conn, 'import_questions', entity_type='session',
+                               entity_id=session_id, entity_name=qs['name'] if qs else None,
+                               details=f"Imported {n_qs} questions ({n_secs} new sections) "
+                                       f"from '{upload.filename}'")
+                    conn.commit()
+                    FRAGMENTS.invalidate(('sections', session_id), ('questions',), ('sessions',), conn=conn)
+                    invalidate_question_counts(conn=conn)
+                    flash(f'Imported {n_qs} questions into {qs["name"] if qs else session_id} '
+                          f'({n_secs} new sections).', 'success')
+
+    def load_sections():
+        return dict(sections=_fetchall(conn, '''
+            SELECT s.id, s.session_id, s.name, s.order_num, COUNT(q.id) as question_count
+            FROM sections s LEFT JOIN questions q ON s.id=q.section_id
+            WHERE s.session_id=%s
+            GROUP BY s.id, s.session_id, s.name, s.order_num
+            ORDER BY s.order_num, s.id
+        ''', (session_id,)))
+    sections_html = render_fragment(('sections', session_id), 'admin/_sections_list.html', load_sections, conn)
     close_db(conn)
-    return render_template('admin/sections.html', quiz_session=qs, sections=sections_list)
+    return render_template('admin/sections.html', quiz_session=qs, sections_html=sections_html)
 
 # Questions CRUD
 @app.route('/admin/sections/<int:section_id>/questions', methods=['GET', 'POST'])
@@ -1124,20 +3629,24 @@ def admin_questions(section_id):
                 correct = request.form.get('correct_answer', '').upper()
                 bo_json = '[]'
 
-            _exec(conn, '''
+            cur = _exec(conn, '''
                 INSERT INTO questions (section_id, question_type, question_text,
                     option_a, option_b, option_c, option_d,
                     correct_answer, blank_options, points, order_num)
                 VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+                RETURNING question_type, correct_answer, points
             ''', (section_id, qtype, request.form['question_text'],
                   request.form.get('option_a',''), request.form.get('option_b',''),
                   request.form.get('option_c',''), request.form.get('option_d',''),
                   correct, bo_json,
                   request.form.get('points', 1), request.form.get('order_num', 0)))
+            answer_key(cur.fetchone())   # compile the key now, not on the first answer
             log_action(conn, 'create_question', entity_type='question',
                        entity_name=request.form['question_text'][:80],
                        details=f"Added {qtype} question to section '{sec['name'] if sec else section_id}'")
             conn.commit(); flash('Question added!', 'success')
+            FRAGMENTS.invalidate(('questions', section_id), ('sections', sec['session_id']), ('sessions',), conn=conn)
+            invalidate_question_counts(conn=conn)
 
         elif action == 'delete':
             q_id_del = request.form['q_id']
@@ -1148,10 +3657,14 @@ def admin_questions(section_id):
                        entity_name=qrow['question_text'][:80] if qrow else None,
                        details=f"Deleted from section '{sec['name'] if sec else section_id}'")
             conn.commit()
+            FRAGMENTS.invalidate(('questions', section_id), ('sections', sec['session_id']), ('sessions',), conn=conn)
+            invalidate_question_counts(conn=conn)
 
         elif action == 'edit':
             q_id_edit = request.form['q_id']
             qtype_edit = request.form.get('question_type', 'single')
+            before = _fetchone(conn,
+                'SELECT question_type, correct_answer, points FROM questions WHERE id=%s', (q_id_edit,))
             if qtype_edit == 'fill_blank':
                 bo = []
                 i = 0
@@ -1173,94 +3686,295 @@ def admin_questions(section_id):
                 correct_edit = request.form.get('correct_answer','').upper()
                 bo_json = '[]'
 
-            _exec(conn, '''
+            cur = _exec(conn, '''
                 UPDATE questions SET question_type=%s, question_text=%s,
                     option_a=%s, option_b=%s, option_c=%s, option_d=%s,
                     correct_answer=%s, blank_options=%s, points=%s, order_num=%s
                 WHERE id=%s
+                RETURNING question_type, correct_answer, points
             ''', (qtype_edit, request.form['question_text'],
                   request.form.get('option_a',''), request.form.get('option_b',''),
                   request.form.get('option_c',''), request.form.get('option_d',''),
                   correct_edit, bo_json,
                   request.form.get('points',1), request.form.get('order_num',0),
                   q_id_edit))
+            row = cur.fetchone()
+            if row:
+                answer_key(row)
             log_action(conn, 'edit_question', entity_type='question',
                        entity_id=int(q_id_edit),
                        entity_name=request.form['question_text'][:80],
                        details=f"Edited {qtype_edit} question in section '{sec['name'] if sec else section_id}'")
             conn.commit(); flash('Question updated!', 'success')
-
-    questions_list = [dict(q) for q in _fetchall(conn,
-        'SELECT * FROM questions WHERE section_id=%s ORDER BY order_num', (section_id,)
-    )]
+            FRAGMENTS.invalidate(('questions', section_id), conn=conn)
+            invalidate_attempt_detail(conn=conn)
+            if row and before and dict(before) != dict(row):
+                stale = _fetchone(conn, 'SELECT COUNT(*) AS n FROM user_answers WHERE question_id=%s',
+                                  (q_id_edit,))['n']
+                if stale:
+                    flash(f'{stale} existing answers were scored against the old answer key — '
+                          f'use ♻ Regrade to update them.', 'error')
+
+        elif action == 'regrade':
+            # One question, or the whole section when no q_id is given
+            if request.form.get('q_id'):
+                q_ids = [int(request.form['q_id'])]
+            else:
+                q_ids = [r['id'] for r in _fetchall(conn,
+                    'SELECT id FROM questions WHERE section_id=%s', (section_id,))]
+            report = regrade_questions(conn, q_ids)
+            summary = regrade_summary(report)
+            log_action(conn, 'regrade_questions', entity_type='section',
+                       entity_id=section_id, entity_name=sec['name'] if sec else None,
+                       details=summary)
+            conn.commit()
+            invalidate_attempt_detail(report['attempt_ids'], conn=conn)
+            flash(summary + '.', 'success')
+
+    def load_questions():
+        return dict(questions=[dict(q) for q in _fetchall(conn,
+            'SELECT * FROM questions WHERE section_id=%s ORDER BY order_num, id', (section_id,)
+        )])
+    questions_html = render_fragment(('questions', section_id), 'admin/_questions_list.html', load_questions, conn)
     close_db(conn)
-    return render_template('admin/questions.html', section=sec, questions=questions_list)
+    return render_template('admin/questions.html', section=sec, questions_html=questions_html)
 
 # Users & scores
+# Keyset-paginated over the users score summary. Each sort is an index order;
+# the `after` cursor carries the last row's sort key and id (plus how many
+# rows came before, for the rank column), so page N costs the same as page 1.
+
+USERS_PAGE_SIZE = int(os.environ.get('USERS_PAGE_SIZE', '50'))
+USER_SORTS = {   # name -> (key columns, descending?)
+    'points': (('u.score_points', 'u.id'), True),
+    'name':   (('lower(u.name)', 'u.id'), False),
+    'joined': (('u.id',), True),
+}
+
+def _pg_int(value):
+    return type(value) is int and -2**31 <= value < 2**31
+
+def _numeric_text(value):
+    from decimal import Decimal, InvalidOperation
+    try:
+        return isinstance(value, str) and Decimal(value).is_finite()
+    except InvalidOperation:
+        return False
+
+# What a keyset cursor may hold for each sort key column
+USER_SORT_KEY_CHECKS = {
+    'u.score_points': _numeric_text,
+    'u.id':           _pg_int,
+    'lower(u.name)':  lambda v: isinstance(v, str) and '\x00' not in v,
+}
+
+def parse_users_cursor(raw, keys):
+    """The `after` cursor of the users list — the last row's key values, then
+    the rank reached — or None when it is absent or does not fit `keys`."""
+    try:
+        after = json.loads(raw) if raw else None
+    except (ValueError, RecursionError):
+        return None
+    if not isinstance(after, list) or len(after) != len(keys) + 1:
+        return None
+    if not all(USER_SORT_KEY_CHECKS[k](v) for k, v in zip(keys, after)):
+        return None
+    if not (_pg_int(after[-1]) and after[-1] >= 0):
+        return None
+    return after
+
+def _like_prefix(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+def users_filter_sql(args):
+    """WHERE clause, params and the normalised filter values for the users
+    list from request args: q (name prefix, or phone prefix when it has
+    digits), min_points and flagged."""
+    q          = (args.get('q') or '').strip()
+    min_points = args.get('min_points', type=float)
+    flagged    = args.get('flagged') == '1'
+    clauses, params = [], []
+    if q and any(c.isdigit() for c in q):
+        digits = ''.join(c for c in q if c.isdigit())
+        prefix = ('+254' + digits[1:] if digits.startswith('0')
+                  else '+' + digits if digits.startswith('254') else '+254' + digits)
+        clauses.append('u.phone LIKE %s'); params.append(prefix + '%')
+    elif q:
+        clauses.append('lower(u.name) LIKE %s'); params.append(_like_prefix(q.lower()))
+    if min_points is not None:
+        clauses.append('u.score_points >= %s'); params.append(min_points)
+    if flagged:
+        clauses.append('u.flag_count > 0')
+    where = ('WHERE ' + ' AND '.join(clauses)) if clauses else ''
+    return where, params, dict(q=q, min_points=min_points, flagged=flagged)
+
+USERS_LIST_COLUMNS = '''u.id, u.name, u.phone, u.created_at,
+       u.score_sessions AS sessions_taken, u.score_answered AS total_answered,
+       u.score_correct AS correct_count, u.score_points AS total_points,
+       u.flag_count AS cheat_count'''
+
 @app.route('/admin/users')
 @admin_required
 def admin_users():
+    sort = request.args.get('sort') if request.args.get('sort') in USER_SORTS else 'points'
+    keys, desc = USER_SORTS[sort]
+    where, params, filters = users_filter_sql(request.args)
+    after = parse_users_cursor(request.args.get('after'), keys)
+
     conn = get_db()
-    users = _fetchall(conn, '''
-        SELECT u.id, u.name, u.phone, u.created_at,
-               COUNT(DISTINCT us.session_id) as sessions_taken,
-               SUM(COALESCE(ua.points_earned, 0)) as total_points,
-               SUM(CASE WHEN ua.is_correct = 1 THEN 1 ELSE 0 END) as correct_count,
-               COUNT(ua.id) as total_answered,
-               (SELECT COUNT(*) FROM cheat_flags cf
-                JOIN user_sessions us2 ON cf.user_session_id=us2.id
-                WHERE us2.user_id=u.id) as cheat_count
-        FROM users u
-        LEFT JOIN user_sessions us ON u.id=us.user_id
-        LEFT JOIN user_answers ua ON us.id=ua.user_session_id
-        LEFT JOIN questions q ON ua.question_id=q.id
-        GROUP BY u.id, u.name, u.phone, u.created_at
-        ORDER BY total_points DESC NULLS LAST
+    version = _fetchone(conn, f'''
+        SELECT COUNT(*) AS users, COALESCE(MAX(id), 0) AS last_user,
+               COALESCE(SUM(score_points), 0) AS points, COALESCE(SUM(score_answered), 0) AS answered,
+               COALESCE(SUM(flag_count), 0) AS flags,
+               {ADMIN_EPOCH_SQL} AS admin_epoch
+        FROM users
     ''')
+    cached = not_modified(*version.values())
+    if cached:
+        close_db(conn)
+        return cached
+    total = _fetchone(conn, f'SELECT COUNT(*) AS n FROM users u {where}', params)['n']
+    page_where, page_params = where, list(params)
+    if after:
+        op = '<' if desc else '>'
+        cond = f"({', '.join(keys)}) {op} ({', '.join(['%s'] * len(keys))})"
+        page_where = (where + ' AND ' if where else 'WHERE ') + cond
+        page_params += after[:-1]
+    order = ', '.join(f"{k} DESC" if desc else k for k in keys)
+    users = _fetchall(conn, f'''
+        SELECT {USERS_LIST_COLUMNS}, lower(u.name) AS name_key
+        FROM users u {page_where}
+        ORDER BY {order}
+        LIMIT %s
+    ''', page_params + [USERS_PAGE_SIZE + 1])
     close_db(conn)
-    return render_template('admin/users.html', users=users)
+
+    rank_start = (after[-1] if after else 0) + 1
+    next_after = None
+    if len(users) > USERS_PAGE_SIZE:
+        users = users[:USERS_PAGE_SIZE]
+        last  = users[-1]
+        key_values = {'u.score_points': str(last['total_points']), 'u.id': last['id'],
+                      'lower(u.name)': last['name_key']}
+        next_after = json.dumps([key_values[k] for k in keys] + [rank_start - 1 + len(users)])
+    query_args = {k: v for k, v in (('sort', sort), ('q', filters['q']),
+                                    ('min_points', filters['min_points']),
+                                    ('flagged', '1' if filters['flagged'] else None))
+                  if v not in (None, '')}
+    return render_template('admin/users.html', users=users, total=total, sort=sort,
+                           filters=filters, query_args=query_args, rank_start=rank_start,
+                           next_after=next_after, is_first_page=after is None)
+
+
+@app.route('/admin/users/export.csv')
+@admin_required
+def export_users_csv():
+    """Stream the whole (filtered, sorted) users list as CSV through a
+    server-side cursor, so memory stays flat however many users there are."""
+    import csv, io
+    from flask import Response, stream_with_context
+    sort = request.args.get('sort') if request.args.get('sort') in USER_SORTS else 'points'
+    keys, desc = USER_SORTS[sort]
+    where, params, _ = users_filter_sql(request.args)
+    order = ', '.join(f"{k} DESC" if desc else k for k in keys)
+    sql = f'SELECT {USERS_LIST_COLUMNS} FROM users u {where} ORDER BY {order}'
+
+    def cell(value):
+        # Keep spreadsheet apps from evaluating participant-entered names
+        text = '' if value is None else str(value)
+        return "'" + text if text[:1] in ('=', '+', '-', '@') else text
+
+    def generate():
+        conn = get_db()
+        try:
+            cur = conn.cursor(name='users_export')
+            cur.itersize = 2000
+            cur.execute(sql, params)
+            buf = io.StringIO()
+            out = csv.writer(buf)
+            out.writerow(['Rank', 'Name', 'Phone', 'Joined', 'Sessions', 'Answered',
+                          'Correct', 'Points', 'Integrity Flags'])
+            for rank, r in enumerate(cur, start=1):
+                out.writerow([rank, cell(r['name']), r['phone'], str(r['created_at'] or '')[:16],
+                              r['sessions_taken'], r['total_answered'], r['correct_count'],
+                              r['total_points'], r['cheat_count']])
+                if buf.tell() > 65536:
+                    yield buf.getvalue()
+                    buf.seek(0); buf.truncate()
+            yield buf.getvalue()
+            cur.close()
+        finally:
+            close_db(conn)
+
+    stamp = datetime.now(EAT).strftime('%Y%m%d_%H%M')
+    return Response(stream_with_context(generate()), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename="users_{stamp}.csv"'})
+
+USER_DETAIL_PAGE_SIZE = int(os.environ.get('USER_DETAIL_PAGE_SIZE', '20'))
 
 @app.route('/admin/users/<int:user_id>')
 @admin_required
 def admin_user_detail(user_id):
     conn = get_db()
-    user = _fetchone(conn, 'SELECT * FROM users WHERE id=%s', (user_id,))
-    sessions_data = _fetchall(conn, '''
-        SELECT us.id, us.user_id, us.session_id, us.started_at, us.completed_at,
-               qs.name as session_name,
-               COUNT(ua.id) as total_answered,
-               SUM(CASE WHEN ua.is_correct = 1 THEN 1 ELSE 0 END) as correct_count,
-               SUM(COALESCE(ua.points_earned, 0)) as total_points,
-               (SELECT COUNT(*) FROM questions qq JOIN sections ss ON qq.section_id=ss.id WHERE ss.session_id=qs.id) as total_questions
-        FROM user_sessions us JOIN quiz_sessions qs ON us.session_id=qs.id
-        LEFT JOIN user_answers ua ON us.id=ua.user_session_id
-        LEFT JOIN questions q ON ua.question_id=q.id
-        WHERE us.user_id=%s
-        GROUP BY us.id, us.user_id, us.session_id, us.started_at, us.completed_at, qs.id, qs.name
-        ORDER BY us.started_at DESC
-    ''', (user_id,))
-    codes = _fetchall(conn, '''
-        SELECT ua.reward_code, ua.answered_at, q.question_text, qs.name as session_name
-        FROM user_answers ua
-        JOIN questions q ON ua.question_id=q.id
-        JOIN sections s ON q.section_id=s.id
-        JOIN quiz_sessions qs ON s.session_id=qs.id
-        JOIN user_sessions us ON ua.user_session_id=us.id
-        WHERE us.user_id=%s AND ua.is_correct=1
-        ORDER BY ua.answered_at DESC
-    ''', (user_id,))
-    # Cheat flags
-    cheat_flags = _fetchall(conn, '''
-        SELECT cf.violation_type, cf.flagged_at, qs.name as session_name
-        FROM cheat_flags cf
-        JOIN user_sessions us ON cf.user_session_id=us.id
-        JOIN quiz_sessions qs ON us.session_id=qs.id
-        WHERE us.user_id=%s
-        ORDER BY cf.flagged_at DESC LIMIT 50
+    user = _fetchone(conn, f'''
+        SELECT u.*, t.attempts, t.total_points, t.correct_count, t.flags
+        FROM users u
+        CROSS JOIN LATERAL (
+            SELECT COUNT(*) AS attempts,
+                   COALESCE(SUM(COALESCE(us.total_points, live.points)), 0) AS total_points,
+                   COALESCE(SUM(COALESCE(us.correct_count, live.correct)), 0) AS correct_count,
+                   (SELECT COUNT(*) FROM cheat_flags cf JOIN user_sessions x ON cf.user_session_id = x.id
+                    WHERE x.user_id = u.id AND x.started_at IS NOT NULL) AS flags
+            FROM user_sessions us
+            {ATTEMPT_LIVE_JOIN_SQL}
+            WHERE us.user_id = u.id AND us.started_at IS NOT NULL
+        ) t
+        WHERE u.id = %s
     ''', (user_id,))
+    if not user:
+        close_db(conn)
+        flash('User not found.', 'error')
+        return redirect(url_for('admin_users'))
+    per_page    = USER_DETAIL_PAGE_SIZE
+    total_pages = max(1, (user['attempts'] + per_page - 1) // per_page)
+    page        = min(max(1, request.args.get('page', 1, type=int)), total_pages)
+    # One page of attempts with their reward codes and flags folded in
+    sessions_data = _fetchall(conn, f'''
+        WITH page AS (
+            SELECT us.id, us.session_id, us.started_at, us.completed_at, qs.name AS session_name,
+                   {ATTEMPT_SCORE_SQL}
+            FROM user_sessions us
+            JOIN quiz_sessions qs ON us.session_id = qs.id
+            {ATTEMPT_LIVE_JOIN_SQL}
+            WHERE us.user_id = %s AND us.started_at IS NOT NULL
+            ORDER BY us.started_at DESC, us.id DESC
+            LIMIT %s OFFSET %s
+        )
+        SELECT p.*,
+               (SELECT json_agg(json_build_object(
+                           'reward_code', ua.reward_code, 'question_text', q.question_text,
+                           'answered_at', to_char(ua.answered_at, 'YYYY-MM-DD HH24:MI:SS'))
+                       ORDER BY ua.answered_at DESC)
+                FROM user_answers ua JOIN questions q ON ua.question_id = q.id
+                WHERE ua.user_session_id = p.id AND ua.is_correct = 1) AS codes,
+               (SELECT json_agg(json_build_object(
+                           'violation_type', cf.violation_type,
+                           'flagged_at', to_char(cf.flagged_at, 'YYYY-MM-DD HH24:MI:SS'))
+                       ORDER BY cf.flagged_at DESC)
+                FROM cheat_flags cf WHERE cf.user_session_id = p.id) AS flags
+        FROM page p
+        ORDER BY p.started_at DESC, p.id DESC
+    ''', (user_id, per_page, (page - 1) * per_page))
+    question_counts = session_question_counts(conn)
     close_db(conn)
+    codes, cheat_flags = [], []
+    for s in sessions_data:
+        s['total_questions'] = question_counts.get(s['session_id'])
+        codes       += [dict(c, session_name=s['session_name']) for c in s.pop('codes') or []]
+        cheat_flags += [dict(f, session_name=s['session_name']) for f in s.pop('flags') or []]
     return render_template('admin/user_detail.html', user=user, sessions_data=sessions_data,
-                           codes=codes, cheat_flags=cheat_flags)
+                           codes=codes, cheat_flags=cheat_flags,
+                           page=page, per_page=per_page, total_pages=total_pages)
 
 @app.route('/admin/performance')
 @admin_required
@@ -1276,6 +3990,28 @@ def admin_performance():
     if not session_id and all_sessions:
         session_id = all_sessions[0]['id']
 
+    if session_id:
+        version = _fetchone(conn, f'''
+            SELECT COUNT(us.id) AS attempts, COUNT(us.completed_at) AS completed,
+                   (SELECT COUNT(*) FROM user_answers ua JOIN user_sessions x ON ua.user_session_id = x.id
+                    WHERE x.session_id = %s)                   AS answers,
+                   (SELECT COALESCE(MAX(ua.id), 0) FROM user_answers ua JOIN user_sessions x ON ua.user_session_id = x.id
+                    WHERE x.session_id = %s)                   AS last_answer,
+                   (SELECT COUNT(*) FROM cheat_flags cf JOIN user_sessions x ON cf.user_session_id = x.id
+                    WHERE x.session_id = %s)                   AS flags,
+                   (SELECT value FROM app_settings WHERE key = %s) AS reset_job,
+                   {ADMIN_EPOCH_SQL}                           AS admin_epoch
+            FROM user_sessions us
+            WHERE us.session_id = %s AND us.started_at IS NOT NULL
+        ''', (session_id, session_id, session_id, _reset_job_key(session_id), session_id))
+        # The stored value doesn't change when a reset goes stale, so the
+        # decoded state is part of the validator too
+        reset_state = (parse_reset_progress(version['reset_job']) or {}).get('state')
+        cached = not_modified(session_id, reset_state, *version.values())
+        if cached:
+            close_db(conn)
+            return cached
+
     perf = None
     q_stats = []
     section_stats = []
@@ -1297,7 +4033,7 @@ def admin_performance():
                              FROM user_answers ua2 JOIN questions q2 ON ua2.question_id=q2.id
                              WHERE ua2.user_session_id=us.id) END) as avg_score
             FROM quiz_sessions qs
-            LEFT JOIN user_sessions us ON qs.id=us.session_id
+            LEFT JOIN user_sessions us ON qs.id=us.session_id AND us.started_at IS NOT NULL
             LEFT JOIN user_answers ua  ON us.id=ua.user_session_id
             LEFT JOIN sections s       ON s.session_id=qs.id
             LEFT JOIN questions q      ON q.section_id=s.id AND q.id IS NOT NULL
@@ -1356,7 +4092,7 @@ def admin_performance():
             JOIN users u ON us.user_id=u.id
             LEFT JOIN user_answers ua ON ua.user_session_id=us.id
             LEFT JOIN questions q     ON ua.question_id=q.id
-            WHERE us.session_id=%s
+            WHERE us.session_id=%s AND us.started_at IS NOT NULL
             GROUP BY us.id, u.id, u.name, u.phone, us.completed_at, us.started_at
             ORDER BY points DESC, correct DESC
         ''', (session_id,))
@@ -1380,6 +4116,7 @@ def admin_performance():
             else:          buckets['81–100'] += 1
         score_dist = buckets
 
+    reset_progress = get_reset_progress(conn, session_id) if session_id else None
     close_db(conn)
     return render_template('admin/performance.html',
                            all_sessions=all_sessions,
@@ -1388,7 +4125,8 @@ def admin_performance():
                            q_stats=q_stats,
                            section_stats=section_stats,
                            top_users=top_users,
-                           score_dist=score_dist)
+                           score_dist=score_dist,
+                           reset_progress=reset_progress)
 
 
 @app.route('/admin/performance/export')
@@ -1478,7 +4216,7 @@ def export_performance():
             JOIN users u ON us.user_id=u.id
             LEFT JOIN user_answers ua ON ua.user_session_id=us.id
             LEFT JOIN questions q     ON ua.question_id=q.id
-            WHERE us.session_id=%s
+            WHERE us.session_id=%s AND us.started_at IS NOT NULL
             GROUP BY us.id, u.name, u.phone, us.started_at, us.completed_at
             ORDER BY total_points DESC
         ''', (session_id,))
@@ -1691,7 +4429,7 @@ def export_session_full(session_id):
              WHERE s2.session_id=%s)                                       as question_count
         FROM user_sessions us
         LEFT JOIN user_answers ua ON ua.user_session_id=us.id
-        WHERE us.session_id=%s
+        WHERE us.session_id=%s AND us.started_at IS NOT NULL
     ''', (session_id, session_id, session_id))
 
     stat_details = [
@@ -1719,7 +4457,7 @@ def export_session_full(session_id):
     ws2.append(q_headers)
     hrow(ws2, 1, len(q_headers))
 
-    questions = _fetchall(conn, '''
+    questions = _fetchall_rows(conn, '''
         SELECT q.*, sec.name as section_name, sec.order_num as sec_order,
                COUNT(ua.id) as attempts,
                SUM(CASE WHEN ua.is_correct = 1 THEN 1 ELSE 0 END) as correct_count,
@@ -1782,7 +4520,7 @@ def export_session_full(session_id):
     ws3.append(r_headers)
     hrow(ws3, 1, len(r_headers), fill=HDR_AMBER)
 
-    detail = _fetchall(conn, '''
+    detail = _fetchall_rows(conn, '''
         SELECT u.name, u.phone,
                sec.name  as section_name,
                q.question_text, q.question_type,
@@ -1873,7 +4611,7 @@ def export_session_full(session_id):
         JOIN users u ON us.user_id = u.id
         LEFT JOIN user_answers ua ON ua.user_session_id = us.id
         LEFT JOIN questions q     ON ua.question_id = q.id
-        WHERE us.session_id = %s
+        WHERE us.session_id = %s AND us.started_at IS NOT NULL
         GROUP BY us.id, u.name, u.phone, us.started_at, us.completed_at
         ORDER BY total_points DESC, correct DESC
     ''', (session_id,))
@@ -1930,6 +4668,21 @@ def participant_answers():
 
     conn = get_db()
 
+    version = _fetchone(conn, f'''
+        SELECT COUNT(ua.id) AS answers, COALESCE(MAX(ua.id), 0) AS last_answer,
+               MAX(us.completed_at) AS completed_at,
+               (SELECT COUNT(*) FROM cheat_flags cf JOIN user_sessions x ON cf.user_session_id = x.id
+                WHERE x.session_id = %s AND x.user_id = %s) AS flags,
+               {ADMIN_EPOCH_SQL} AS admin_epoch
+        FROM user_sessions us
+        LEFT JOIN user_answers ua ON ua.user_session_id = us.id
+        WHERE us.session_id = %s AND us.user_id = %s AND us.started_at IS NOT NULL
+    ''', (session_id, user_id, session_id, user_id))
+    cached = not_modified(*version.values())
+    if cached:
+        close_db(conn)
+        return cached
+
     info = _fetchone(conn, '''
         SELECT u.name, u.phone, qs.name as session_name,
                us.started_at, us.completed_at,
@@ -1937,14 +4690,14 @@ def participant_answers():
         FROM user_sessions us
         JOIN users u          ON us.user_id    = u.id
         JOIN quiz_sessions qs ON us.session_id = qs.id
-        WHERE us.session_id = %s AND us.user_id = %s
+        WHERE us.session_id = %s AND us.user_id = %s AND us.started_at IS NOT NULL
     ''', (session_id, user_id))
 
     if not info:
         close_db(conn)
         return jsonify({'error': 'Not found'}), 404
 
-    rows = _fetchall(conn, '''
+    rows = _fetchall_rows(conn, '''
         SELECT
             sec.name       AS section_name,
             sec.order_num  AS sec_order,
@@ -1960,7 +4713,7 @@ def participant_answers():
             ON ua.question_id = q.id
             AND ua.user_session_id = (
                 SELECT id FROM user_sessions
-                WHERE session_id = %s AND user_id = %s LIMIT 1
+                WHERE session_id = %s AND user_id = %s AND started_at IS NOT NULL LIMIT 1
             )
         WHERE sec.session_id = %s
         ORDER BY sec.order_num, q.order_num
@@ -2013,6 +4766,118 @@ def participant_answers():
     })
 
 
+# Resets touching more attempts than this run in the background, in chunks,
+# so a 10k-attempt wipe never holds row locks for the whole operation.
+RESET_CHUNK_THRESHOLD = int(os.environ.get('RESET_CHUNK_THRESHOLD', '2000'))
+# A 'running' reset whose heartbeat is older than this is treated as failed
+# (the worker thread died with its process), so the session can be reset again.
+RESET_STALE_SECONDS   = int(os.environ.get('RESET_STALE_SECONDS', '300'))
+RESET_CHUNK_SIZE      = int(os.environ.get('RESET_CHUNK_SIZE', '500'))
+
+def _reset_attempts(conn, session_id, user_id=None):
+    """Delete every attempt (plus its answers and cheat flags) for a session,
+    optionally limited to one user, as three set-based statements.
+    Returns the number of user_sessions rows removed. Caller commits.
+    """
+    user_sql = ' AND us.user_id=%s' if user_id else ''
+    params   = (session_id, user_id) if user_id else (session_id,)
+    _exec(conn, f'''
+        DELETE FROM cheat_flags cf USING user_sessions us
+        WHERE cf.user_session_id=us.id AND us.session_id=%s{user_sql}
+    ''', params)
+    _exec(conn, f'''
+        DELETE FROM user_answers ua USING user_sessions us
+        WHERE ua.user_session_id=us.id AND us.session_id=%s{user_sql}
+    ''', params)
+    cur = _exec(conn,
+        f'DELETE FROM user_sessions us WHERE us.session_id=%s{user_sql} RETURNING us.user_id', params
+    )
+    users = [r['user_id'] for r in cur.fetchall()]
+    refresh_user_scores(conn, set(users))
+    return len(users)
+
+def _reset_job_key(session_id):
+    return f'reset_job:{session_id}'
+
+def _save_reset_progress(conn, session_id, progress):
+    """Persist background-reset progress in app_settings so every Passenger
+    worker (not just the one running the job) can report it. Each save
+    stamps a heartbeat."""
+    progress = dict(progress, heartbeat=time.time())
+    _exec(conn, '''
+        INSERT INTO app_settings (key, value) VALUES (%s, %s)
+        ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
+    ''', (_reset_job_key(session_id), json.dumps(progress)))
+
+def _claim_reset_job(conn, session_id, total):
+    """Mark a background reset as running unless one already is (a stale
+    heartbeat does not count). One statement, so two admins cannot both
+    claim it. Returns True if claimed. Caller commits."""
+    progress = {'state': 'running', 'done': 0, 'total': total, 'heartbeat': time.time()}
+    row = _fetchone(conn, '''
+        INSERT INTO app_settings (key, value) VALUES (%s, %s)
+        ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
+        WHERE app_settings.value::json->>'state' IS DISTINCT FROM 'running'
+           OR COALESCE((app_settings.value::json->>'heartbeat')::float8, 0) < %s
+        RETURNING key
+    ''', (_reset_job_key(session_id), json.dumps(progress),
+          progress['heartbeat'] - RESET_STALE_SECONDS))
+    return row is not None
+
+def parse_reset_progress(value):
+    """Decode a stored reset_job value; a 'running' job with a stale
+    heartbeat is reported as an error."""
+    if not value:
+        return None
+    progress = json.loads(value)
+    if (progress.get('state') == 'running'
+            and time.time() - progress.get('heartbeat', 0) > RESET_STALE_SECONDS):
+        progress.update(state='error', error='the background reset stopped responding')
+    return progress
+
+def get_reset_progress(conn, session_id):
+    row = _fetchone(conn, 'SELECT value FROM app_settings WHERE key=%s',
+                    (_reset_job_key(session_id),))
+    return parse_reset_progress(row['value'] if row else None)
+
+def _reset_attempts_chunked(session_id, session_name, total, chunk_size=None):
+    """Background worker: delete a session's attempts RESET_CHUNK_SIZE at a
+    time, committing after each chunk so locks are held only briefly."""
+    chunk_size = chunk_size or RESET_CHUNK_SIZE
+    conn = get_db()
+    done = 0
+    try:
+        while True:
+            ids = [r['id'] for r in _fetchall(conn,
+                'SELECT id FROM user_sessions WHERE session_id=%s ORDER BY id LIMIT %s',
+                (session_id, chunk_size)
+            )]
+            if not ids:
+                break
+            _exec(conn, 'DELETE FROM cheat_flags  WHERE user_session_id = ANY(%s)', (ids,))
+            _exec(conn, 'DELETE FROM user_answers WHERE user_session_id = ANY(%s)', (ids,))
+            cur = _exec(conn, 'DELETE FROM user_sessions WHERE id = ANY(%s) RETURNING user_id', (ids,))
+            refresh_user_scores(conn, {r['user_id'] for r in cur.fetchall()})
+            done += len(ids)
+            _save_reset_progress(conn, session_id,
+                                 {'state': 'running', 'done': done, 'total': total})
+            conn.commit()
+        _save_reset_progress(conn, session_id,
+                             {'state': 'done', 'done': done, 'total': total})
+        log_action(conn, 'reset_scores_all', entity_type='session',
+                   entity_id=session_id, entity_name=session_name,
+                   details=f"Reset ALL scores for session '{session_name}' "
+                           f"({done} attempts deleted in background)")
+        conn.commit()
+        FRAGMENTS.invalidate(('sessions',), conn=conn)
+    except Exception as e:
+        conn.rollback()
+        _save_reset_progress(conn, session_id,
+                             {'state': 'error', 'done': done, 'total': total, 'error': str(e)})
+        conn.commit()
+    finally:
+        close_db(conn)
+
 @app.route('/admin/performance/reset', methods=['POST'])
 @admin_required
 def reset_scores():
@@ -2022,6 +4887,9 @@ def reset_scores():
     POST params:
         session_id : int  (required)
         user_id    : int  (optional — omit to reset ALL users)
+
+    Whole-session resets above RESET_CHUNK_THRESHOLD attempts are handed to a
+    background thread; poll reset_status for progress.
     """
     session_id = request.form.get('session_id', type=int)
     user_id    = request.form.get('user_id',    type=int)
@@ -2041,19 +4909,7 @@ def reset_scores():
             return redirect(url_for('admin_performance'))
 
         if user_id:
-            # Get all user_session IDs for this user+session
-            us_rows = _fetchall(conn,
-                'SELECT id FROM user_sessions WHERE session_id=%s AND user_id=%s',
-                (session_id, user_id)
-            )
-            us_ids = [r['id'] for r in us_rows]
-            for us_id in us_ids:
-                _exec(conn, 'DELETE FROM cheat_flags   WHERE user_session_id=%s', (us_id,))
-                _exec(conn, 'DELETE FROM user_answers  WHERE user_session_id=%s', (us_id,))
-            _exec(conn,
-                'DELETE FROM user_sessions WHERE session_id=%s AND user_id=%s',
-                (session_id, user_id)
-            )
+            _reset_attempts(conn, session_id, user_id)
             user_row = _fetchone(conn,
                 'SELECT name FROM users WHERE id=%s', (user_id,)
             )
@@ -2062,23 +4918,29 @@ def reset_scores():
                        entity_id=user_id, entity_name=name,
                        details=f"Reset scores for {name} on session '{qs_row['name']}'")
             conn.commit()
+            FRAGMENTS.invalidate(('sessions',), conn=conn)
             flash(f'Reset complete — {name} can now retake "{qs_row["name"]}".', 'success')
         else:
-            # Get all user_session IDs for the whole session
-            us_rows = _fetchall(conn,
-                'SELECT id FROM user_sessions WHERE session_id=%s', (session_id,)
-            )
-            us_ids = [r['id'] for r in us_rows]
-            for us_id in us_ids:
-                _exec(conn, 'DELETE FROM cheat_flags   WHERE user_session_id=%s', (us_id,))
-                _exec(conn, 'DELETE FROM user_answers  WHERE user_session_id=%s', (us_id,))
-            _exec(conn,
-                'DELETE FROM user_sessions WHERE session_id=%s', (session_id,)
-            )
+            total = _fetchone(conn,
+                'SELECT COUNT(*) AS n FROM user_sessions WHERE session_id=%s', (session_id,)
+            )['n']
+            if total > RESET_CHUNK_THRESHOLD:
+                if not _claim_reset_job(conn, session_id, total):
+                    flash('A reset for this session is already running.', 'error')
+                    return redirect(url_for('admin_performance', session_id=session_id))
+                conn.commit()
+                threading.Thread(target=_reset_attempts_chunked,
+                                 args=(session_id, qs_row['name'], total),
+                                 daemon=True).start()
+                flash(f'Resetting {total} attempts for "{qs_row["name"]}" in the background…', 'success')
+                return redirect(url_for('admin_performance', session_id=session_id))
+
+            deleted = _reset_attempts(conn, session_id)
             log_action(conn, 'reset_scores_all', entity_type='session',
                        entity_id=session_id, entity_name=qs_row['name'],
-                       details=f"Reset ALL scores for session '{qs_row['name']}' ({len(us_ids)} attempts deleted)")
+                       details=f"Reset ALL scores for session '{qs_row['name']}' ({deleted} attempts deleted)")
             conn.commit()
+            FRAGMENTS.invalidate(('sessions',), conn=conn)
             flash(f'All scores reset for "{qs_row["name"]}". Everyone can retake it.', 'success')
 
     finally:
@@ -2087,6 +4949,20 @@ def reset_scores():
     return redirect(url_for('admin_performance', session_id=session_id))
 
 
+@app.route('/admin/performance/reset/status')
+@admin_required
+def reset_status():
+    """JSON: progress of a background whole-session reset. Query param: session_id."""
+    from flask import jsonify
+    session_id = request.args.get('session_id', type=int)
+    if not session_id:
+        return jsonify({'error': 'Missing params'}), 400
+    conn = get_db()
+    progress = get_reset_progress(conn, session_id)
+    close_db(conn)
+    return jsonify(progress or {'state': 'idle'})
+
+
 # ─── Audit Logs ───────────────────────────────────────────────────────────────
 
 @app.route('/admin/audit-logs', methods=['GET', 'POST'])
@@ -2198,6 +5074,148 @@ def admin_audit_logs():
     )
 
 
+@app.route('/admin/db-stats', methods=['GET', 'POST'])
+@admin_required
+def admin_db_stats():
+    """Top SQL statements by total time for this worker process (DB_INSTRUMENT=1)."""
+    if request.method == 'POST':
+        with _stmt_lock:
+            _stmt_stats.clear()
+            _endpoint_db.clear()
+        flash('Query statistics cleared for this worker.', 'success')
+        return redirect(url_for('admin_db_stats'))
+    statements, endpoints = db_stats_snapshot()
+    return render_template('admin/db_stats.html', enabled=DB_INSTRUMENT,
+                           statements=statements, endpoints=endpoints,
+                           slow_ms=DB_SLOW_MS, pid=os.getpid())
+
+
+def _reward_codes_from_request():
+    """Codes from a JSON body ({"codes": [...]}), a `codes` textarea or an
+    uploaded `file` (first CSV column per line), capped at REWARD_VERIFY_MAX."""
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        codes = data.get('codes') or []
+        if isinstance(codes, str):
+            codes = codes.split()
+        codes = [str(c) for c in codes]
+    else:
+        codes = (request.form.get('codes') or '').split()
+        upload = request.files.get('file')
+        if upload and upload.filename:
+            text = upload.read().decode('utf-8', 'replace')
+            codes += [line.split(',', 1)[0].strip().strip('"') for line in text.splitlines()]
+    return [c for c in codes if c.strip()][:REWARD_VERIFY_MAX]
+
+
+@app.route('/api/reward-codes/verify', methods=['POST'])
+def api_verify_reward_codes():
+    """Batch verification for the prize desk. Pass "offline": true to check
+    signatures only, without touching the database."""
+    from flask import jsonify
+    if not (session.get('is_admin') or token_matches(PRIZE_DESK_TOKEN)):
+        return jsonify({'error': 'forbidden'}), 403
+    codes = _reward_codes_from_request()
+    data  = request.get_json(silent=True)
+    offline = isinstance(data, dict) and bool(data.get('offline'))
+    if offline:
+        results = verify_reward_codes(codes)
+    else:
+        conn = get_db()
+        try:
+            results = verify_reward_codes(codes, conn)
+        finally:
+            close_db(conn)
+    return jsonify({'results': results, 'summary': reward_code_summary(results),
+                    'offline': offline})
+
+
+@app.route('/admin/reward-codes', methods=['GET', 'POST'])
+@admin_required
+def admin_reward_codes():
+    results = summary = None
+    submitted = ''
+    if request.method == 'POST':
+        codes = _reward_codes_from_request()
+        submitted = request.form.get('codes', '')
+        if not codes:
+            flash('Paste or upload at least one code.', 'error')
+        else:
+            conn = get_db()
+            try:
+                results = verify_reward_codes(codes, conn)
+            finally:
+                close_db(conn)
+            summary = reward_code_summary(results)
+    return render_template('admin/reward_codes.html', results=results,
+                           summary=summary, submitted=submitted)
+
+
+# ─── Sampling profiler ────────────────────────────────────────────────────────
+# Nothing runs until an admin asks for a window: a sampler thread then reads
+# sys._current_frames() every few ms for N seconds and folds each thread's
+# stack into "frame;frame;frame count" lines (Brendan Gregg's collapsed
+# format — feed to flamegraph.pl or speedscope).  Only the worker process
+# that serves the request is profiled.
+
+PROFILE_MAX_SECONDS = 60
+_profile_lock = threading.Lock()
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+def sample_stacks(seconds, interval, skip_thread_ids=()):
+    """Sample every other thread's stack for `seconds`; return {stack: count}."""
+    import sys
+    own   = threading.get_ident()
+    skip  = set(skip_thread_ids) | {own}
+    names = {t.ident: t.name for t in threading.enumerate()}
+    stacks = {}
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for tid, frame in sys._current_frames().items():
+            if tid in skip:
+                continue
+            parts = []
+            while frame is not None:
+                parts.append(_frame_label(frame))
+                frame = frame.f_back
+            parts.append(names.get(tid, f'thread-{tid}'))
+            key = ';'.join(reversed(parts))
+            stacks[key] = stacks.get(key, 0) + 1
+        time.sleep(interval)
+    return stacks
+
+@app.route('/admin/profile')
+@admin_required
+def admin_profile():
+    """Profile this worker for ?seconds=N (max 60) at ?interval_ms=M and
+    download the collapsed stacks.  ?app_only=1 keeps only stacks that pass
+    through app.py (i.e. request handlers), dropping idle server threads."""
+    from flask import Response
+    seconds  = min(max(request.args.get('seconds', 10, type=float), 1), PROFILE_MAX_SECONDS)
+    interval = max(request.args.get('interval_ms', 5, type=float), 1) / 1000.0
+    app_only = request.args.get('app_only', '1') == '1'
+    if not _profile_lock.acquire(blocking=False):
+        return Response('A profiling window is already running.\n', status=409, mimetype='text/plain')
+    try:
+        result = {}
+        caller = threading.get_ident()
+        sampler = threading.Thread(
+            target=lambda: result.update(sample_stacks(seconds, interval, {caller})),
+            name='profiler', daemon=True)
+        sampler.start()
+        sampler.join()
+    finally:
+        _profile_lock.release()
+    lines = [f'{stack} {count}' for stack, count in sorted(result.items())
+             if not app_only or 'app.py:' in stack]
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain', headers={
+        'Content-Disposition': f'attachment; filename="profile_{os.getpid()}_{int(time.time())}.collapsed"'
+    })
+
+
 @app.route('/admin/settings', methods=['GET', 'POST'])
 @admin_required
 def admin_settings():
@@ -2220,6 +5238,21 @@ def admin_settings():
 #    flask reset-db         — ⚠ DROP all tables then recreate (wipes everything)
 #    flask reset-db --yes   — skip the confirmation prompt
 #    flask create-admin     — set/change the admin password from the terminal
+#    flask import-questions <session_id> <file>  — bulk-load a .csv/.xlsx/.json bank
+#    flask seed [files…]    — load declarative seeds (default: seeds/), skips unchanged
+#    flask sweep-expired    — complete overdue timed attempts (run from cron)
+#    flask prewarm-attempts [session_id]  — pre-create attempts before a scheduled start
+#    flask normalize-phones — rewrite stored phones to +254…, merging duplicates
+#    flask dedupe-answers [--dry-run]  — drop duplicate answers, add the unique index
+#    flask build-assets     — precompress static files (.gz/.br) for /assets/
+#    flask cache-check      — round-trip the configured cache backend
+#    flask cache-clear      — drop every cached entry (all workers if shared)
+#    flask bench-rows [--session-id N]  — memory/time of dict rows vs compact rows
+#    flask check-scoring [--cases N]    — compiled answer keys vs reference scorer
+#    flask bench-scoring    — time compiled vs reference scoring
+#    flask regrade (--question N… | --section N | --session N) [--dry-run]
+#                           — re-score stored answers after an answer-key fix
+#    flask verify-codes FILE|- [--offline]  — check a list of reward codes
 # ═══════════════════════════════════════════════════════════════════════════════
 
 @app.cli.command('init-db')
@@ -2281,6 +5314,498 @@ def cli_reset_db(yes):
         raise SystemExit(1)
 
 
+@app.cli.command('import-questions')
+@click.argument('session_id', type=int)
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--dry-run', is_flag=True, default=False,
+              help='Validate the file without writing anything.')
+def cli_import_questions(session_id, path, dry_run):
+    """Bulk-load a question bank (.csv / .xlsx / .json) into a session."""
+    with open(path, 'rb') as fh:
+        data = fh.read()
+    try:
+        clean, errors = validate_question_bank(read_question_bank(path, data))
+    except Exception as e:
+        click.secho(f'✗ Could not read {path}: {e}', fg='red')
+        raise SystemExit(1)
+    if errors:
+        for err in errors:
+            click.secho(f'  {err}', fg='red')
+        click.secho(f'✗ {len(errors)} invalid rows — nothing imported.', fg='red')
+        raise SystemExit(1)
+    click.echo(f'{len(clean)} questions validated.')
+    if dry_run:
+        return
+    conn = get_db()
+    try:
+        qs = _fetchone(conn, 'SELECT name FROM quiz_sessions WHERE id=%s', (session_id,))
+        if not qs:
+            click.secho(f'✗ Session #{session_id} not found.', fg='red')
+            raise SystemExit(1)
+        n_secs, n_qs = import_question_bank(conn, session_id, clean)
+        log_action(conn, 'import_questions', category='system', entity_type='session',
+                   entity_id=session_id, entity_name=qs['name'],
+                   details=f"Imported {n_qs} questions ({n_secs} new sections) from '{path}'")
+        conn.commit()
+        FRAGMENTS.invalidate(('sections', session_id), ('questions',), ('sessions',), conn=conn)
+        invalidate_question_counts(conn=conn)
+        click.secho(f"✓ Imported {n_qs} questions ({n_secs} new sections) into '{qs['name']}'.",
+                    fg='green')
+    except psycopg2.Error as e:
+        conn.rollback()
+        click.secho(f'✗ Error: {e}', fg='red')
+        raise SystemExit(1)
+    finally:
+        close_db(conn)
+
+
+@app.cli.command('sweep-expired')
+def cli_sweep_expired():
+    """Complete every timed attempt whose time limit has passed (for cron)."""
+    conn = get_db()
+    try:
+        closed = sweep_expired_attempts(conn)
+        conn.commit()
+    except psycopg2.Error as e:
+        click.secho(f'✗ Error: {e}', fg='red')
+        raise SystemExit(1)
+    finally:
+        close_db(conn)
+    if closed is None:
+        click.echo('Another sweep is running — skipped.')
+    else:
+        click.secho(f'✓ Closed {closed} expired attempts.', fg='green')
+
+
+@app.cli.command('build-assets')
+@click.option('--force', is_flag=True, default=False, help='Rewrite variants even if up to date.')
+def cli_build_assets(force):
+    """Precompress static text assets so /assets/ can serve them directly."""
+    written, skipped, has_brotli = build_compressed_assets(force=force)
+    click.secho(f'✓ Wrote {written} compressed files ({skipped} up to date).', fg='green')
+    if not has_brotli:
+        click.echo('  brotli is not installed — only .gz variants were written.')
+
+
+@app.cli.command('cache-check')
+def cli_cache_check():
+    """Write, read and invalidate a probe entry through the configured cache."""
+    probe = VersionedCache('cache-check', ttl=30)
+    token = os.urandom(8).hex()
+    t0 = time.perf_counter()
+    probe.set(('probe',), token)
+    ok_read = probe.get(('probe',)) == token
+    probe.invalidate(('probe',))
+    ok_inval = probe.get(('probe',)) is None
+    ms = (time.perf_counter() - t0) * 1000
+    backend = CACHE_URL or 'in-process'
+    if ok_read and ok_inval:
+        click.secho(f'✓ Cache OK ({backend}, {ms:.1f} ms round trip).', fg='green')
+    else:
+        click.secho(f'✗ Cache check failed on {backend} '
+                    f'(read {"ok" if ok_read else "failed"}, '
+                    f'invalidate {"ok" if ok_inval else "failed"}).', fg='red')
+        raise SystemExit(1)
+
+
+@app.cli.command('cache-clear')
+def cli_cache_clear():
+    """Drop every entry under CACHE_PREFIX."""
+    if not CACHE_URL:
+        click.echo('CACHE_URL is not set — each worker keeps its own cache; restart them to clear it.')
+        return
+    CACHE.clear()
+    click.secho(f'✓ Cleared cache ({CACHE_URL or "in-process"}).', fg='green')
+
+
+@app.cli.command('prewarm-attempts')
+@click.argument('session_id', type=int, required=False)
+def cli_prewarm_attempts(session_id):
+    """Pre-create attempt shells for SESSION_ID, or for every session due
+    within PREWARM_MINUTES when no id is given (for cron)."""
+    conn = get_db()
+    try:
+        if session_id is not None:
+            done = {f'session {session_id}': prewarm_attempts(conn, session_id)}
+        else:
+            done = prewarm_due_sessions(conn)
+        conn.commit()
+    except psycopg2.Error as e:
+        click.secho(f'✗ Error: {e}', fg='red')
+        raise SystemExit(1)
+    finally:
+        close_db(conn)
+    if done is None:
+        click.echo('Another pre-warm is running — skipped.')
+        return
+    if not done:
+        click.echo('Nothing to pre-warm.')
+    for name, created in done.items():
+        click.secho(f'✓ {name}: {created} attempts pre-created.', fg='green')
+
+
+# Hot result sets compared by `flask bench-rows`
+_BENCH_ROW_QUERIES = {
+    'quiz questions': '''
+        SELECT q.*, s.name AS section_name FROM questions q
+        JOIN sections s ON q.section_id = s.id
+        WHERE s.session_id = %(sid)s ORDER BY s.order_num, s.id, q.order_num, q.id''',
+    'export detail': '''
+        SELECT u.name, u.phone, sec.name AS section_name, q.question_text, q.question_type,
+               q.option_a, q.option_b, q.option_c, q.option_d, q.correct_answer,
+               ua.selected_answer, ua.is_correct, ua.points_earned, ua.reward_code,
+               ua.answered_at, q.points
+        FROM user_sessions us
+        JOIN users u         ON us.user_id = u.id
+        JOIN user_answers ua ON ua.user_session_id = us.id
+        JOIN questions q     ON ua.question_id = q.id
+        JOIN sections sec    ON q.section_id = sec.id
+        WHERE us.session_id = %(sid)s
+        ORDER BY u.name, sec.order_num, q.order_num''',
+}
+
+def _rss_bytes():
+    """Current resident set size (Linux), or 0 where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+@app.cli.command('bench-rows')
+@click.option('--session-id', type=int, default=None, help='Session to read (default: the one with most answers).')
+@click.option('--repeat', type=int, default=5, show_default=True)
+def cli_bench_rows(session_id, repeat):
+    """Compare RealDictCursor rows with compact SlotRow tuples on hot queries:
+    fetch time, Python heap held by the result (tracemalloc) and RSS growth."""
+    import gc, tracemalloc
+    conn = get_db()
+    try:
+        if session_id is None:
+            row = _fetchone(conn, '''
+                SELECT us.session_id FROM user_sessions us
+                JOIN user_answers ua ON ua.user_session_id = us.id
+                GROUP BY us.session_id ORDER BY COUNT(*) DESC LIMIT 1''')
+            if not row:
+                click.secho('✗ No answers recorded yet — nothing to measure.', fg='red')
+                raise SystemExit(1)
+            session_id = row['session_id']
+        click.echo(f'Session #{session_id}, fetch time best of {repeat}:')
+        for label, sql in _BENCH_ROW_QUERIES.items():
+            results = {}
+            for kind, fetch in (('dict', _fetchall), ('slots', _fetchall_rows)):
+                best_s = None
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    fetch(conn, sql, {'sid': session_id})
+                    elapsed = time.perf_counter() - t0
+                    best_s = elapsed if best_s is None else min(best_s, elapsed)
+                # Memory is measured on a separate pass so tracing doesn't skew the timing
+                gc.collect()
+                rss0 = _rss_bytes()
+                tracemalloc.start()
+                rows = fetch(conn, sql, {'sid': session_id})
+                heap = tracemalloc.get_traced_memory()[0]
+                tracemalloc.stop()
+                rss = _rss_bytes() - rss0
+                n = len(rows)
+                del rows
+                results[kind] = (n, best_s, heap, rss)
+            n = results['dict'][0]
+            click.echo(f'  {label} ({n} rows)')
+            for kind, (_, secs, heap, rss) in results.items():
+                per_row = heap / n if n else 0
+                click.echo(f'    {kind:<6} {secs * 1000:8.1f} ms  {heap / 1024:9.1f} KiB held '
+                           f'({per_row:6.0f} B/row)  RSS +{rss / 1024:.0f} KiB')
+            if results['dict'][2]:
+                saved = 1 - results['slots'][2] / results['dict'][2]
+                click.secho(f'    ✓ {saved:.0%} less heap with compact rows', fg='green')
+        conn.rollback()
+    finally:
+        close_db(conn)
+
+
+def _random_scoring_case(rng):
+    """One (question, selected_raw) pair for check-scoring, biased towards
+    the awkward inputs real submissions and imported banks contain."""
+    letters = ['A', 'B', 'C', 'D', 'a', 'c', 'E', ' b ', '', 'AB']
+    words   = ['Moses', 'moses', ' Moses ', 'David', 'Ruth', '', 'Eve', 'Noah']
+
+    def letter_list():
+        picked = rng.sample(letters, rng.randint(0, 5))
+        if picked and rng.random() < 0.2:
+            picked.append(rng.choice(picked))   # repeated option
+        return rng.choice([',', ', ', ' , ']).join(picked)
+
+    def blank_list():
+        return rng.choice(['|', ' | ']).join(rng.choice(words) for _ in range(rng.randint(1, 4)))
+
+    qtype = rng.choice(['single', 'multi', 'multi', 'fill_blank', 'fill_blank', None, 'essay'])
+    if qtype == 'fill_blank':
+        correct, selected = blank_list(), blank_list()
+    elif qtype == 'multi':
+        correct, selected = letter_list(), letter_list()
+    else:
+        correct  = rng.choice(letters + [' C', 'd '])
+        selected = rng.choice(letters + [' C', 'd ', 'A,B'])
+    if rng.random() < 0.1:
+        correct = rng.choice([None, '', '  '])
+    points = rng.choice([None, 0, 1, 1, 2, 3, 5, 0.5, 7])
+    return {'question_type': qtype, 'correct_answer': correct, 'points': points}, selected
+
+@app.cli.command('check-scoring')
+@click.option('--cases', type=int, default=200_000, show_default=True)
+@click.option('--seed', 'rng_seed', type=int, default=None, help='Random seed (default: random).')
+@click.option('--db/--no-db', 'use_db', default=True, help='Also check every stored question.')
+def cli_check_scoring(cases, rng_seed, use_db):
+    """Property check: score_answer() (compiled keys) must return exactly what
+    score_answer_reference() does, for random and for stored questions."""
+    rng_seed = random.randrange(2**32) if rng_seed is None else rng_seed
+    rng = random.Random(rng_seed)
+    pairs = [_random_scoring_case(rng) for _ in range(cases)]
+    if use_db:
+        conn = get_db()
+        try:
+            stored = _fetchall(conn,
+                'SELECT id, question_type, correct_answer, points, blank_options FROM questions')
+            answers = [r['selected_answer'] for r in _fetchall(conn,
+                'SELECT DISTINCT selected_answer FROM user_answers WHERE selected_answer IS NOT NULL LIMIT 5000')]
+        finally:
+            close_db(conn)
+        for q in stored:
+            for sel in [q['correct_answer'] or ''] + rng.sample(answers, min(len(answers), 20)):
+                pairs.append((q, sel))
+    mismatches = 0
+    for question, sel in pairs:
+        fast, ref = score_answer(question, sel), score_answer_reference(question, sel)
+        if fast != ref or type(fast[2]) is not type(ref[2]):
+            mismatches += 1
+            if mismatches <= 10:
+                click.echo(f'  {dict(question)!r} / {sel!r}: compiled {fast!r} != reference {ref!r}')
+    if mismatches:
+        click.secho(f'✗ {mismatches} of {len(pairs)} cases differ (seed {rng_seed}).', fg='red')
+        raise SystemExit(1)
+    click.secho(f'✓ {len(pairs)} cases identical (seed {rng_seed}).', fg='green')
+
+@app.cli.command('bench-scoring')
+@click.option('--cases', type=int, default=50_000, show_default=True)
+@click.option('--repeat', type=int, default=5, show_default=True)
+def cli_bench_scoring(cases, repeat):
+    """Time score_answer() on compiled keys against the reference parser."""
+    import gc, tracemalloc
+    rng = random.Random(7)
+    qs_pool = [{'question_type': t, 'correct_answer': c, 'points': p} for t, c, p in (
+        ('single', 'B', 1), ('multi', 'A,C', 2), ('multi', 'B,C,D', 3),
+        ('fill_blank', 'In the beginning|God|created', 3), ('fill_blank', 'Moses', 1))]
+    sel_pool = {'single': ['B', 'c', ' A '], 'multi': ['A,C', 'C,A', 'A', 'B,D', 'A,B,C,D'],
+                'fill_blank': ['In the beginning|God|created', 'Moses', 'In the beginning|man|made']}
+    pairs = []
+    for _ in range(cases):
+        q = rng.choice(qs_pool)
+        pairs.append((q, rng.choice(sel_pool[q['question_type']])))
+    for label, fn in (('reference', score_answer_reference), ('compiled', score_answer)):
+        best = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for q, sel in pairs:
+                fn(q, sel)
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+        gc.collect()
+        tracemalloc.start()
+        for q, sel in pairs[:5000]:
+            fn(q, sel)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        click.echo(f'  {label:<9} {best / cases * 1e9:7.0f} ns/answer   peak {peak / 1024:7.1f} KiB over 5000')
+    click.secho(f'✓ {cases} answers per run, best of {repeat}.', fg='green')
+
+
+@app.cli.command('regrade')
+@click.option('--question', 'question_ids', type=int, multiple=True, help='Question id (repeatable).')
+@click.option('--section', 'section_id', type=int, default=None, help='Every question in a section.')
+@click.option('--session', 'session_id', type=int, default=None, help='Every question in a session.')
+@click.option('--dry-run', is_flag=True, default=False, help='Report the diff without writing it.')
+@click.option('--chunk-size', type=int, default=None, help=f'Answers per batch (default {REGRADE_CHUNK_SIZE}).')
+def cli_regrade(question_ids, section_id, session_id, dry_run, chunk_size):
+    """Re-score stored answers against the current answer keys and report
+    what changed."""
+    conn = get_db()
+    try:
+        ids = set(question_ids)
+        if section_id:
+            ids |= {r['id'] for r in _fetchall(conn,
+                'SELECT id FROM questions WHERE section_id=%s', (section_id,))}
+        if session_id:
+            ids |= {r['id'] for r in _fetchall(conn, '''
+                SELECT q.id FROM questions q JOIN sections s ON q.section_id = s.id
+                WHERE s.session_id=%s''', (session_id,))}
+        if not ids:
+            click.secho('✗ No questions selected — pass --question, --section or --session.', fg='red')
+            raise SystemExit(1)
+        t0 = time.perf_counter()
+        report = regrade_questions(conn, ids, chunk_size=chunk_size, dry_run=dry_run)
+        elapsed = time.perf_counter() - t0
+        summary = regrade_summary(report)
+        if dry_run:
+            conn.rollback()
+        else:
+            log_action(conn, 'regrade_questions', category='system', entity_type='question',
+                       details=summary)
+            conn.commit()
+            invalidate_attempt_detail(report['attempt_ids'], conn=conn)
+    except psycopg2.Error as e:
+        conn.rollback()
+        click.secho(f'✗ Error: {e}', fg='red')
+        raise SystemExit(1)
+    finally:
+        close_db(conn)
+
+    for qid, counts in sorted(report['per_question'].items()):
+        if counts['changed']:
+            click.echo(f"  Q#{qid}: {counts['changed']} of {counts['examined']} answers change")
+    if report['attempts']:
+        click.echo('  Largest score moves:')
+        for a in report['attempts']:
+            click.echo(f"    attempt #{a['attempt_id']} {a['name']}: {a['before']:g} → {a['after']:g}")
+    prefix = 'Dry run — would have: ' if dry_run else ''
+    click.secho(f'✓ {prefix}{summary} in {elapsed:.1f}s.', fg='green')
+
+
+@app.cli.command('dedupe-answers')
+@click.option('--dry-run', is_flag=True, default=False, help='List the duplicates without deleting them.')
+def cli_dedupe_answers(dry_run):
+    """Keep only the earliest answer per (attempt, question) and add the unique index."""
+    conn = get_db()
+    try:
+        removed = dedupe_answers(conn, dry_run=dry_run)
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+            invalidate_attempt_detail({r['user_session_id'] for r in removed}, conn=conn)
+    except psycopg2.Error as e:
+        click.secho(f'✗ Error: {e}', fg='red')
+        raise SystemExit(1)
+    finally:
+        close_db(conn)
+    for r in removed:
+        code = f"  (reward code {r['reward_code']})" if r['reward_code'] else ''
+        click.echo(f"  attempt #{r['user_session_id']} Q#{r['question_id']}: answer #{r['id']}{code}")
+    verb = 'Would remove' if dry_run else 'Removed'
+    click.secho(f"✓ {verb} {len(removed)} duplicate answers from "
+                f"{len({r['user_session_id'] for r in removed})} attempts.", fg='green')
+
+
+@app.cli.command('normalize-phones')
+def cli_normalize_phones():
+    """Rewrite stored phone numbers to +254… and merge accounts that collide."""
+    conn = get_db()
+    try:
+        report = normalize_user_phones(conn)
+        conn.commit()
+    except psycopg2.Error as e:
+        click.secho(f'✗ Error: {e}', fg='red')
+        raise SystemExit(1)
+    finally:
+        close_db(conn)
+    for keeper, dups, phone in report['merged']:
+        click.echo(f"  merged {', '.join(map(str, dups))} → {keeper}  {phone}")
+    for user_id, phone in report['unparseable']:
+        click.secho(f'  left unchanged: user {user_id}  {phone!r}', fg='yellow')
+    click.secho(f"✓ {report['converted']} converted, {len(report['merged'])} merged, "
+                f"{len(report['unparseable'])} unparseable.", fg='green')
+
+
+@app.cli.command('verify-codes')
+@click.argument('source', type=click.File('r'))
+@click.option('--offline', is_flag=True, default=False,
+              help='Check signatures only; do not look answers up in the database.')
+def cli_verify_codes(source, offline):
+    """Verify reward codes, one per line (first CSV column), from FILE or - for stdin."""
+    codes = [line.split(',', 1)[0].strip().strip('"') for line in source]
+    codes = [c for c in codes if c]
+    conn = None if offline else get_db()
+    try:
+        t0 = time.perf_counter()
+        results = verify_reward_codes(codes, conn)
+        elapsed = time.perf_counter() - t0
+    except psycopg2.Error as e:
+        click.secho(f'✗ Error: {e}', fg='red')
+        raise SystemExit(1)
+    finally:
+        if conn is not None:
+            close_db(conn)
+
+    for r in results:
+        who = f"  {r['name']} — {r['session']}" if r.get('name') else ''
+        click.secho(f"  {r['code']:<20} {r['status']}{who}",
+                    fg=None if r['status'] == 'valid' else 'yellow')
+    summary = ', '.join(f'{n} {status}' for status, n in reward_code_summary(results).items())
+    rate = len(results) / elapsed if elapsed else float('inf')
+    click.secho(f'✓ {len(results)} codes ({summary or "none"}) in {elapsed:.2f}s '
+                f'— {rate:,.0f} codes/s.', fg='green')
+
+
+@app.cli.command('seed')
+@click.argument('paths', nargs=-1, type=click.Path(exists=True))
+@click.option('--force', is_flag=True, default=False,
+              help='Re-seed changed sessions even if they already have attempts (wipes them), '
+                   'and replace same-named sessions not created by a seed.')
+@click.option('--workers', type=int, default=4, show_default=True,
+              help='Files loaded in parallel (each uses one pooled connection).')
+def cli_seed(paths, force, workers):
+    """Load declarative seed files (default: every file in seeds/).
+    Idempotent — sessions whose content hash is unchanged are skipped."""
+    from concurrent.futures import ThreadPoolExecutor
+    files = []
+    for p in (paths or (SEED_DIR,)):
+        if os.path.isdir(p):
+            files += sorted(os.path.join(p, f) for f in os.listdir(p)
+                            if f.endswith(('.json', '.yml', '.yaml')))
+        else:
+            files.append(p)
+    if not files:
+        click.echo('No seed files found.')
+        return
+
+    jobs, failed = [], False
+    for path in files:
+        try:
+            doc = load_seed_file(path)
+            if not (doc.get('session') or {}).get('name'):
+                raise ValueError('session.name is required')
+            clean, errors = validate_question_bank(seed_rows(doc))
+        except Exception as e:
+            clean, errors = [], [f'cannot read: {e}']
+        if errors:
+            failed = True
+            click.secho(f'✗ {path}: ' + '; '.join(errors), fg='red')
+            continue
+        jobs.append((path, doc, clean, seed_digest(doc)))
+
+    # Keep one pool connection spare for anything else running in this process
+    workers = max(1, min(workers, len(jobs) or 1, 4))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(apply_seed, doc, clean, digest, force): (path, doc, clean)
+                   for path, doc, clean, digest in jobs}
+        for fut, (path, doc, clean) in futures.items():
+            name = doc['session']['name']
+            try:
+                status = fut.result()
+            except Exception as e:
+                failed = True
+                click.secho(f'✗ {name}: {e}', fg='red')
+                continue
+            colour = {'created': 'green', 'updated': 'green',
+                      'skipped': 'yellow', 'foreign': 'yellow'}.get(status)
+            note = {'skipped': ' (has attempts — use --force)',
+                    'foreign': ' (not created by this seed — use --force to replace it)'}.get(status, '')
+            click.secho(f'  {status:<9} {name} — {len(clean)} questions{note}', fg=colour)
+    if failed:
+        raise SystemExit(1)
+
+
 @app.cli.command('create-admin')
 def cli_create_admin():
     """Set or update the admin panel password."""
@@ -0,0 +1,472 @@
+"""
+loadtest.py
+───────────
+Synthetic load generator for the participant quiz flow:
+
+    index (login/register) → quiz_home → start_quiz → take_quiz GET/POST … → results
+
+Each simulated participant is a thread with its own cookie jar.  Between
+answers it "thinks" (configurable model), polls /api/timer like the browser
+does, and occasionally fires /api/cheat noise.  With --stampede every
+participant logs in first and then hits start_quiz in the same instant, the
+way a scheduled event opens.
+
+Reports throughput, p50/p95/p99 per endpoint, pool checkouts and
+exhaustion errors (with --serve) and PostgreSQL statement/transaction counts, and can save a JSON
+report to compare against a later run.
+
+Uses the same DB credentials as the Flask app (env vars) for the DB stats:
+  DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
+
+Run against a local server you started yourself:
+    python loadtest.py --session-id 3 --users 200 --url http://localhost:5000
+
+Or let the harness serve the app in-process (Waitress) so it can also
+count pool checkouts and exhaustion:
+    python loadtest.py --session-id 3 --users 200 --serve --stampede
+
+Compare with a previous run:
+    python loadtest.py --session-id 3 --users 200 --serve --save run2.json --compare run1.json
+
+Remove the synthetic participants afterwards:
+    python loadtest.py --session-id 3 --cleanup
+"""
+
+import argparse, json, math, os, random, re, threading, time
+import http.cookiejar, urllib.error, urllib.parse, urllib.request
+from collections import defaultdict
+from html.parser import HTMLParser
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+
+# ─── Endpoint labelling ───────────────────────────────────────────────────────
+
+ROUTES = [
+    (re.compile(r'^/$'),                          'index'),
+    (re.compile(r'^/register$'),                  'register'),
+    (re.compile(r'^/quiz$'),                      'quiz_home'),
+    (re.compile(r'^/quiz/\d+/start$'),            'start_quiz'),
+    (re.compile(r'^/quiz/\d+/expire$'),           'expire_quiz'),
+    (re.compile(r'^/quiz/\d+$'),                  'take_quiz'),
+    (re.compile(r'^/api/timer/\d+$'),             'api_timer'),
+    (re.compile(r'^/api/cheat/\d+$'),             'cheat_flag'),
+    (re.compile(r'^/api/session-status/\d+$'),    'api_session_status'),
+    (re.compile(r'^/results(/\d+)?$'),            'results'),
+]
+
+def endpoint_label(method, url):
+    path = urllib.parse.urlsplit(url).path
+    for pattern, name in ROUTES:
+        if pattern.match(path):
+            return f'{method} {name}'
+    return f'{method} {path}'
+
+
+# ─── Stats ────────────────────────────────────────────────────────────────────
+
+class Stats:
+    """Thread-safe latency samples per endpoint label."""
+
+    def __init__(self):
+        self.lock      = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors    = defaultdict(int)
+        self.answers   = 0
+        self.completed = 0
+
+    def record(self, label, seconds, ok=True):
+        with self.lock:
+            self.latencies[label].append(seconds)
+            if not ok:
+                self.errors[label] += 1
+
+    def bump(self, field):
+        with self.lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+
+def percentile(sorted_vals, pct):
+    if not sorted_vals:
+        return 0.0
+    k = (len(sorted_vals) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+# ─── HTTP client (one per participant) ───────────────────────────────────────
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Redirects are followed by Client.request so each hop is timed separately
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Client:
+    def __init__(self, base_url, stats, timeout=30):
+        self.base    = base_url.rstrip('/')
+        self.stats   = stats
+        self.timeout = timeout
+        self.opener  = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect()
+        )
+
+    def request(self, method, path, data=None, json_body=None, follow=True):
+        """Send a request, following redirects hop by hop.
+        Returns (final_path, status, body_text)."""
+        url = path if path.startswith('http') else self.base + path
+        while True:
+            body, headers = None, {}
+            if json_body is not None:
+                body = json.dumps(json_body).encode()
+                headers['Content-Type'] = 'application/json'
+            elif data is not None:
+                body = urllib.parse.urlencode(data, doseq=True).encode()
+                headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            req   = urllib.request.Request(url, data=body, method=method, headers=headers)
+            label = endpoint_label(method, url)
+            t0 = time.perf_counter()
+            try:
+                resp = self.opener.open(req, timeout=self.timeout)
+                status, text, location = resp.status, resp.read().decode('utf-8', 'replace'), None
+            except urllib.error.HTTPError as e:
+                status, text = e.code, e.read().decode('utf-8', 'replace')
+                location = e.headers.get('Location')
+            except (urllib.error.URLError, OSError) as e:
+                self.stats.record(label, time.perf_counter() - t0, ok=False)
+                return urllib.parse.urlsplit(url).path, 0, str(e)
+            self.stats.record(label, time.perf_counter() - t0, ok=status < 400 or status in (301, 302, 303))
+            if follow and status in (301, 302, 303) and location:
+                url = urllib.parse.urljoin(url, location)
+                method, data, json_body = 'GET', None, None
+                continue
+            return urllib.parse.urlsplit(url).path, status, text
+
+
+# ─── Question form parsing ────────────────────────────────────────────────────
+
+class QuestionForm(HTMLParser):
+    """Pull question_id, answer choices and blank selects out of quiz.html."""
+
+    def __init__(self, text):
+        super().__init__()
+        self.question_id = None
+        self.kind        = None      # 'radio' | 'checkbox' | 'blanks'
+        self.choices     = []
+        self.blanks      = {}        # blank name -> [options]
+        self._select     = None
+        self.feed(text)
+
+    def handle_starttag(self, tag, attrs):
+        a = dict(attrs)
+        if tag == 'input' and a.get('name') == 'question_id':
+            self.question_id = a.get('value')
+        elif tag == 'input' and a.get('name') == 'answer':
+            self.kind = a.get('type')
+            self.choices.append(a.get('value'))
+        elif tag == 'select' and (a.get('name') or '').startswith('blank_'):
+            self.kind, self._select = 'blanks', a['name']
+            self.blanks[self._select] = []
+        elif tag == 'option' and self._select and a.get('value'):
+            self.blanks[self._select].append(a['value'])
+
+    def handle_endtag(self, tag):
+        if tag == 'select':
+            self._select = None
+
+    def random_answer(self, rng):
+        data = {'question_id': self.question_id}
+        if self.kind == 'radio':
+            data['answer'] = rng.choice(self.choices)
+        elif self.kind == 'checkbox':
+            data['answer'] = rng.sample(self.choices, rng.randint(1, len(self.choices)))
+        elif self.kind == 'blanks':
+            for name, opts in self.blanks.items():
+                data[name] = rng.choice(opts) if opts else ''
+        return data
+
+
+# ─── Think-time models ────────────────────────────────────────────────────────
+
+def think_time(model, mean, rng):
+    if model == 'none' or mean <= 0:
+        return 0.0
+    if model == 'fixed':
+        return mean
+    if model == 'exp':
+        return rng.expovariate(1.0 / mean)
+    # lognormal with the requested mean and a fairly heavy tail (sigma=0.6)
+    sigma = 0.6
+    return rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+
+
+# ─── Participant ──────────────────────────────────────────────────────────────
+
+CHEAT_NOISE = ['right_click', 'copy_attempt', 'keyboard_shortcut', 'window_blur']
+
+def participant(idx, args, stats, start_barrier):
+    rng    = random.Random(args.seed * 100003 + idx)
+    client = Client(args.url, stats)
+    sid    = args.session_id
+    phone  = f'{args.phone_prefix}{idx:06d}'
+
+    if args.ramp and not args.stampede:
+        time.sleep(rng.uniform(0, args.ramp))
+
+    client.request('GET', '/')
+    path, _, _ = client.request('POST', '/', data={'phone': phone})
+    if path == '/register':
+        client.request('POST', '/register', data={'name': f'Load Tester {idx}'})
+    client.request('GET', '/quiz')
+
+    if start_barrier is not None:
+        try:
+            start_barrier.wait(timeout=300)
+        except threading.BrokenBarrierError:
+            pass
+        client.request('GET', f'/api/session-status/{sid}')
+
+    path, status, text = client.request('POST', f'/quiz/{sid}/start')
+    last_poll = time.monotonic()
+    while path == f'/quiz/{sid}' and status == 200:
+        form = QuestionForm(text)
+        if not form.question_id:
+            break
+        pause = think_time(args.think, args.think_mean, rng)
+        deadline = time.monotonic() + pause
+        while True:
+            now = time.monotonic()
+            if args.poll and now - last_poll >= args.poll:
+                client.request('GET', f'/api/timer/{sid}')
+                last_poll = now
+            if now >= deadline:
+                break
+            time.sleep(min(deadline - now, args.poll or deadline - now, 1.0))
+        if args.cheat_rate and rng.random() < args.cheat_rate:
+            client.request('POST', f'/api/cheat/{sid}',
+                           json_body={'violation': rng.choice(CHEAT_NOISE)})
+        path, status, text = client.request('POST', f'/quiz/{sid}', data=form.random_answer(rng))
+        stats.bump('answers')
+    if path.startswith('/results'):
+        stats.bump('completed')
+
+
+# ─── DB counters ──────────────────────────────────────────────────────────────
+
+def db_connect():
+    import psycopg2
+    conn = psycopg2.connect(
+        host     = os.environ.get('DB_HOST',     'localhost'),
+        port     = int(os.environ.get('DB_PORT', 5432)),
+        dbname   = os.environ.get('DB_NAME',     'bible_trivia'),
+        user     = os.environ.get('DB_USER',     'bible_trivia_user'),
+        password = os.environ.get('DB_PASSWORD', ''),
+        connect_timeout=10,
+    )
+    conn.autocommit = True
+    return conn
+
+def db_counters():
+    """Snapshot cumulative PostgreSQL counters for the app database.
+    statements is None unless the pg_stat_statements extension is installed."""
+    try:
+        conn = db_connect()
+    except Exception:
+        return None
+    cur = conn.cursor()
+    cur.execute('''SELECT xact_commit + xact_rollback, tup_inserted, tup_updated,
+                          tup_deleted, tup_returned + tup_fetched
+                   FROM pg_stat_database WHERE datname = current_database()''')
+    xacts, ins, upd, dele, read = cur.fetchone()
+    statements = None
+    try:
+        cur.execute('SELECT SUM(calls) FROM pg_stat_statements '
+                    'WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())')
+        statements = int(cur.fetchone()[0] or 0)
+    except Exception:
+        pass
+    conn.close()
+    return dict(transactions=xacts, statements=statements, rows_inserted=ins,
+                rows_updated=upd, rows_deleted=dele, rows_read=read)
+
+def cleanup(args):
+    conn = db_connect()
+    cur  = conn.cursor()
+    like = args.phone_prefix + '%'
+    # users.phone is stored in E.164: 0799… is kept as +254799…
+    e164 = ('+254' + args.phone_prefix[1:] if args.phone_prefix.startswith('0') else args.phone_prefix) + '%'
+    cur.execute('''DELETE FROM user_sessions WHERE user_id IN
+                   (SELECT id FROM users WHERE phone LIKE %s OR phone LIKE %s)''', (like, e164))
+    attempts = cur.rowcount
+    cur.execute('DELETE FROM users WHERE phone LIKE %s OR phone LIKE %s', (like, e164))
+    print(f'Removed {cur.rowcount} synthetic users and {attempts} attempts (phone {like}).')
+    conn.close()
+
+
+# ─── In-process server (--serve) ─────────────────────────────────────────────
+
+class PoolCheckouts:
+    """Counts checkouts from the app's connection pool. ThreadedConnectionPool
+    never blocks: a checkout either returns at once or raises PoolError when
+    every connection is lent out, so exhaustion is what gets reported, plus
+    the checkout overhead (not a queueing wait)."""
+
+    def __init__(self, pool):
+        self.lock      = threading.Lock()
+        self.samples   = []
+        self.exhausted = 0
+        self._getconn  = pool.getconn
+        pool.getconn   = self.getconn
+
+    def getconn(self, *args, **kwargs):
+        import psycopg2.pool
+        t0 = time.perf_counter()
+        try:
+            conn = self._getconn(*args, **kwargs)
+        except psycopg2.pool.PoolError:
+            with self.lock:
+                self.exhausted += 1
+            raise
+        with self.lock:
+            self.samples.append(time.perf_counter() - t0)
+        return conn
+
+def serve_in_process(threads):
+    import app as trivia
+    from waitress.server import create_server
+    trivia.init_db()
+    pool_stats = PoolCheckouts(trivia._get_pool())
+    server = create_server(trivia.app, host='127.0.0.1', port=0, threads=threads)
+    threading.Thread(target=server.run, daemon=True).start()
+    return f'http://127.0.0.1:{server.effective_port}', server, pool_stats
+
+
+# ─── Report ───────────────────────────────────────────────────────────────────
+
+def build_report(args, stats, elapsed, db_before, db_after, pool_stats):
+    endpoints = {}
+    for label, vals in sorted(stats.latencies.items()):
+        s = sorted(vals)
+        endpoints[label] = dict(
+            count=len(s), errors=stats.errors.get(label, 0),
+            p50_ms=round(percentile(s, 50) * 1000, 1),
+            p95_ms=round(percentile(s, 95) * 1000, 1),
+            p99_ms=round(percentile(s, 99) * 1000, 1),
+            max_ms=round(s[-1] * 1000, 1),
+        )
+    total = sum(e['count'] for e in endpoints.values())
+    report = dict(
+        users=args.users, elapsed_s=round(elapsed, 2),
+        requests=total, requests_per_s=round(total / elapsed, 1) if elapsed else 0,
+        answers=stats.answers, answers_per_s=round(stats.answers / elapsed, 1) if elapsed else 0,
+        completed=stats.completed, endpoints=endpoints,
+    )
+    if pool_stats and (pool_stats.samples or pool_stats.exhausted):
+        s = sorted(pool_stats.samples) or [0.0]
+        report['pool'] = dict(checkouts=len(pool_stats.samples), exhausted=pool_stats.exhausted,
+                              overhead_p95_ms=round(percentile(s, 95) * 1000, 3),
+                              overhead_max_ms=round(s[-1] * 1000, 3))
+    if db_before and db_after:
+        report['db'] = {k: (db_after[k] - db_before[k])
+                        if db_after[k] is not None and db_before[k] is not None else None
+                        for k in db_after}
+        if report['db']['statements'] is not None and stats.answers:
+            report['db']['statements_per_answer'] = round(report['db']['statements'] / stats.answers, 1)
+    return report
+
+def print_report(report, previous=None):
+    def delta(key, cur, prev_map):
+        if not prev_map or key not in prev_map or not prev_map[key]:
+            return ''
+        change = 100.0 * (cur - prev_map[key]) / prev_map[key]
+        return f' ({change:+.0f}%)'
+
+    print()
+    print(f"Users {report['users']} · {report['elapsed_s']}s · "
+          f"{report['requests']} requests ({report['requests_per_s']}/s{delta('requests_per_s', report['requests_per_s'], previous)}) · "
+          f"{report['answers']} answers ({report['answers_per_s']}/s) · {report['completed']} completed")
+    print()
+    print(f"{'endpoint':<28}{'count':>8}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    prev_eps = (previous or {}).get('endpoints', {})
+    for label, e in report['endpoints'].items():
+        print(f"{label:<28}{e['count']:>8}{e['errors']:>6}{e['p50_ms']:>10}{e['p95_ms']:>10}"
+              f"{e['p99_ms']:>10}{e['max_ms']:>10}{delta('p95_ms', e['p95_ms'], prev_eps.get(label))}")
+    if 'pool' in report:
+        pool = report['pool']
+        print(f"\nPool: {pool['checkouts']} checkouts · {pool['exhausted']} refused (pool exhausted)"
+              f"{delta('exhausted', pool['exhausted'], (previous or {}).get('pool'))} · "
+              f"checkout overhead p95 {pool['overhead_p95_ms']} ms · max {pool['overhead_max_ms']} ms")
+    if 'db' in report:
+        db = report['db']
+        stmts = db['statements'] if db['statements'] is not None else 'n/a (install pg_stat_statements)'
+        print(f"DB: {db['transactions']} transactions · {stmts} statements · "
+              f"{db['rows_inserted']} rows inserted · {db['rows_read']} rows read")
+        if 'statements_per_answer' in db:
+            print(f"    {db['statements_per_answer']} statements per answer"
+                  f"{delta('statements_per_answer', db['statements_per_answer'], (previous or {}).get('db'))}")
+
+
+# ─── Main ─────────────────────────────────────────────────────────────────────
+
+def main():
+    ap = argparse.ArgumentParser(description='Load-test the Bible Trivia quiz flow.')
+    ap.add_argument('--session-id', type=int, required=True, help='quiz session to play')
+    ap.add_argument('--users', type=int, default=50, help='simulated participants')
+    ap.add_argument('--url', default='http://localhost:5000', help='base URL of a running app')
+    ap.add_argument('--serve', action='store_true', help='serve the app in-process with Waitress')
+    ap.add_argument('--threads', type=int, default=8, help='Waitress threads for --serve')
+    ap.add_argument('--think', choices=['none', 'fixed', 'exp', 'lognormal'], default='lognormal')
+    ap.add_argument('--think-mean', type=float, default=3.0, help='mean think time (s)')
+    ap.add_argument('--poll', type=float, default=30.0, help='timer poll interval (s), 0 = off')
+    ap.add_argument('--cheat-rate', type=float, default=0.05, help='chance of a cheat flag per question')
+    ap.add_argument('--stampede', action='store_true', help='everyone presses Start at the same instant')
+    ap.add_argument('--ramp', type=float, default=10.0, help='spread arrivals over N seconds (no stampede)')
+    ap.add_argument('--phone-prefix', default='0799', help='prefix for synthetic phone numbers')
+    ap.add_argument('--seed', type=int, default=1, help='RNG seed')
+    ap.add_argument('--save', help='write the JSON report here')
+    ap.add_argument('--compare', help='previous JSON report to diff against')
+    ap.add_argument('--cleanup', action='store_true', help='delete synthetic users and exit')
+    args = ap.parse_args()
+
+    if args.cleanup:
+        cleanup(args)
+        return
+
+    server = pool_stats = None
+    if args.serve:
+        args.url, server, pool_stats = serve_in_process(args.threads)
+        print(f'Serving app in-process at {args.url} ({args.threads} threads)')
+
+    stats   = Stats()
+    barrier = threading.Barrier(args.users) if args.stampede else None
+    workers = [threading.Thread(target=participant, args=(i, args, stats, barrier), daemon=True)
+               for i in range(args.users)]
+    db_before = db_counters()
+    t0 = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed  = time.perf_counter() - t0
+    db_after = db_counters()
+    if server:
+        server.close()
+
+    report   = build_report(args, stats, elapsed, db_before, db_after, pool_stats)
+    previous = None
+    if args.compare:
+        with open(args.compare) as fh:
+            previous = json.load(fh)
+    print_report(report, previous)
+    if args.save:
+        with open(args.save, 'w') as fh:
+            json.dump(report, fh, indent=2)
+        print(f'\nReport saved to {args.save}')
+
+
+if __name__ == '__main__':
+    main()
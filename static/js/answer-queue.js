@@ -0,0 +1,112 @@
+/* Durable answer queue (IndexedDB), shared by quiz.html and the service worker.
+ *
+ * Each item is {key, url, payload, queued_at} where key = "<attempt>:<question>"
+ * — the same idempotency key the server enforces — so re-queuing or re-sending
+ * an answer can never score it twice. flush() posts what is queued for a URL
+ * to /api/quiz/<id>/answers in batches of at most BATCH_MAX and drops every
+ * item of a batch the server answered: each item gets exactly one result
+ * (recorded, duplicate or rejected). A batch refused outright with a 4xx is
+ * dropped too — resending it cannot succeed. Network errors leave items
+ * queued; server errors do as well, up to MAX_TRIES per item.
+ */
+(function (root) {
+  'use strict';
+  const DB_NAME = 'trivia-answers';
+  const STORE   = 'queue';
+  const BATCH_MAX = 200;   // the server's ANSWER_BATCH_MAX
+  const MAX_TRIES = 5;     // 5xx responses before an item is given up on
+
+  function openDb() {
+    return new Promise((resolve, reject) => {
+      const req = root.indexedDB.open(DB_NAME, 1);
+      req.onupgradeneeded = () => req.result.createObjectStore(STORE, {keyPath: 'key'});
+      req.onsuccess = () => resolve(req.result);
+      req.onerror   = () => reject(req.error);
+    });
+  }
+
+  function withStore(mode, fn) {
+    return openDb().then(db => new Promise((resolve, reject) => {
+      const tx  = db.transaction(STORE, mode);
+      const req = fn(tx.objectStore(STORE));
+      tx.oncomplete = () => { db.close(); resolve(req ? req.result : undefined); };
+      tx.onerror    = () => { db.close(); reject(tx.error); };
+    }));
+  }
+
+  const AnswerQueue = {
+    available: !!root.indexedDB,
+
+    put(item) {
+      return withStore('readwrite', store => store.put(item));
+    },
+
+    all() {
+      return withStore('readonly', store => store.getAll());
+    },
+
+    remove(keys) {
+      if (!keys.length) return Promise.resolve();
+      return withStore('readwrite', store => { keys.forEach(k => store.delete(k)); });
+    },
+
+    putAll(items) {
+      if (!items.length) return Promise.resolve();
+      return withStore('readwrite', store => { items.forEach(item => store.put(item)); });
+    },
+
+    /* POST one batch; resolves with the response body once the batch is
+       settled, rejects when it must stay queued. */
+    sendBatch(url, batch) {
+      const keys = batch.map(item => item.key);
+      return fetch(url, {
+        method: 'POST',
+        credentials: 'same-origin',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({answers: batch.map(item => item.payload)}),
+      }).then(r => {
+        if (r.status >= 500) {
+          const tried = batch.map(item => Object.assign({}, item, {tries: (item.tries || 0) + 1}));
+          const spent = tried.filter(item => item.tries >= MAX_TRIES);
+          if (spent.length) console.warn('Answer queue: giving up on', spent.map(item => item.key));
+          return this.putAll(tried.filter(item => item.tries < MAX_TRIES))
+            .then(() => this.remove(spent.map(item => item.key)))
+            .then(() => { throw new Error('server error ' + r.status); });
+        }
+        if (r.status >= 400 && r.status !== 409 && r.status !== 408 && r.status !== 429) {
+          console.warn('Answer queue: batch refused with', r.status, keys);
+          return r.json().catch(() => ({})).then(body => this.remove(keys).then(() => body));
+        }
+        return r.json()   // a login redirect is HTML: throws, stays queued
+          .then(body => this.remove(body.results ? keys : []).then(() => body));
+      });
+    },
+
+    /* Send queued answers (all URLs, or only `onlyUrl`). Resolves with the
+       server's response body for `onlyUrl` (null if nothing was queued);
+       rejects if any batch could not be delivered. */
+    flush(onlyUrl) {
+      return this.all().then(items => {
+        const groups = {};
+        items.forEach(item => {
+          if (!onlyUrl || item.url === onlyUrl) (groups[item.url] = groups[item.url] || []).push(item);
+        });
+        return Promise.all(Object.keys(groups).map(url => {
+          // Batches for one attempt go in order, so the last body is current
+          const batches = [];
+          for (let i = 0; i < groups[url].length; i += BATCH_MAX) {
+            batches.push(groups[url].slice(i, i + BATCH_MAX));
+          }
+          return batches.reduce((prev, batch) => prev.then(() => this.sendBatch(url, batch)),
+                                Promise.resolve(null))
+            .then(body => ({url, body}));
+        })).then(responses => {
+          const mine = responses.find(r => r.url === onlyUrl);
+          return mine ? mine.body : null;
+        });
+      });
+    },
+  };
+
+  root.AnswerQueue = AnswerQueue;
+})(self);
@@ -0,0 +1,301 @@
+/* Quiz home page: session cards, start modal and scheduled-start countdowns.
+ * Reads the per-page SESSIONS map that quiz_home.html defines inline. */
+let modalTimerInterval = null;
+let homeTimerIntervals = {};
+
+// ── Start all home-page mini countdowns ───────────────────────────────────
+document.addEventListener('DOMContentLoaded', () => {
+  // Timed session countdowns
+  document.querySelectorAll('[id^="home-timer-"]').forEach(el => {
+    const sid = parseInt(el.id.replace('home-timer-', ''));
+    let rem = parseInt(el.dataset.remaining);
+    function tick() {
+      if (rem < 0) rem = 0;
+      const m = Math.floor(rem / 60), s = rem % 60;
+      el.textContent = String(m).padStart(2,'0') + ':' + String(s).padStart(2,'0');
+      if (rem <= 60)       el.className = el.className.replace(/text-\S+/g,'') + ' font-mono font-bold text-sm text-red-600';
+      else if (rem <= 300) el.className = el.className.replace(/text-\S+/g,'') + ' font-mono font-bold text-sm text-orange-600';
+      if (rem <= 0) { clearInterval(homeTimerIntervals[sid]); return; }
+      rem--;
+    }
+    tick();
+    homeTimerIntervals[sid] = setInterval(tick, 1000);
+  });
+
+  // Scheduled-start countdowns — with backend verification on unlock
+  document.querySelectorAll('[id^="sched-counter-"]').forEach(el => {
+    const sid  = parseInt(el.dataset.sid);
+    let   secs = parseInt(el.dataset.seconds);
+    const sData = SESSIONS[sid];
+
+    function fmtCountdown(s) {
+      const h = Math.floor(s / 3600);
+      const m = Math.floor((s % 3600) / 60);
+      const sc = s % 60;
+      return (h > 0 ? String(h).padStart(2,'0') + ':' : '')
+           + String(m).padStart(2,'0') + ':' + String(sc).padStart(2,'0');
+    }
+
+    function unlockSession() {
+      // Verify with backend before unlocking — prevents clock skew cheating
+      const url = sData?.statusUrl;
+      if (!url) return doUnlock();
+      fetch(url)
+        .then(r => r.json())
+        .then(data => {
+          if (data.open) {
+            doUnlock();
+          } else if (data.seconds_until > 0) {
+            // Server says not yet — resync and keep counting
+            secs = data.seconds_until;
+          }
+          // else inactive — leave locked
+        })
+        .catch(() => {
+          // Network error — optimistically unlock (server will re-block on POST)
+          doUnlock();
+        });
+    }
+
+    function doUnlock() {
+      // Swap banner from blue → green
+      const banner = document.getElementById('sched-banner-' + sid);
+      if (banner) {
+        banner.className = banner.className.replace('bg-blue-50', 'bg-green-50');
+        banner.innerHTML = '<span class="text-xs">🟢</span>'
+          + '<span class="text-xs text-green-700 font-medium font-semibold">Quiz is open — start now!</span>';
+      }
+      // Swap locked button → active Start Quiz button
+      const btn = document.getElementById('start-btn-' + sid);
+      if (btn) {
+        btn.disabled  = false;
+        btn.className = 'bg-amber-800 hover:bg-amber-700 text-amber-50 text-xs sm:text-sm px-3 sm:px-4 py-2 rounded-lg font-medium transition text-center whitespace-nowrap';
+        btn.textContent = 'Start Quiz →';
+        btn.onclick = () => openModal(sid);
+        // Update SESSIONS data so modal works correctly
+        if (sData) { sData.schedStarted = true; }
+      }
+    }
+
+    const iv = setInterval(() => {
+      if (secs <= 0) {
+        clearInterval(iv);
+        el.textContent = '';
+        unlockSession();
+        return;
+      }
+      el.textContent = fmtCountdown(secs);
+      // Colour urgency
+      if (secs <= 60)       el.className = 'font-mono font-bold text-xs text-red-600 ml-1';
+      else if (secs <= 300) el.className = 'font-mono font-bold text-xs text-orange-600 ml-1';
+      else                  el.className = 'font-mono font-bold text-xs text-blue-800 ml-1';
+      secs--;
+    }, 1000);
+
+    // Initial render
+    if (secs > 0) el.textContent = fmtCountdown(secs);
+  });
+});
+
+// ── Modal open ─────────────────────────────────────────────────────────────
+function openModal(sid) {
+  const s = SESSIONS[sid];
+  if (!s) return;
+
+  // Clear any previous modal timer
+  clearInterval(modalTimerInterval);
+
+  // Title
+  document.getElementById('modal-title').textContent = s.name;
+
+  // Wire the form: in-progress = GET to take_quiz, else POST to start_quiz
+  const form = document.getElementById('modal-start-form');
+  const goBtn = document.getElementById('modal-go-btn');
+
+  if (s.isInProgress) {
+    form.method = 'GET';
+    form.action = s.url;
+    goBtn.textContent = 'Continue →';
+    goBtn.disabled = false;
+    goBtn.className = 'w-full py-2.5 bg-amber-700 hover:bg-amber-600 text-white rounded-xl font-semibold text-sm transition text-center';
+  } else if (s.isCompleted) {
+    form.method = 'POST';
+    form.action = s.startUrl;
+    goBtn.textContent = 'Retry →';
+    goBtn.disabled = false;
+    goBtn.className = 'w-full py-2.5 bg-amber-800 hover:bg-amber-700 text-white rounded-xl font-semibold text-sm transition text-center';
+  } else if (s.scheduled && !s.schedStarted) {
+    // Locked — quiz hasn't started yet
+    form.method = 'POST';
+    form.action = '#';
+    goBtn.textContent = '🔒 Not Started Yet';
+    goBtn.disabled = true;
+    goBtn.className = 'w-full py-2.5 bg-slate-200 text-slate-400 cursor-not-allowed rounded-xl font-semibold text-sm text-center';
+  } else {
+    form.method = 'POST';
+    form.action = s.startUrl;
+    goBtn.textContent = "Let's Go →";
+    goBtn.disabled = false;
+    goBtn.className = 'w-full py-2.5 bg-amber-800 hover:bg-amber-700 text-white rounded-xl font-semibold text-sm transition text-center';
+  }
+
+  // Status badge
+  const statusEl = document.getElementById('modal-status');
+  const badge    = document.getElementById('modal-status-badge');
+  if (s.isInProgress) {
+    statusEl.classList.remove('hidden');
+    badge.textContent = '⏳ In Progress';
+    badge.className = 'text-xs px-3 py-1 rounded-full font-semibold bg-amber-100 text-amber-700';
+  } else if (s.isCompleted) {
+    statusEl.classList.remove('hidden');
+    badge.textContent = '✅ Completed — Retrying';
+    badge.className = 'text-xs px-3 py-1 rounded-full font-semibold bg-green-100 text-green-700';
+  } else {
+    statusEl.classList.add('hidden');
+  }
+
+  // Scheduled start block
+  const schedBlock = document.getElementById('modal-sched-block');
+  if (s.scheduled && !s.isInProgress) {
+    schedBlock.classList.remove('hidden');
+    document.getElementById('modal-sched-str').textContent = s.schedStr + ' EAT';
+    const schedCountdown = document.getElementById('modal-sched-countdown');
+    if (!s.schedStarted) {
+      schedCountdown.classList.remove('hidden');
+      let secsUntil = s.secondsUntil;
+      clearInterval(window._schedModalInterval);
+
+      function verifyAndUnlockModal() {
+        if (!s.statusUrl) { doModalUnlock(); return; }
+        fetch(s.statusUrl)
+          .then(r => r.json())
+          .then(data => {
+            if (data.open) {
+              doModalUnlock();
+            } else if (data.seconds_until > 0) {
+              secsUntil = data.seconds_until; // resync
+            }
+          })
+          .catch(() => doModalUnlock()); // optimistic on network error
+      }
+
+      function doModalUnlock() {
+        clearInterval(window._schedModalInterval);
+        document.getElementById('modal-sched-countdown-val').textContent = 'Open now!';
+        schedCountdown.className = schedCountdown.className.replace('hidden','');
+        goBtn.textContent = "Let's Go →";
+        goBtn.disabled = false;
+        goBtn.className = 'w-full py-2.5 bg-amber-800 hover:bg-amber-700 text-white rounded-xl font-semibold text-sm transition text-center';
+        form.action = s.startUrl;
+        if (s) s.schedStarted = true;
+      }
+
+      function tickSchedModal() {
+        if (secsUntil <= 0) {
+          clearInterval(window._schedModalInterval);
+          verifyAndUnlockModal();
+          return;
+        }
+        const h = Math.floor(secsUntil/3600);
+        const m = Math.floor((secsUntil%3600)/60);
+        const sc = secsUntil % 60;
+        document.getElementById('modal-sched-countdown-val').textContent =
+          (h > 0 ? String(h).padStart(2,'0')+':' : '') +
+          String(m).padStart(2,'0') + ':' + String(sc).padStart(2,'0');
+        secsUntil--;
+      }
+      tickSchedModal();
+      window._schedModalInterval = setInterval(tickSchedModal, 1000);
+    } else {
+      schedCountdown.classList.add('hidden');
+    }
+  } else {
+    schedBlock.classList.add('hidden');
+  }
+
+  // Timer block
+  const timerBlock = document.getElementById('modal-timer-block');
+  if (s.hasTimer) {
+    timerBlock.classList.remove('hidden');
+    document.getElementById('modal-timelimit').textContent = s.timeMins + ' min';
+
+    if (s.isInProgress && s.remaining !== null) {
+      document.getElementById('modal-countdown-wrap').classList.remove('hidden');
+      document.getElementById('modal-timelimit-wrap').classList.add('hidden');
+      document.getElementById('modal-timer-bar-wrap').classList.remove('hidden');
+      document.getElementById('modal-timer-warning').classList.remove('hidden');
+      document.getElementById('modal-timer-label').textContent = 'Timer is running!';
+      document.getElementById('modal-timer-sub').textContent = 'Started when you first opened this session';
+
+      let rem = s.remaining;
+      const totalSecs = s.timeMins * 60;
+
+      function updateModalTimer() {
+        if (rem < 0) rem = 0;
+        const m = Math.floor(rem / 60), sc = rem % 60;
+        const countdownEl = document.getElementById('modal-countdown');
+        countdownEl.textContent = String(m).padStart(2,'0') + ':' + String(sc).padStart(2,'0');
+        if (rem <= 60)       countdownEl.className = 'font-mono font-bold text-2xl tabular-nums text-red-600';
+        else if (rem <= 300) countdownEl.className = 'font-mono font-bold text-2xl tabular-nums text-orange-600';
+        else                 countdownEl.className = 'font-mono font-bold text-2xl tabular-nums text-amber-800';
+        const pct = totalSecs > 0 ? Math.max((rem / totalSecs) * 100, 0) : 0;
+        const bar = document.getElementById('modal-timer-bar');
+        bar.style.width = pct + '%';
+        bar.style.background = rem <= 60 ? '#dc2626' : rem <= 300 ? '#c2410c' : '#b45309';
+        if (rem <= 0) clearInterval(modalTimerInterval);
+        rem--;
+      }
+      updateModalTimer();
+      modalTimerInterval = setInterval(updateModalTimer, 1000);
+
+    } else {
+      document.getElementById('modal-countdown-wrap').classList.add('hidden');
+      document.getElementById('modal-timelimit-wrap').classList.remove('hidden');
+      document.getElementById('modal-timer-bar-wrap').classList.add('hidden');
+      document.getElementById('modal-timer-warning').classList.add('hidden');
+      document.getElementById('modal-timer-label').textContent = 'Time Limit';
+      document.getElementById('modal-timer-sub').textContent = 'The timer starts the moment you click "Let\'s Go" and runs until you submit or time is up.';
+    }
+  } else {
+    timerBlock.classList.add('hidden');
+  }
+
+  // Randomize block
+  if (s.randomize && !s.isCompleted) {
+    document.getElementById('modal-random-block').classList.remove('hidden');
+  } else {
+    document.getElementById('modal-random-block').classList.add('hidden');
+  }
+
+  // Generic ready block
+  if (!s.hasTimer && !s.randomize && !s.scheduled) {
+    document.getElementById('modal-ready-block').classList.remove('hidden');
+  } else {
+    document.getElementById('modal-ready-block').classList.add('hidden');
+  }
+
+  // Show modal
+  const modal = document.getElementById('session-modal');
+  modal.classList.remove('hidden');
+  modal.classList.add('flex');
+  const box = document.getElementById('modal-box');
+  box.classList.remove('animate-in');
+  void box.offsetWidth;
+  box.classList.add('animate-in');
+}
+
+function closeModal() {
+  clearInterval(modalTimerInterval);
+  clearInterval(window._schedModalInterval);
+  const modal = document.getElementById('session-modal');
+  modal.classList.add('hidden');
+  modal.classList.remove('flex');
+}
+
+// Close on backdrop click
+document.getElementById('session-modal').addEventListener('click', function(e) {
+  if (e.target === this) closeModal();
+});
+
+// Close on Escape
+document.addEventListener('keydown', e => { if (e.key === 'Escape') closeModal(); });
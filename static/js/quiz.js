@@ -0,0 +1,743 @@
+/* Quiz page behaviour, loaded by quiz.html after the page markup.
+ *
+ * Per-page values come from window.QUIZ, set inline by the template:
+ *   sessionId, remaining (seconds or null), timeLimitMins, existingFlags,
+ *   clientMode and, in client mode, attemptId, questionId, progress, total,
+ *   questionUrl, bulkUrl, resultsUrl, serviceWorkerUrl.
+ * Everything else is static, so the file is served fingerprinted and cached
+ * for a year instead of being re-sent with every question.
+ */
+
+/* ══════════════════════════════════════════════
+   TIMER — syncs with backend every 30s
+══════════════════════════════════════════════ */
+(function () {
+  if (QUIZ.remaining === null) return;   // no time limit
+
+  let remaining = QUIZ.remaining;
+  const totalSecs = QUIZ.timeLimitMins * 60;
+  const sessionId = QUIZ.sessionId;
+
+  const displayEl = document.getElementById('timer-display');
+  const textEl    = document.getElementById('timer-text');
+  const iconEl    = document.getElementById('timer-icon');
+  const barEl     = document.getElementById('timer-bar');
+  let expired     = false;
+
+  function fmt(secs) {
+    const m = Math.floor(Math.max(secs,0) / 60);
+    const s = Math.max(secs,0) % 60;
+    return String(m).padStart(2,'0') + ':' + String(s).padStart(2,'0');
+  }
+
+  function updateBar(secs) {
+    const pct = totalSecs > 0 ? Math.max((secs / totalSecs) * 100, 0) : 0;
+    barEl.style.width = pct + '%';
+    if (pct > 50)      barEl.style.background = '#15803d';
+    else if (pct > 25) barEl.style.background = '#b45309';
+    else if (pct > 10) barEl.style.background = '#c2410c';
+    else               barEl.style.background = '#dc2626';
+  }
+
+  function updateDisplay(secs) {
+    textEl.textContent = fmt(secs);
+    updateBar(secs);
+    if (secs <= 0) {
+      iconEl.textContent = '🔴';
+      displayEl.className = displayEl.className.replace(/border-\S+/g, '') + ' border-red-400 bg-red-50';
+      textEl.classList.add('text-red-700','timer-critical');
+      textEl.classList.remove('text-amber-800','text-orange-700');
+    } else if (secs <= 30) {
+      iconEl.textContent = '🔴';
+      displayEl.classList.add('border-red-400','bg-red-50');
+      displayEl.classList.remove('border-amber-200','border-orange-300');
+      textEl.classList.add('text-red-700','timer-critical');
+      textEl.classList.remove('text-orange-700','text-amber-800');
+    } else if (secs <= 60) {
+      iconEl.textContent = '🟠';
+      displayEl.classList.add('border-orange-300','bg-orange-50');
+      displayEl.classList.remove('border-amber-200','border-red-400');
+      textEl.classList.add('text-orange-700');
+      textEl.classList.remove('text-amber-800','text-red-700','timer-critical');
+    } else {
+      iconEl.textContent = '⏱';
+      textEl.classList.remove('text-orange-700','text-red-700','timer-critical');
+      textEl.classList.add('text-amber-800');
+    }
+  }
+
+  function expire() {
+    if (expired) return;
+    expired = true;
+    clearInterval(tickInterval);
+    clearInterval(syncInterval);
+    const btn = document.getElementById('submit-btn');
+    if (btn) { btn.disabled = true; btn.textContent = '⏰ Time is up!'; }
+    document.getElementById('expire-form').submit();
+  }
+
+  // ── Backend sync every 30 seconds ──────────────────────────────────────
+  function syncWithBackend() {
+    fetch('/api/timer/' + sessionId)
+      .then(r => r.json())
+      .then(data => {
+        if (data.expired) { expire(); return; }
+        if (data.remaining !== null) {
+          // Correct our local countdown to match server truth
+          remaining = data.remaining;
+          updateDisplay(remaining);
+        }
+      })
+      .catch(() => {}); // silent fail — local countdown keeps going
+  }
+
+  // Initial render
+  updateDisplay(remaining);
+
+  // Local tick
+  const tickInterval = setInterval(() => {
+    remaining -= 1;
+    updateDisplay(remaining);
+    if (remaining <= 0) expire();
+  }, 1000);
+
+  // Server sync
+  const syncInterval = setInterval(syncWithBackend, 30000);
+
+  if (QUIZ.clientMode) {
+    // Client mode answers without leaving the page; stop only when the quiz ends
+    document.addEventListener('quiz:finished', () => {
+      clearInterval(tickInterval);
+      clearInterval(syncInterval);
+    });
+  } else {
+    // Stop ticking when user submits an answer
+    document.getElementById('answer-form')?.addEventListener('submit', () => {
+      clearInterval(tickInterval);
+      clearInterval(syncInterval);
+    });
+  }
+})();
+
+/* ══════════════════════════════════════════════
+   ANSWER INPUTS — global: the inline onchange/onsubmit handlers call these
+══════════════════════════════════════════════ */
+function checkMulti() {
+  const form    = document.getElementById('answer-form');
+  const maxSel  = parseInt(form?.dataset.max || '4', 10);
+  const boxes   = document.querySelectorAll('.multi-check');
+  const checked = document.querySelectorAll('.multi-check:checked');
+  const limitMsg = document.getElementById('multi-limit-msg');
+  const btn     = document.getElementById('submit-btn');
+
+  // Enforce cap: uncheck the current box if limit is exceeded
+  if (checked.length > maxSel) {
+    // Find and uncheck the just-clicked box (the last checked one)
+    // by unchecking all checked boxes beyond the limit
+    let count = 0;
+    boxes.forEach(b => {
+      if (b.checked) {
+        count++;
+        if (count > maxSel) b.checked = false;
+      }
+    });
+  }
+
+  const nowChecked = document.querySelectorAll('.multi-check:checked').length;
+
+  // Show/hide limit message and dim unchecked boxes when at cap
+  if (nowChecked >= maxSel) {
+    if (limitMsg) limitMsg.classList.remove('hidden');
+    boxes.forEach(b => {
+      if (!b.checked) {
+        b.disabled = true;
+        b.closest('label')?.classList.add('opacity-40', 'cursor-not-allowed');
+        b.closest('label')?.classList.remove('cursor-pointer', 'hover:border-amber-400', 'hover:bg-amber-50');
+      }
+    });
+  } else {
+    if (limitMsg) limitMsg.classList.add('hidden');
+    boxes.forEach(b => {
+      b.disabled = false;
+      b.closest('label')?.classList.remove('opacity-40', 'cursor-not-allowed');
+      b.closest('label')?.classList.add('cursor-pointer', 'hover:border-amber-400', 'hover:bg-amber-50');
+    });
+  }
+
+  btn.disabled = nowChecked === 0;
+}
+function validateMulti() {
+  if (!document.querySelectorAll('.multi-check:checked').length) {
+    alert('Please select at least one answer.'); return false;
+  }
+  return true;
+}
+function checkFillBlanks() {
+  const selects = document.querySelectorAll('.blank-select');
+  document.getElementById('submit-btn').disabled = [...selects].some(s => !s.value);
+}
+document.addEventListener('DOMContentLoaded', () => {
+  if (document.querySelectorAll('.blank-select').length) checkFillBlanks();
+});
+
+/* ══════════════════════════════════════════════
+   CLIENT MODE — answers are queued in IndexedDB (answer-queue.js) and sent to
+   /api/quiz/<id>/answers as JSON; the next question (prefetched while this
+   one is on screen) is swapped in place.
+══════════════════════════════════════════════ */
+(function () {
+  'use strict';
+  if (!QUIZ.clientMode) return;
+
+  const QUESTION_URL = QUIZ.questionUrl;
+  const BULK_URL     = QUIZ.bulkUrl;
+  const RESULTS_URL  = QUIZ.resultsUrl;
+  const ATTEMPT_ID   = QUIZ.attemptId;
+  const card = document.getElementById('question-card');
+  let current  = QUIZ.questionId;
+  let progress = QUIZ.progress;
+  let total    = QUIZ.total;
+  let prefetch = null;   // Promise of the question after `current`
+  let busy     = false;
+
+  const BTN_CLS = 'w-full bg-amber-800 hover:bg-amber-700 text-amber-50 font-semibold py-3 sm:py-3.5 rounded-xl text-base sm:text-lg font-cinzel tracking-wide transition shadow disabled:opacity-40 disabled:cursor-not-allowed';
+  const BTN = '<button type="submit" id="submit-btn" class="' + BTN_CLS + '" disabled>Submit Answer →</button>';
+
+  function esc(v) {
+    return String(v == null ? '' : v).replace(/[&<>"']/g,
+      c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c]));
+  }
+
+  function headerHtml(q) {
+    let badge;
+    if (q.type === 'multi') {
+      badge = '<span class="bg-purple-500/30 text-purple-200 text-xs px-2 py-0.5 rounded-full font-medium">☑ Select up to '
+            + q.max_select + ' answer' + (q.max_select !== 1 ? 's' : '') + '</span>';
+    } else if (q.type === 'fill_blank') {
+      badge = '<span class="bg-blue-500/30 text-blue-200 text-xs px-2 py-0.5 rounded-full font-medium">✏ Fill in the blanks</span>';
+    } else {
+      badge = '<span class="text-amber-300 text-xs font-medium uppercase tracking-widest">Single Choice</span>';
+    }
+    return '<div class="bg-amber-800 px-4 sm:px-5 py-2.5 sm:py-3 flex items-center justify-between">'
+         + '<div class="flex items-center gap-2">' + badge + '</div>'
+         + '<span class="bg-yellow-500/20 text-yellow-200 text-xs font-bold px-2.5 py-1 rounded-full flex-shrink-0">✦ '
+         + esc(q.points) + ' pt' + (q.points !== 1 ? 's' : '') + '</span></div>';
+  }
+
+  function fillBlankHtml(q) {
+    let sentence = '';
+    q.parts.forEach((part, i) => {
+      sentence += esc(part);
+      if (i < q.parts.length - 1 && i < q.blanks.length) {
+        sentence += '<select name="blank_' + i + '" class="blank-select inline-block border-b-2 border-amber-600 bg-white hover:bg-amber-50 text-amber-900 font-semibold px-1.5 py-1 mx-1 rounded-lg text-xs sm:text-sm focus:outline-none focus:border-amber-800 transition cursor-pointer" required onchange="checkFillBlanks()"><option value="">choose…</option>'
+                  + q.blanks[i].map(o => '<option value="' + esc(o) + '">' + esc(o) + '</option>').join('')
+                  + '</select>';
+      }
+    });
+    return '<form method="POST" id="answer-form" class="p-4 sm:p-6">'
+         + '<p class="text-stone-400 text-sm mb-4 text-center italic">Choose an option for each blank to complete the sentence</p>'
+         + '<div class="font-cinzel text-base sm:text-lg text-amber-950 leading-loose text-center bg-amber-50 rounded-xl px-4 sm:px-5 py-4 sm:py-5 border border-amber-100">'
+         + sentence + '</div><div class="pt-4 sm:pt-5">' + BTN + '</div></form>';
+  }
+
+  function choiceHtml(q) {
+    const multi = q.type === 'multi';
+    const opts = q.options.map(o => multi
+      ? '<label class="flex items-center gap-3 sm:gap-4 p-3 sm:p-4 rounded-xl border-2 border-amber-100 hover:border-amber-400 hover:bg-amber-50 cursor-pointer transition group">'
+        + '<input type="checkbox" name="answer" value="' + o.letter + '" class="multi-check w-4 h-4 sm:w-5 sm:h-5 rounded border-2 border-amber-300 accent-amber-700 flex-shrink-0" onchange="checkMulti()"/>'
+        + '<div class="flex-shrink-0 w-8 h-8 sm:w-9 sm:h-9 rounded-full border-2 border-amber-200 flex items-center justify-center font-cinzel font-bold text-xs sm:text-sm text-amber-600 transition">' + o.letter + '</div>'
+        + '<span class="text-stone-700 font-medium flex-1 text-sm sm:text-base">' + esc(o.text) + '</span></label>'
+      : '<label class="flex items-center gap-3 sm:gap-4 p-3 sm:p-4 rounded-xl border-2 border-amber-100 hover:border-amber-400 hover:bg-amber-50 cursor-pointer transition group has-[:checked]:border-amber-700 has-[:checked]:bg-amber-50">'
+        + '<input type="radio" name="answer" value="' + o.letter + '" class="sr-only" required onchange="document.getElementById(\'submit-btn\').disabled=false"/>'
+        + '<div class="flex-shrink-0 w-8 h-8 sm:w-9 sm:h-9 rounded-full border-2 border-amber-200 group-has-[:checked]:border-amber-700 group-has-[:checked]:bg-amber-700 flex items-center justify-center font-cinzel font-bold text-xs sm:text-sm text-amber-600 group-has-[:checked]:text-white transition">' + o.letter + '</div>'
+        + '<span class="text-stone-700 font-medium flex-1 text-sm sm:text-base">' + esc(o.text) + '</span></label>'
+    ).join('');
+    const limit = multi
+      ? '<p id="multi-limit-msg" class="hidden text-xs text-red-600 font-medium text-center pt-1">Maximum '
+        + q.max_select + ' selection' + (q.max_select !== 1 ? 's' : '') + ' allowed.</p>'
+      : '';
+    return '<div class="px-4 sm:px-6 pt-5 sm:pt-6 pb-3"><p class="font-cinzel text-lg sm:text-xl font-semibold text-amber-950 leading-relaxed text-center py-2">'
+         + esc(q.text) + '</p></div>'
+         + '<form method="POST" id="answer-form" class="px-4 sm:px-6 pb-5 sm:pb-6 space-y-2.5 sm:space-y-3 pt-3"'
+         + (multi ? ' onsubmit="return validateMulti()" data-max="' + q.max_select + '"' : '') + '>'
+         + opts + limit + '<div class="pt-2">' + BTN + '</div></form>';
+  }
+
+  function renderProgress() {
+    document.getElementById('q-progress-count').textContent = progress + '/' + total;
+    document.getElementById('q-progress-bar').style.width =
+      (total > 0 ? Math.floor(progress / total * 100) : 0) + '%';
+    const dots = document.getElementById('q-dots');
+    if (!dots) return;
+    let html = '';
+    for (let i = 0; i < total; i++) {
+      if (i < progress)        html += '<div class="w-7 h-7 sm:w-8 sm:h-8 rounded-lg bg-amber-100 border border-amber-300 flex items-center justify-center text-xs font-bold text-amber-700">✓</div>';
+      else if (i === progress) html += '<div class="w-7 h-7 sm:w-8 sm:h-8 rounded-lg bg-amber-700 border border-amber-600 flex items-center justify-center text-xs font-bold text-white">●</div>';
+      else                     html += '<div class="w-7 h-7 sm:w-8 sm:h-8 rounded-lg bg-amber-50 border border-amber-200 flex items-center justify-center text-xs text-stone-400">○</div>';
+    }
+    dots.innerHTML = html;
+  }
+
+  function renderQuestion(q) {
+    current = q.id;
+    card.innerHTML = headerHtml(q) + (q.type === 'fill_blank' ? fillBlankHtml(q) : choiceHtml(q));
+    const section = q.section ? esc(q.section) + ' · ' : '';
+    document.getElementById('q-progress-label').innerHTML = section + 'Question ' + (progress + 1);
+    const top = document.getElementById('q-section-top');
+    if (top) top.textContent = q.section || '';
+    renderProgress();
+    prefetch = getJSON(QUESTION_URL + '?skip=' + q.id).catch(() => null);
+  }
+
+  function getJSON(url, opts) {
+    return fetch(url, Object.assign({credentials: 'same-origin'}, opts)).then(r => r.json());
+  }
+
+  function leave(url) {
+    document.dispatchEvent(new Event('quiz:finished'));
+    const expForm = document.getElementById('expire-form');
+    if (!url && expForm) { expForm.submit(); return; }
+    window.location.href = url || window.location.pathname;
+  }
+
+  function collect(form) {
+    const data = new FormData(form);
+    const body = {question_id: current, answer: data.getAll('answer'), blanks: []};
+    if (body.answer.length === 1 && !form.querySelector('.multi-check')) body.answer = body.answer[0];
+    form.querySelectorAll('.blank-select').forEach((sel, i) => { body.blanks[i] = sel.value; });
+    return body;
+  }
+
+  /* ── Sending answers ─────────────────────────────────────────────────
+     Answers are written to the IndexedDB queue before anything goes on the
+     wire, then flushed to the bulk endpoint. If the network drops, the
+     answer stays queued (the service worker or the next reconnect delivers
+     it) and the quiz moves on to the prefetched question. */
+  const QUEUE = window.AnswerQueue && AnswerQueue.available ? AnswerQueue : null;
+  let waitingForNetwork = false;
+
+  function netStatus(text) {
+    let el = document.getElementById('q-net-status');
+    if (!el) {
+      el = document.createElement('div');
+      el.id = 'q-net-status';
+      el.className = 'mb-3 text-center text-xs font-medium text-amber-800 bg-amber-50 border border-amber-200 rounded-xl px-3 py-2';
+      card.parentNode.insertBefore(el, card);
+    }
+    el.textContent = text;
+    el.classList.toggle('hidden', !text);
+  }
+
+  function requestBackgroundSync() {
+    if (!('serviceWorker' in navigator)) return;
+    navigator.serviceWorker.ready
+      .then(reg => reg.sync && reg.sync.register('flush-answers'))
+      .catch(() => {});
+  }
+
+  function send(body) {
+    if (!QUEUE) {
+      return getJSON(BULK_URL, {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({answers: [body]}),
+      });
+    }
+    return QUEUE.put({key: body.key, url: BULK_URL, payload: body, queued_at: Date.now()})
+      .then(() => QUEUE.flush(BULK_URL));
+  }
+
+  function applyServer(res) {
+    if (!res) return false;
+    if (res.expired) { leave(null); return true; }
+    if (res.done)    { leave(res.redirect); return true; }
+    if (typeof res.progress !== 'number') return false;   // batch refused: nothing to sync
+    progress = res.progress;
+    total    = res.total;
+    return false;
+  }
+
+  function showNext(answered) {
+    return (prefetch || Promise.resolve(null)).then(next => {
+      if (!next || !next.question || next.question.id === answered) {
+        return getJSON(QUESTION_URL);
+      }
+      return next;
+    }).then(next => {
+      if (next.expired) return leave(null);
+      if (!next.question) return leave(next.redirect || RESULTS_URL);
+      renderQuestion(next.question);
+    });
+  }
+
+  function retryQueue() {
+    if (!QUEUE || !waitingForNetwork) return;
+    QUEUE.flush(BULK_URL).then(res => {
+      waitingForNetwork = false;
+      netStatus('');
+      if (applyServer(res)) return;
+      // We were stuck without a question to show — fetch it now
+      if (!card.querySelector('#answer-form')) return showNext(null);
+      renderProgress();
+    }).catch(() => {});
+  }
+  window.addEventListener('online', retryQueue);
+  setInterval(retryQueue, 10000);
+
+  card.addEventListener('submit', e => {
+    const rejected = e.defaultPrevented;   // e.g. validateMulti() said no
+    e.preventDefault();
+    if (busy || rejected) return;
+    const form = e.target;
+    busy = true;
+    const btn = document.getElementById('submit-btn');
+    if (btn) btn.disabled = true;
+    const answered = current;
+    const body = collect(form);
+    body.key = ATTEMPT_ID + ':' + answered;
+    send(body).then(res => {
+      if (applyServer(res)) return;
+      return showNext(answered);
+    }).catch(() => {
+      if (!QUEUE) {
+        // No durable queue in this browser: a full page load resumes the attempt
+        return leave(window.location.pathname + '?client=1');
+      }
+      // Offline: the answer is safe in the queue; keep going if we can
+      waitingForNetwork = true;
+      requestBackgroundSync();
+      progress += 1;
+      return (prefetch || Promise.resolve(null)).then(next => {
+        if (next && next.question && next.question.id !== answered) {
+          netStatus('📶 Connection lost — your answers are saved and will be sent automatically.');
+          renderQuestion(next.question);
+        } else {
+          netStatus('📶 Waiting for connection — your answers are saved on this device.');
+          card.innerHTML = '<div class="px-6 py-10 text-center text-stone-500 text-sm">Reconnecting…</div>';
+          renderProgress();
+        }
+      });
+    }).finally(() => { busy = false; });
+  });
+
+  if ('serviceWorker' in navigator) {
+    navigator.serviceWorker.register(QUIZ.serviceWorkerUrl).catch(() => {});
+  }
+
+  renderProgress();
+  prefetch = getJSON(QUESTION_URL + '?skip=' + current).catch(() => null);
+
+  // Answers left queued by an earlier visit go first; if any landed, the
+  // question on screen may be stale, so reload from the server's view.
+  if (QUEUE) {
+    QUEUE.all().then(items => {
+      if (!items.some(item => item.url === BULK_URL)) return;
+      return QUEUE.flush(BULK_URL).then(res => {
+        if (applyServer(res)) return;
+        if ((res.results || []).some(r => r.status === 'recorded')) {
+          leave(window.location.pathname + '?client=1');
+        }
+      });
+    }).catch(() => {});
+  }
+})();
+
+/* ══════════════════════════════════════════════════════════
+   ANTI-CHEAT SYSTEM v2 (see the markup notes in quiz.html)
+══════════════════════════════════════════════════════════ */
+(function () {
+  'use strict';
+
+  /* ── Configuration ──────────────────────────────────────────────────── */
+  const SESSION_ID   = QUIZ.sessionId;
+  const MAX_STRIKES  = 2;
+  const DEBOUNCE_MS  = 300;   // window to collapse duplicate events into 1 strike
+  const GRACE_MS     = 1500;  // ignore blur events this many ms after page load
+  const POLL_MS      = 500;   // hasFocus() polling interval
+
+  /* ── State ─────────────────────────────────────────────────────────────────
+     DB_FLAGS is the authoritative count from the backend (QUIZ.existingFlags).
+     When an admin resets a user's attempt the DB is 0, so we clear stale
+     sessionStorage and start fresh. Within a live attempt we keep the higher
+     of stored vs DB so strikes survive question-to-question page reloads.
+  ── */
+  const STORE_KEY = 'ac_strikes_' + SESSION_ID;
+  const DB_FLAGS  = QUIZ.existingFlags;
+  const _stored   = parseInt(sessionStorage.getItem(STORE_KEY) || '0', 10);
+  // If DB says 0 (fresh / reset attempt), wipe stale sessionStorage
+  if (DB_FLAGS === 0) { try { sessionStorage.removeItem(STORE_KEY); } catch(e) {} }
+  let strikes     = DB_FLAGS === 0 ? 0 : Math.max(_stored, DB_FLAGS);
+  let overlayOpen    = false;
+  let quizSubmitted  = false;
+  let lastLostAt     = 0;     // timestamp of last focus-loss event
+  let pageFocused    = true;  // our own tracked state
+  let pageReadyAt    = Date.now();
+
+  /* ── DOM refs ──────────────────────────────────────────────────────── */
+  const overlay      = document.getElementById('ac-overlay');
+  const autoSubmitEl = document.getElementById('ac-autosubmit');
+  const badge        = document.getElementById('ac-badge');
+  const badgeText    = document.getElementById('ac-badge-text');
+  const warningMsg   = document.getElementById('ac-warning-msg');
+  const strikeMsg    = document.getElementById('ac-strike-msg');
+  const dismissBtn   = document.getElementById('ac-dismiss');
+  const answerForm   = document.getElementById('answer-form');
+
+  /* ── Persist & update badge ─────────────────────────────────────────── */
+  function savePersist() {
+    try { sessionStorage.setItem(STORE_KEY, String(strikes)); } catch(e) {}
+  }
+
+  function updateBadge() {
+    if (strikes === 0) { badge.classList.add('hidden'); return; }
+    badge.classList.remove('hidden');
+    badgeText.textContent = strikes + ' / ' + MAX_STRIKES + ' strike' + (strikes !== 1 ? 's' : '');
+    // pulse animation
+    badge.classList.remove('scale-110');
+    void badge.offsetWidth; // reflow
+    badge.classList.add('scale-110');
+    setTimeout(() => badge.classList.remove('scale-110'), 200);
+  }
+
+  // Restore badge on page load if there are existing strikes
+  updateBadge();
+
+  /* ── Silent flag (no strike — just logs to DB) ──────────────────────── */
+  function silentFlag(type) {
+    fetch('/api/cheat/' + SESSION_ID, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ violation: type })
+    }).catch(() => {});
+  }
+
+  /* ── Strike flag (increments strike + logs) ─────────────────────────── */
+  function addStrike(type) {
+    strikes++;
+    savePersist();
+    updateBadge();
+    silentFlag(type);
+  }
+
+  /* ── Core: lost focus handler (all detection paths funnel here) ──────── */
+  function onFocusLost(source) {
+    if (quizSubmitted) return;
+
+    const now = Date.now();
+    // Grace period: ignore events in the first GRACE_MS after page load
+    if (now - pageReadyAt < GRACE_MS) return;
+    // Debounce: visibilitychange + blur often fire together within ms of each other.
+    // Only count ONE strike per DEBOUNCE_MS window.
+    if (now - lastLostAt < DEBOUNCE_MS) return;
+
+    lastLostAt   = now;
+    pageFocused  = false;
+
+    if (overlayOpen) {
+      // Already showing — just add another silent log, no extra strike
+      silentFlag(source);
+      return;
+    }
+
+    addStrike(source);
+
+    if (strikes >= MAX_STRIKES) {
+      autoSubmitQuiz();
+      return;
+    }
+
+    // Show warning overlay
+    overlayOpen = true;
+    warningMsg.textContent = source === 'tab_switch'
+      ? 'You switched to another tab or minimised the window.'
+      : source === 'devtools'
+        ? 'Developer tools were detected open.'
+        : 'You left the quiz window.';
+    strikeMsg.innerHTML =
+      '⚠️ Strike ' + strikes + ' of ' + MAX_STRIKES + '.<br>' +
+      (MAX_STRIKES - strikes) + ' more will auto-submit your quiz.';
+    overlay.classList.remove('hidden');
+    dismissBtn.focus();
+  }
+
+  /* ── Dismiss overlay ────────────────────────────────────────────────── */
+  function dismissWarning() {
+    overlay.classList.add('hidden');
+    overlayOpen  = false;
+    pageFocused  = true;
+    lastLostAt   = Date.now(); // reset debounce after dismiss so re-focus doesn't re-trigger
+  }
+  dismissBtn.addEventListener('click', dismissWarning);
+
+  /* ── Auto-submit ────────────────────────────────────────────────────── */
+  function autoSubmitQuiz() {
+    if (quizSubmitted) return;
+    quizSubmitted = true;
+    silentFlag('auto_submit');
+    overlay.classList.add('hidden');
+    autoSubmitEl.classList.remove('hidden');
+
+    let secs = 5;
+    document.getElementById('ac-countdown').textContent = secs;
+    const iv = setInterval(() => {
+      secs--;
+      document.getElementById('ac-countdown').textContent = secs;
+      if (secs <= 0) {
+        clearInterval(iv);
+        const expForm = document.getElementById('expire-form');
+        if (expForm) {
+          const ri = document.createElement('input');
+          ri.type = 'hidden'; ri.name = 'reason'; ri.value = 'cheat';
+          expForm.appendChild(ri);
+          expForm.submit();
+        } else {
+          const f = document.createElement('form');
+          f.method = 'POST';
+          f.action = '/quiz/' + SESSION_ID + '/expire';
+          const ri = document.createElement('input');
+          ri.type = 'hidden'; ri.name = 'reason'; ri.value = 'cheat';
+          f.appendChild(ri);
+          document.body.appendChild(f);
+          f.submit();
+        }
+      }
+    }, 1000);
+  }
+
+  /* ════════════════════════════════════════════════════════════
+     DETECTION LAYER 1 — Page Visibility API
+     Fires when tab is hidden (switch tab, minimise, etc.)
+  ════════════════════════════════════════════════════════════ */
+  document.addEventListener('visibilitychange', () => {
+    if (document.hidden) onFocusLost('tab_switch');
+  });
+
+  /* ════════════════════════════════════════════════════════════
+     DETECTION LAYER 2 — Window blur
+     Fires when another app / devtools panel steals focus,
+     even without the tab becoming "hidden".
+     Deduplicated by DEBOUNCE_MS so it doesn't double-count
+     when both visibilitychange AND blur fire together.
+  ════════════════════════════════════════════════════════════ */
+  window.addEventListener('blur', () => onFocusLost('window_blur'));
+
+  /* ════════════════════════════════════════════════════════════
+     DETECTION LAYER 3 — document.hasFocus() polling
+     This is the most reliable cross-browser backstop.
+     Catches cases where events are suppressed or missed.
+  ════════════════════════════════════════════════════════════ */
+  setInterval(() => {
+    if (quizSubmitted) return;
+    const focused = document.hasFocus();
+    if (!focused && pageFocused) {
+      // State just changed to unfocused — treat as a loss event
+      onFocusLost('window_blur');
+    }
+    pageFocused = focused;
+  }, POLL_MS);
+
+  /* ════════════════════════════════════════════════════════════
+     DETECTION LAYER 4 — DevTools size heuristic
+  ════════════════════════════════════════════════════════════ */
+  let devtoolsWasOpen = false;
+  setInterval(() => {
+    if (quizSubmitted) return;
+    const open = (window.outerWidth  - window.innerWidth  > 160) ||
+                 (window.outerHeight - window.innerHeight > 160);
+    if (open && !devtoolsWasOpen) {
+      devtoolsWasOpen = true;
+      onFocusLost('devtools');
+    } else if (!open) {
+      devtoolsWasOpen = false;
+    }
+  }, 1500);
+
+  /* ════════════════════════════════════════════════════════════
+     KEYBOARD BLOCKING
+  ════════════════════════════════════════════════════════════ */
+  document.addEventListener('keydown', e => {
+    const ctrl  = e.ctrlKey || e.metaKey;
+    const shift = e.shiftKey;
+    const key   = e.key ? e.key.toUpperCase() : '';
+
+    if (e.key === 'F12')                              { e.preventDefault(); silentFlag('devtools'); return; }
+    if (ctrl && shift && ['I','J','C','K'].includes(key)) { e.preventDefault(); silentFlag('devtools'); return; }
+    if (ctrl && key === 'U')                          { e.preventDefault(); silentFlag('keyboard_shortcut'); return; }
+    if (ctrl && ['C','V','X','A'].includes(key))      { e.preventDefault(); silentFlag('copy_attempt'); return; }
+    if (ctrl && key === 'P')                          { e.preventDefault(); silentFlag('keyboard_shortcut'); return; }
+    if (ctrl && key === 'S')                          { e.preventDefault(); return; }
+    if (ctrl && key === 'F')                          { e.preventDefault(); silentFlag('keyboard_shortcut'); return; }
+    if (e.key === 'PrintScreen')                      { e.preventDefault(); silentFlag('keyboard_shortcut'); return; }
+  });
+
+  /* ════════════════════════════════════════════════════════════
+     COPY / PASTE / DRAG BLOCKING
+  ════════════════════════════════════════════════════════════ */
+  ['copy','cut','paste'].forEach(evt =>
+    document.addEventListener(evt, e => { e.preventDefault(); silentFlag('copy_attempt'); })
+  );
+  document.addEventListener('dragstart', e => e.preventDefault());
+  document.addEventListener('contextmenu', e => { e.preventDefault(); silentFlag('right_click'); });
+  document.addEventListener('selectstart', e => {
+    if (['INPUT','TEXTAREA','SELECT'].includes(e.target.tagName)) return;
+    e.preventDefault();
+  });
+
+  /* ════════════════════════════════════════════════════════════
+     PRINT BLOCKING
+  ════════════════════════════════════════════════════════════ */
+  window.addEventListener('beforeprint', e => { e.preventDefault(); silentFlag('keyboard_shortcut'); });
+
+  /* ════════════════════════════════════════════════════════════
+     BEFOREUNLOAD WARNING
+  ════════════════════════════════════════════════════════════ */
+  window.addEventListener('beforeunload', e => {
+    if (quizSubmitted) return;
+    e.preventDefault();
+    e.returnValue = 'Leaving will interrupt your quiz. Your progress is saved.';
+    return e.returnValue;
+  });
+
+  // Allow navigation when legitimately submitting an answer
+  if (QUIZ.clientMode) {
+    document.addEventListener('quiz:finished', () => { quizSubmitted = true; });
+  } else {
+    answerForm?.addEventListener('submit', () => { quizSubmitted = true; });
+  }
+
+  /* ════════════════════════════════════════════════════════════
+     LINK INTERCEPTION
+     Catches any <a> clicks that aren't the answer form submit,
+     blocks navigation and shows a gentle reminder instead of
+     logging a strike (since it's likely accidental).
+  ════════════════════════════════════════════════════════════ */
+  document.addEventListener('click', e => {
+    const link = e.target.closest('a[href]');
+    if (!link) return;
+    if (quizSubmitted) return; // allow if already submitting
+    const href = link.getAttribute('href');
+    if (!href || href === '#' || href.startsWith('javascript:')) return;
+    // Block it
+    e.preventDefault();
+    e.stopPropagation();
+    // Show a soft toast reminder instead of a strike
+    showNavBlockToast();
+  }, true);
+
+  let toastTimeout = null;
+  function showNavBlockToast() {
+    let toast = document.getElementById('nav-block-toast');
+    if (!toast) {
+      toast = document.createElement('div');
+      toast.id = 'nav-block-toast';
+      toast.className = 'fixed bottom-6 left-1/2 -translate-x-1/2 z-[9997] bg-slate-800 text-white text-sm font-medium px-5 py-3 rounded-2xl shadow-2xl flex items-center gap-2 transition-opacity duration-300';
+      toast.innerHTML = '<span>🔒</span><span>Navigation disabled during quiz</span>';
+      document.body.appendChild(toast);
+    }
+    toast.style.opacity = '1';
+    toast.style.pointerEvents = 'none';
+    clearTimeout(toastTimeout);
+    toastTimeout = setTimeout(() => { toast.style.opacity = '0'; }, 2200);
+  }
+
+})();
@@ -0,0 +1,22 @@
+/* Shared page chrome: mobile navigation menu. */
+let menuOpen = false;
+function toggleMenu() {
+  menuOpen = !menuOpen;
+  const m = document.getElementById('mobile-menu');
+  const lines = document.querySelectorAll('.hamburger-line');
+  if (menuOpen) {
+    m.classList.add('open');
+    lines[0].style.transform = 'translateY(8px) rotate(45deg)';
+    lines[1].style.opacity = '0';
+    lines[2].style.transform = 'translateY(-8px) rotate(-45deg)';
+  } else {
+    closeMenu();
+  }
+}
+function closeMenu() {
+  menuOpen = false;
+  const m = document.getElementById('mobile-menu');
+  const lines = document.querySelectorAll('.hamburger-line');
+  if (m) m.classList.remove('open');
+  lines.forEach(l => { l.style.transform = ''; l.style.opacity = ''; });
+}
@@ -0,0 +1,11 @@
+/* Service worker: delivers answers left in the IndexedDB queue by quiz.html
+ * once connectivity returns, even if the quiz tab was closed (Background Sync). */
+importScripts('static/js/answer-queue.js');
+
+self.addEventListener('install',  () => self.skipWaiting());
+self.addEventListener('activate', event => event.waitUntil(self.clients.claim()));
+
+self.addEventListener('sync', event => {
+  // A rejected flush makes the browser retry the sync later with backoff
+  if (event.tag === 'flush-answers') event.waitUntil(AnswerQueue.flush());
+});